@@ -0,0 +1,202 @@
+"""
+LLM response cache for AutoSyndicate™ agents
+Content-addressed on prompt template + canonicalized inputs, with an
+in-memory LRU tier and an optional SQLite tier
+"""
+
+from typing import Dict, Any, Optional
+from collections import OrderedDict
+import os
+import json
+import time
+import sqlite3
+import asyncio
+import threading
+
+from agents.singleflight import SingleFlight
+from engine.hashing import canonical_json, content_hash
+
+DEFAULT_MAX_ENTRIES = 1024
+DEFAULT_TTL_SECONDS = 3600
+DEFAULT_MAX_DISK_ENTRIES = 50000
+
+
+class ResponseCache:
+    """
+    Two-tier TTL cache for deterministic LLM responses
+
+    The memory tier is an LRU bounded by max_entries. When db_path is set,
+    entries are also written to SQLite so they survive restarts and are
+    shared by workers on the same host; the disk tier evicts oldest entries
+    once it grows past max_disk_entries.
+
+    get and set are coroutines: memory hits are answered inline, while
+    SQLite reads and writes run in a worker thread so disk I/O never blocks
+    the event loop.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        db_path: Optional[str] = None,
+        max_disk_entries: int = DEFAULT_MAX_DISK_ENTRIES,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_disk_entries = max_disk_entries
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Serializes the shared SQLite connection across worker threads
+        self._db_lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self.db_path = db_path
+        self._db = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS llm_cache_expires ON llm_cache(expires_at)"
+            )
+            self._db.commit()
+
+    @classmethod
+    def from_env(cls) -> "ResponseCache":
+        return cls(
+            max_entries=int(os.getenv("LLM_CACHE_SIZE", DEFAULT_MAX_ENTRIES)),
+            ttl_seconds=float(os.getenv("LLM_CACHE_TTL", DEFAULT_TTL_SECONDS)),
+            db_path=os.getenv("LLM_CACHE_PATH") or None,
+        )
+
+    @staticmethod
+    def make_key(template: str, inputs: Dict[str, Any], namespace: str = "") -> str:
+        """Stable hash of namespace, prompt template and canonical JSON inputs"""
+        return content_hash(namespace, template, canonical_json(inputs))
+
+    async def get(self, key: str) -> Optional[Any]:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._memory[key]
+
+        if self._db is not None:
+            row = await asyncio.to_thread(self._read_disk, key)
+            if row and row[1] > now:
+                value = json.loads(row[0])
+                with self._lock:
+                    self._remember(key, row[1], value)
+                    self.disk_hits += 1
+                return value
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    async def set(self, key: str, value: Any):
+        expires_at = time.time() + self.ttl_seconds
+        with self._lock:
+            self._remember(key, expires_at, value)
+        if self._db is not None:
+            await asyncio.to_thread(
+                self._write_disk, key, json.dumps(value, default=str), expires_at
+            )
+
+    def _read_disk(self, key: str) -> Optional[tuple]:
+        with self._db_lock:
+            if self._db is None:
+                return None
+            return self._db.execute(
+                "SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+
+    def _write_disk(self, key: str, value: str, expires_at: float):
+        with self._db_lock:
+            if self._db is None:
+                return
+            self._db.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, expires_at),
+            )
+            self._db.execute(
+                "DELETE FROM llm_cache WHERE expires_at <= ?", (time.time(),)
+            )
+            self._db.execute(
+                "DELETE FROM llm_cache WHERE key IN ("
+                "SELECT key FROM llm_cache ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_disk_entries,),
+            )
+            self._db.commit()
+
+    def _remember(self, key: str, expires_at: float, value: Any):
+        self._memory[key] = (expires_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "entries": len(self._memory),
+            "hits": self.hits,
+            "diskHits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hitRate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            "diskTier": self.db_path is not None,
+        }
+
+    def close(self):
+        with self._db_lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+async def cached_ainvoke(
+    cache: Optional[ResponseCache],
+    chain: Any,
+    template: str,
+    inputs: Dict[str, Any],
+    namespace: str = "",
+    bypass_cache: bool = False,
+    inflight: Optional[SingleFlight] = None,
+) -> Any:
+    """
+    Invoke a LangChain runnable through the response cache
+
+    bypass_cache skips the lookup but still stores the fresh response, so a
+    forced refresh also repairs a stale entry. With an inflight tracker,
+    concurrent misses for the same key share a single provider call.
+    """
+    if cache is None and inflight is None:
+        return await chain.ainvoke(inputs)
+
+    key = ResponseCache.make_key(template, inputs, namespace)
+    if cache is not None and not bypass_cache:
+        cached = await cache.get(key)
+        if cached is not None:
+            return cached
+
+    async def invoke():
+        result = await chain.ainvoke(inputs)
+        if cache is not None:
+            await cache.set(key, result)
+        return result
+
+    if inflight is None:
+        return await invoke()
+    return await inflight.do(key, invoke)
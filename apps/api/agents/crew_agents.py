@@ -3,31 +3,97 @@ AI Agent implementations using CrewAI for AutoSyndicate™
 Multi-agent system for loan processing, allocation, and monitoring
 """
 
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from dataclasses import dataclass
 import os
-import json
-
-# Conditional imports to avoid errors if packages aren't installed in this environment
-try:
-    from crewai import Agent, Task, Crew
-    from langchain_groq import ChatGroq
-    from langchain_google_genai import ChatGoogleGenerativeAI
-    from langchain_core.prompts import ChatPromptTemplate
-    from langchain_core.output_parsers import JsonOutputParser
-except ImportError:
-    # Fallback/Mock classes if dependencies missing
-    class Agent:
-        pass
-
-    class Task:
-        pass
-
-    class Crew:
-        pass
+import asyncio
+import httpx
+import numpy as np
+
+from agents.cache import ResponseCache, cached_ainvoke
+from agents.prompts import PromptBuilder
+from agents.providers import LazyChain, json_chain, providers
+from agents.singleflight import SingleFlight
+from documents.clauses import (
+    DEFAULT_CONFIDENCE_THRESHOLD,
+    RULE_FIELDS,
+    extract_clauses,
+)
+from documents.index import ClauseIndex
+from documents.ingestion import (
+    DEFAULT_MAX_BYTES,
+    chunk_pages,
+    document_client,
+    download_document,
+    iter_pages,
+    merge_extractions,
+    parse_allowed_hosts,
+)
+from engine.candidates import LenderIndex
+from engine.esg import ESGScorer
+from engine.scoring import LenderMatrix
+from engine.optimizer import AllocationConstraints, solve_allocation
+from engine.similar import SimilarDealIndex
+from monitoring.covenants import CovenantStatsStore, next_check_date
+
+PARSER_PROMPT = """
+    You are an expert financial analyst. Analyze the following loan document and extract structured data.
+    Document Type: {document_type}
+    Pages: {pages}
+
+    Document Text:
+    {document_text}
+
+    Please extract the following fields in JSON format:
+    {fields}
+
+    This is one excerpt of a longer document. Only report values stated in this excerpt;
+    use null (or an empty list) for anything it does not contain.
+    """
 
-    ChatGroq = None
-    ChatGoogleGenerativeAI = None
+PARSER_FIELDS = {
+    "borrower": "borrower (string)",
+    "loanAmount": "loanAmount (number)",
+    "term": "term (number, in months)",
+    "interestRate": "interestRate (number)",
+    "purpose": "purpose (string)",
+    "covenants": "covenants (list of objects with type, name, threshold, frequency)",
+    "riskFactors": "riskFactors (list of strings)",
+    "esgMetrics": "esgMetrics (object with carbonIntensity, esgScore)",
+}
+# Fields only the LLM can fill; requested whenever the LLM is called at all
+DESCRIPTIVE_FIELDS = ("purpose", "riskFactors", "esgMetrics")
+LLM_FIELD_CONFIDENCE = 0.9
+# Share of the optimizer's selection priority taken from similar past syndicates
+PRECEDENT_WEIGHT = 0.2
+# Most candidate lenders serialized into the allocator prompt; the token
+# budget may admit fewer
+PROMPT_LENDERS = 25
+
+ALLOCATOR_PROMPT = """
+    You are an expert loan syndication manager. Match the loan opportunity to the lenders.
+
+    Loan Details:
+    {loan_data}
+
+    Available Lenders (pipe-separated, best match first; blank maxTicket = uncapped):
+    {lender_profiles}
+
+    Constraints:
+    {constraints}
+
+    Similar Past Syndicates (precedent, nearest first; syndicate = lenderId:share):
+    {similar_deals}
+
+    Return a JSON object with a list of "allocations". Each allocation should have:
+    - lenderId
+    - lenderName
+    - amount
+    - percentage
+    - confidence
+    - matchScore
+    - reasoning
+    """
 
 
 @dataclass
@@ -45,67 +111,189 @@ class ParserAgent:
     """
     Document Parser Agent
     Extracts structured data from loan documents using Gemini
+
+    Documents are streamed to a spool file and split into page-range
+    chunks. Clause rules extract the standard fields first; Gemini is only
+    called, chunk by chunk with up to chunk_concurrency calls in flight,
+    for fields the rules could not pin down.
     """
 
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        cache: Optional[ResponseCache] = None,
+        inflight: Optional[SingleFlight] = None,
+        http_client: Optional[httpx.AsyncClient] = None,
+        chunk_concurrency: Optional[int] = None,
+        clause_index: Optional[ClauseIndex] = None,
+    ):
         self.name = "Parser Agent"
         self.api_key = api_key or os.getenv("GOOGLE_API_KEY")
-        self.llm = None
-
-        if self.api_key and ChatGoogleGenerativeAI:
-            self.llm = ChatGoogleGenerativeAI(
-                model="gemini-1.5-pro",
-                google_api_key=self.api_key,
-                temperature=0,
-                convert_system_message_to_human=True,
+        self.cache = cache
+        self.inflight = inflight
+        self.http_client = http_client
+        self.clause_index = clause_index
+        self.chunk_concurrency = chunk_concurrency or int(
+            os.getenv("PARSER_CHUNK_CONCURRENCY", "4")
+        )
+        self.spool_dir = os.getenv("DOCUMENT_SPOOL_DIR") or None
+        self.max_bytes = int(os.getenv("DOCUMENT_MAX_BYTES", DEFAULT_MAX_BYTES))
+        self.allowed_hosts = parse_allowed_hosts(os.getenv("DOCUMENT_ALLOWED_HOSTS"))
+        # Development only: answer failed parses with a canned extraction
+        self.mock_fallback = os.getenv("PARSER_MOCK_FALLBACK", "false").lower() in (
+            "1",
+            "true",
+            "yes",
+        )
+        self.confidence_threshold = float(
+            os.getenv("PARSER_RULE_CONFIDENCE", DEFAULT_CONFIDENCE_THRESHOLD)
+        )
+        # Gemini client and chain are built on the first LLM call
+        self.chain = LazyChain(self._build_chain) if self.api_key else None
+
+    def _build_chain(self) -> Any:
+        genai = providers.load("gemini")
+        if genai is None or providers.load("langchain") is None:
+            return None
+        llm = genai["langchain_google_genai"].ChatGoogleGenerativeAI(
+            model="gemini-1.5-pro",
+            google_api_key=self.api_key,
+            temperature=0,
+            convert_system_message_to_human=True,
+        )
+        return json_chain(PARSER_PROMPT, llm)
+
+    async def extract_document(
+        self,
+        chain: Any,
+        document_url: str,
+        document_type: str,
+        bypass_cache: bool = False,
+    ) -> Tuple[Dict[str, Any], float, str]:
+        """
+        Download, chunk and extract a document
+
+        Clause rules run first; the LLM (if available) is only asked for the
+        rule fields that came back below the confidence threshold, plus the
+        descriptive fields rules cannot produce.
+
+        Returns:
+            (extracted data with fieldConfidence, overall confidence, reasoning)
+        """
+        client = self.http_client or document_client(self.allowed_hosts)
+        try:
+            path = await download_document(
+                client,
+                document_url,
+                self.spool_dir,
+                self.max_bytes,
+                self.allowed_hosts,
+            )
+        finally:
+            if self.http_client is None:
+                await client.aclose()
+
+        try:
+            # Text extraction is CPU-bound; keep it off the event loop
+            chunks = await asyncio.to_thread(
+                lambda: list(chunk_pages(iter_pages(path)))
             )
+        finally:
+            os.unlink(path)
+
+        texts = [chunk.text for chunk in chunks]
+        if self.clause_index is not None:
+            await asyncio.to_thread(
+                self.clause_index.index_document, document_url, document_type, texts
+            )
+
+        rules = await asyncio.to_thread(extract_clauses, texts)
+        missing = rules.low_confidence_fields(self.confidence_threshold)
+
+        llm_data: Dict[str, Any] = {}
+        if missing and chain:
+            fields = "\n".join(
+                f"- {PARSER_FIELDS[f]}" for f in [*missing, *DESCRIPTIVE_FIELDS]
+            )
+            slots = asyncio.Semaphore(self.chunk_concurrency)
+
+            async def extract(chunk) -> Dict[str, Any]:
+                async with slots:
+                    return await cached_ainvoke(
+                        self.cache,
+                        chain,
+                        PARSER_PROMPT,
+                        {
+                            "document_type": document_type,
+                            "pages": f"{chunk.first_page}-{chunk.last_page}",
+                            "document_text": chunk.text,
+                            "fields": fields,
+                        },
+                        namespace="gemini-1.5-pro",
+                        bypass_cache=bypass_cache,
+                        inflight=self.inflight,
+                    )
+
+            results = await asyncio.gather(*(extract(chunk) for chunk in chunks))
+            llm_data = merge_extractions(results)
+
+        data = {field: llm_data.get(field) for field in PARSER_FIELDS}
+        field_confidence = {}
+        for field in RULE_FIELDS:
+            if field not in missing or not llm_data.get(field):
+                # Rules win when confident, and are the best guess otherwise
+                data[field] = rules.data.get(field)
+                field_confidence[field] = rules.confidence.get(field, 0.0)
+            else:
+                field_confidence[field] = LLM_FIELD_CONFIDENCE
+        data["covenants"] = data["covenants"] or []
+        data["riskFactors"] = data["riskFactors"] or []
+        data["esgMetrics"] = data["esgMetrics"] or {}
+        data["fieldConfidence"] = field_confidence
+
+        by_rules = len(RULE_FIELDS) - len(missing)
+        reasoning = f"Extracted {by_rules}/{len(RULE_FIELDS)} fields with clause rules"
+        if llm_data:
+            reasoning += f", the rest with Gemini 1.5 Pro over {len(chunks)} chunks"
+        confidence = sum(field_confidence.values()) / len(RULE_FIELDS)
+        return data, round(confidence, 2), reasoning
 
     async def parse_document(
-        self, document_url: str, document_type: str
+        self,
+        document_url: str,
+        document_type: str,
+        bypass_cache: bool = False,
+        fallback: Optional[bool] = None,
     ) -> AgentResult:
         """
         Parse a loan document and extract structured data
-        """
-        if self.llm:
-            try:
-                # Real implementation with Gemini
-                # Note: In a real scenario, we'd fetch the document content from URL
-                # For this MVP, we assume document_url might contain some text or we use a dummy prompt
-
-                prompt = ChatPromptTemplate.from_template(
-                    """
-                    You are an expert financial analyst. Analyze the following loan document and extract structured data.
-                    Document Type: {document_type}
-                    
-                    Please extract the following fields in JSON format:
-                    - borrower (string)
-                    - loanAmount (number)
-                    - term (number, in months)
-                    - interestRate (number)
-                    - purpose (string)
-                    - covenants (list of objects with type, name, threshold, frequency)
-                    - riskFactors (list of strings)
-                    - esgMetrics (object with carbonIntensity, esgScore)
-                    
-                    If you don't have the actual document content, generate a realistic example for a {document_type}.
-                    """
-                )
 
-                chain = prompt | self.llm | JsonOutputParser()
-                extracted_data = await chain.ainvoke({"document_type": document_type})
+        Download, extraction and provider errors are raised so callers can
+        report or retry them. Only with fallback (PARSER_MOCK_FALLBACK by
+        default, meant for local development) is a failure answered with
+        the mock extraction instead.
+        """
+        if fallback is None:
+            fallback = self.mock_fallback
+        chain = await self.chain.get() if self.chain else None
+        try:
+            extracted_data, confidence, reasoning = await self.extract_document(
+                chain, document_url, document_type, bypass_cache
+            )
 
-                return AgentResult(
-                    success=True,
-                    data=extracted_data,
-                    confidence=0.95,
-                    reasoning="Extracted using Gemini 1.5 Pro",
-                    agent_name=self.name,
-                )
-            except Exception as e:
-                print(f"Error in ParserAgent: {e}")
-                # Fallback to mock on error
+            return AgentResult(
+                success=True,
+                data=extracted_data,
+                confidence=confidence,
+                reasoning=reasoning,
+                agent_name=self.name,
+            )
+        except Exception as e:
+            print(f"Error in ParserAgent: {e}")
+            if not fallback:
+                raise
 
-        # Mock implementation
+        # Development mock, only reached with fallback enabled
         extracted_data = {
             "borrower": "Sample Corporation",
             "loanAmount": 50000000,
@@ -153,60 +341,77 @@ class AllocatorAgent:
     Recommends optimal capital allocation using ML and optimization
     """
 
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        http_async_client: Optional[Any] = None,
+        cache: Optional[ResponseCache] = None,
+        inflight: Optional[SingleFlight] = None,
+        deal_index: Optional[SimilarDealIndex] = None,
+    ):
         self.name = "Allocator Agent"
         self.api_key = api_key or os.getenv("GROQ_API_KEY")
-        self.llm = None
-
-        if self.api_key and ChatGroq:
-            self.llm = ChatGroq(
-                model="llama3-70b-8192", api_key=self.api_key, temperature=0.1
-            )
+        self.http_async_client = http_async_client
+        self.cache = cache
+        self.inflight = inflight
+        self.deal_index = deal_index
+        self.prompts = PromptBuilder.from_env(ALLOCATOR_PROMPT, PROMPT_LENDERS)
+        # Groq client and chain are built on the first LLM call
+        self.chain = LazyChain(self._build_chain) if self.api_key else None
+
+    def _build_chain(self) -> Any:
+        groq = providers.load("groq")
+        if groq is None or providers.load("langchain") is None:
+            return None
+        llm = groq["langchain_groq"].ChatGroq(
+            model="llama3-70b-8192",
+            api_key=self.api_key,
+            temperature=0.1,
+            http_async_client=self.http_async_client,
+        )
+        return json_chain(ALLOCATOR_PROMPT, llm)
 
     async def allocate_capital(
         self,
         loan_data: Dict[str, Any],
         lender_profiles: List[Dict[str, Any]],
         constraints: Optional[Dict[str, Any]] = None,
+        use_llm: bool = False,
+        bypass_cache: bool = False,
     ) -> AgentResult:
         """
         Generate capital allocation recommendations
+
+        The deterministic optimizer is the default path. The LLM is only
+        consulted when explicitly requested via use_llm.
         """
-        if self.llm:
+        lenders = LenderMatrix(lender_profiles)
+        chain = await self.chain.get() if use_llm and self.chain else None
+        if chain:
             try:
-                # Real implementation with Groq
-                prompt = ChatPromptTemplate.from_template(
-                    """
-                    You are an expert loan syndication manager. Match the loan opportunity to the lenders.
-                    
-                    Loan Details:
-                    {loan_data}
-                    
-                    Available Lenders:
-                    {lender_profiles}
-                    
-                    Constraints:
-                    {constraints}
-                    
-                    Return a JSON object with a list of "allocations". Each allocation should have:
-                    - lenderId
-                    - lenderName
-                    - amount
-                    - percentage
-                    - confidence
-                    - matchScore
-                    - reasoning
-                    """
+                # Real implementation with Groq, over the best-scored
+                # candidates that fit the prompt token budget
+                positions = LenderIndex(lenders).candidates(loan_data)
+                scores = lenders.score(loan_data, positions)
+                order = np.argsort(-scores, kind="stable")
+                prompt = self.prompts.build(
+                    loan_data,
+                    lender_profiles,
+                    positions[order].tolist(),
+                    scores[order].tolist(),
+                    constraints,
+                    self.similar_deals(loan_data),
                 )
-
-                chain = prompt | self.llm | JsonOutputParser()
-                result = await chain.ainvoke(
-                    {
-                        "loan_data": json.dumps(loan_data),
-                        "lender_profiles": json.dumps(lender_profiles),
-                        "constraints": json.dumps(constraints or {}),
-                    }
+                result = await cached_ainvoke(
+                    self.cache,
+                    chain,
+                    ALLOCATOR_PROMPT,
+                    prompt.inputs,
+                    namespace="llama3-70b-8192",
+                    bypass_cache=bypass_cache,
+                    inflight=self.inflight,
                 )
+                result = {**result, "prompt": prompt.stats()}
 
                 return AgentResult(
                     success=True,
@@ -219,31 +424,116 @@ class AllocatorAgent:
                 print(f"Error in AllocatorAgent: {e}")
                 # Fallback
 
-        # Mock implementation - replace with actual ML model
-        allocations = []
+        # Deterministic path: vectorized scoring + constraint-aware optimizer.
+        # A one-off request scores every lender in one pass; indexing only
+        # pays off when the universe is reused (see /api/allocate/batch)
+        data = self.optimize(loan_data, lenders, constraints)
+
+        return AgentResult(
+            success=True,
+            data=data,
+            confidence=data["confidence"],
+            reasoning="Allocation solved by constraint-aware optimizer over vectorized match scores.",
+            agent_name=self.name,
+        )
+
+    def similar_deals(self, loan_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Nearest past syndicates for a loan (empty without deal history)"""
+        if self.deal_index is None:
+            return []
+        return self.deal_index.query(loan_data)
+
+    def optimize(
+        self,
+        loan_data: Dict[str, Any],
+        lenders: LenderMatrix,
+        constraints: Optional[Dict[str, Any]] = None,
+        capacity: Optional[np.ndarray] = None,
+        index: Optional[LenderIndex] = None,
+    ) -> Dict[str, Any]:
+        """
+        Score and allocate a loan over a pre-built lender matrix
+
+        Args:
+            loan_data: Loan details
+            lenders: Columnar lender universe
+            constraints: Syndicate constraints (maxLenders, maxConcentration, minMatchScore)
+            capacity: Optional remaining capacity per lender, caps maxInvestment.
+                Decremented in place by the allocated tickets so it can be
+                shared across a batch of loans.
+            index: Optional candidate index over lenders; only its short list
+                is scored, skipping lenders the batch has exhausted. Without
+                it every lender is scored.
+
+        Returns:
+            Allocation data with per-lender tickets and coverage summary
+        """
+        amount = float(loan_data.get("amount") or 0)
+        positions = (
+            np.arange(len(lenders))
+            if index is None
+            else index.candidates(loan_data, capacity)
+        )
+        scores = lenders.score(loan_data, positions)
+        max_ticket = lenders.max_investment[positions]
+        if capacity is not None:
+            max_ticket = np.minimum(max_ticket, capacity[positions])
+
+        # Warm start: lenders who funded similar past deals rank higher
+        similar = self.similar_deals(loan_data)
+        priority = None
+        prior = SimilarDealIndex.candidate_syndicate(similar)
+        if prior:
+            weights = np.array([prior.get(lenders.ids[idx], 0.0) for idx in positions])
+            priority = (1 - PRECEDENT_WEIGHT) * scores + PRECEDENT_WEIGHT * weights
+
+        plan = solve_allocation(
+            amount,
+            scores,
+            lenders.min_investment[positions],
+            max_ticket,
+            AllocationConstraints.from_dict(constraints),
+            priority,
+        )
+        selected = positions[plan.indices]
+        if capacity is not None:
+            capacity[selected] -= plan.amounts
 
-        for idx, lender in enumerate(lender_profiles[:5]):  # Top 5 lenders
-            match_score = 0.75 - (idx * 0.05)  # Simulated scoring
+        allocations = []
+        for idx, rank, ticket in zip(selected, plan.indices, plan.amounts):
+            match_score = float(scores[rank])
 
             allocation = {
-                "lenderId": lender.get("id", f"lender_{idx}"),
-                "lenderName": lender.get("name", f"Lender {idx + 1}"),
-                "amount": loan_data.get("amount", 0) * (0.2 - idx * 0.03),
-                "percentage": (20 - idx * 3),
+                "lenderId": lenders.ids[idx],
+                "lenderName": lenders.names[idx],
+                "amount": round(float(ticket), 2),
+                "percentage": round(float(ticket) / amount * 100, 2),
                 "confidence": match_score,
                 "matchScore": match_score,
-                "reasoning": self._generate_reasoning(lender, loan_data, match_score),
+                "reasoning": self._generate_reasoning(
+                    lenders.profiles[idx], loan_data, match_score
+                ),
             }
             allocations.append(allocation)
 
-        return AgentResult(
-            success=True,
-            data={"allocations": allocations},
-            confidence=0.85,
-            reasoning="Optimal allocation calculated using multi-factor analysis (Mock).",
-            agent_name=self.name,
+        # Amount-weighted match quality, discounted by any unfilled shortfall
+        confidence = (
+            float(np.average(scores[plan.indices], weights=plan.amounts))
+            * plan.coverage
+            if len(plan.indices)
+            else 0.0
         )
 
+        return {
+            "allocations": allocations,
+            "allocated": round(plan.allocated, 2),
+            "shortfall": round(plan.shortfall, 2),
+            "coverage": round(plan.coverage, 4),
+            "confidence": round(confidence, 4),
+            "candidates": len(positions),
+            "similarDeals": similar,
+        }
+
     def _generate_reasoning(self, lender: Dict, loan: Dict, score: float) -> str:
         """Generate human-readable reasoning for allocation"""
         reasons = []
@@ -253,7 +543,7 @@ class AllocatorAgent:
 
         reasons.append(f"Lender risk appetite aligns with loan risk profile")
 
-        if loan.get("esgScore", 0) > 70:
+        if (loan.get("esgScore") or 0) > 70:
             reasons.append("ESG score meets sustainability requirements")
 
         return ". ".join(reasons) + "."
@@ -265,8 +555,13 @@ class MonitorAgent:
     Tracks covenant compliance and predicts breaches
     """
 
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        stats_store: Optional[CovenantStatsStore] = None,
+    ):
         self.name = "Monitor Agent"
+        self.stats_store = stats_store
         # In production: self.llm = ChatGroq(model="llama-3.2-90b-vision-preview", api_key=api_key)
 
     async def check_covenant(
@@ -282,24 +577,31 @@ class MonitorAgent:
         Returns:
             AgentResult with compliance status and predictions
         """
-        # Mock implementation - replace with actual ML prediction
-        current_value = historical_values[-1] if historical_values else 1.35
-        threshold = covenant_data.get("threshold", 1.25)
-
-        breach_probability = max(0, (threshold - current_value) / threshold)
-
-        status = "COMPLIANT" if current_value >= threshold else "BREACH"
-        if breach_probability > 0.3:
-            status = "AT_RISK"
+        # Tracked covenants are read from incremental state; history only
+        # seeds a covenant the first time it is seen
+        store = self.stats_store
+        if store is None:
+            store = CovenantStatsStore(capacity=1)
+        covenant_id = covenant_data.get("id") or "adhoc"
+        seed = covenant_id not in store
+        slot = store.register({**covenant_data, "id": covenant_id})
+        if seed:
+            for value in historical_values:
+                store.observe(covenant_id, value)
+
+        assessment = store.assess([slot])
+        status = assessment.statuses[0]
+        breach_probability = float(assessment.breach_probability[0])
 
         result_data = {
             "covenantId": covenant_data.get("id"),
             "status": status,
-            "currentValue": current_value,
-            "threshold": threshold,
+            "currentValue": float(assessment.current[0]),
+            "threshold": float(store.thresholds[slot]),
+            "headroom": float(assessment.headroom[0]),
             "breachProbability": breach_probability,
-            "trend": "stable" if breach_probability < 0.2 else "deteriorating",
-            "nextCheckDate": "2026-04-01",
+            "trend": assessment.trends[0],
+            "nextCheckDate": next_check_date(covenant_data.get("frequency")),
             "recommendation": self._generate_recommendation(status, breach_probability),
         }
 
@@ -327,45 +629,31 @@ class ESGAgent:
     Calculates sustainability metrics and ESG scores
     """
 
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(
+        self, api_key: Optional[str] = None, scorer: Optional[ESGScorer] = None
+    ):
         self.name = "ESG Agent"
+        self.scorer = scorer or ESGScorer()
 
     async def analyze_esg(self, loan_data: Dict[str, Any]) -> AgentResult:
         """
         Analyze ESG metrics for a loan
 
         Args:
-            loan_data: Loan and borrower data
+            loan_data: Loan and borrower data (LoanRequest or ParserAgent output)
 
         Returns:
             AgentResult with ESG analysis
         """
-        # Mock implementation - replace with actual ESG calculation
-        esg_data = {
-            "overallScore": 75.5,
-            "breakdown": {"environmental": 78.2, "social": 72.5, "governance": 76.0},
-            "carbonIntensity": 125.5,
-            "alignment": {
-                "unepFi": "Compliant",
-                "greenBondPrinciples": "Partial",
-                "sdgAlignment": ["SDG 7", "SDG 13"],
-            },
-            "recommendations": [
-                "Enhance carbon disclosure reporting",
-                "Implement supplier diversity program",
-                "Strengthen board independence",
-            ],
-            "risks": [
-                "Limited environmental data disclosure",
-                "No formal climate transition plan",
-            ],
-        }
-
+        esg_data = self.scorer.score([loan_data])[0]
         return AgentResult(
             success=True,
             data=esg_data,
-            confidence=0.78,
-            reasoning="ESG score calculated based on public disclosures, industry benchmarks, and regulatory filings.",
+            confidence=esg_data["confidence"],
+            reasoning=(
+                f"ESG score from carbon intensity against the {esg_data['sector']} "
+                "sector median and the borrower's disclosures."
+            ),
             agent_name=self.name,
         )
 
@@ -418,7 +706,7 @@ class ExplainerAgent:
         )
 
 
-# Crew coordination (uncomment in production)
+# Crew coordination (uncomment in production; load crewai via providers.load("crewai"))
 """
 class LoanProcessingCrew:
     def __init__(self):
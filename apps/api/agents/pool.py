@@ -0,0 +1,89 @@
+"""
+Process-wide agent pool for AutoSyndicate™
+Builds the LLM-backed agents once and shares them across requests
+"""
+
+from typing import Optional
+from contextlib import asynccontextmanager
+import os
+import asyncio
+import httpx
+
+from agents.cache import ResponseCache
+from agents.crew_agents import ParserAgent, AllocatorAgent, ESGAgent
+from agents.singleflight import SingleFlight
+from documents.index import ClauseIndex
+from documents.ingestion import document_client, parse_allowed_hosts
+from engine.esg import ESGScorer
+from engine.similar import SimilarDealIndex
+
+DEFAULT_MAX_CONCURRENCY = 16
+
+
+class AgentPool:
+    """
+    Shared ParserAgent/AllocatorAgent instances with bounded concurrency
+
+    Agents, their provider clients and their prompt chains are constructed
+    once per process. Groq calls and document downloads go through pooled
+    httpx clients so keep-alive connections are reused instead of paying a TLS
+    handshake per request; the document client only connects to public
+    addresses (or DOCUMENT_ALLOWED_HOSTS). A semaphore caps how many agent calls run at the same time, and
+    both agents share one LLM response cache and one in-flight tracker so
+    concurrent identical calls are coalesced. Parsed documents feed a shared
+    clause index for semantic search, and allocations are warm-started from
+    an index of similar past deals. ESG scores are memoized per borrower.
+    """
+
+    def __init__(self, max_concurrency: Optional[int] = None):
+        self.max_concurrency = max_concurrency or int(
+            os.getenv("AGENT_MAX_CONCURRENCY", DEFAULT_MAX_CONCURRENCY)
+        )
+        limits = httpx.Limits(
+            max_connections=self.max_concurrency,
+            max_keepalive_connections=self.max_concurrency,
+        )
+        timeout = httpx.Timeout(60.0, connect=10.0)
+        self.http_client = httpx.AsyncClient(limits=limits, timeout=timeout)
+        self.document_client = document_client(
+            parse_allowed_hosts(os.getenv("DOCUMENT_ALLOWED_HOSTS")),
+            limits=limits,
+            timeout=timeout,
+        )
+        self.cache = ResponseCache.from_env()
+        self.inflight = SingleFlight()
+        self.clause_index = ClauseIndex.from_env()
+        self.parser_agent = ParserAgent(
+            cache=self.cache,
+            inflight=self.inflight,
+            http_client=self.document_client,
+            clause_index=self.clause_index,
+        )
+        self.deal_index = SimilarDealIndex.from_env()
+        self.allocator_agent = AllocatorAgent(
+            http_async_client=self.http_client,
+            cache=self.cache,
+            inflight=self.inflight,
+            deal_index=self.deal_index,
+        )
+        self.esg_scorer = ESGScorer.from_env()
+        self.esg_agent = ESGAgent(scorer=self.esg_scorer)
+        self._slots = asyncio.Semaphore(self.max_concurrency)
+
+    @asynccontextmanager
+    async def parser(self):
+        """Lease the shared ParserAgent for one call"""
+        async with self._slots:
+            yield self.parser_agent
+
+    @asynccontextmanager
+    async def allocator(self):
+        """Lease the shared AllocatorAgent for one call"""
+        async with self._slots:
+            yield self.allocator_agent
+
+    async def aclose(self):
+        await self.http_client.aclose()
+        await self.document_client.aclose()
+        self.cache.close()
+        self.clause_index.close()
@@ -0,0 +1,261 @@
+"""
+Allocator prompt builder for AutoSyndicate™
+Projects loans and lenders onto decision-relevant fields, encodes lenders as
+a compact table and keeps the prompt within the model's token budget
+"""
+
+from typing import List, Dict, Any, Optional
+from dataclasses import dataclass
+import os
+import json
+import math
+import threading
+
+# llama3-70b-8192 context, minus room for the JSON allocation response
+MODEL_CONTEXT_TOKENS = 8192
+RESPONSE_TOKENS = 1536
+DEFAULT_PROMPT_TOKENS = MODEL_CONTEXT_TOKENS - RESPONSE_TOKENS
+# Conservative for Llama 3's tokenizer on tables of ids and numbers
+CHARS_PER_TOKEN = 3.0
+# Past syndicates kept when they would crowd out lenders
+MIN_SIMILAR_DEALS = 1
+MAX_FIELD_CHARS = 120
+
+LOAN_FIELDS = (
+    "id",
+    "amount",
+    "term",
+    "interestRate",
+    "purpose",
+    "riskScore",
+    "creditRating",
+    "esgScore",
+)
+LENDER_COLUMNS = (
+    "id",
+    "name",
+    "riskAppetite",
+    "minTicket",
+    "maxTicket",
+    "sectors",
+    "esg",
+    "matchScore",
+)
+SIMILAR_COLUMNS = ("title", "amount", "creditRating", "similarity", "syndicate")
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def _cell(value: Any) -> str:
+    """One table cell: no separators, newlines or float noise"""
+    if value is None:
+        return ""
+    if isinstance(value, float):
+        return (
+            f"{value:.0f}"
+            if value.is_integer() or abs(value) >= 1000
+            else f"{value:.4g}"
+        )
+    text = str(value).replace("|", "/").replace("\n", " ").strip()
+    return text[:MAX_FIELD_CHARS]
+
+
+def _row(values) -> str:
+    return "|".join(_cell(v) for v in values)
+
+
+def _compact(value: Any) -> str:
+    return json.dumps(value, separators=(",", ":"), default=str)
+
+
+def encode_loan(loan: Dict[str, Any]) -> str:
+    """key=value pairs of the fields the allocation depends on"""
+    return "; ".join(
+        f"{field}={_cell(loan[field])}"
+        for field in LOAN_FIELDS
+        if loan.get(field) not in (None, "")
+    )
+
+
+def encode_lender(lender: Dict[str, Any], score: float) -> str:
+    esg = lender.get("esgPreferences") or {}
+    return _row(
+        (
+            lender.get("id"),
+            lender.get("institutionName"),
+            lender.get("riskAppetite"),
+            lender.get("minInvestment"),
+            # Blank = uncapped
+            lender.get("maxInvestment"),
+            ",".join(lender.get("preferredSectors") or []),
+            ",".join(f"{k}:{_cell(v)}" for k, v in esg.items() if v not in (None, "")),
+            round(float(score), 3),
+        )
+    )
+
+
+def encode_similar(deal: Dict[str, Any]) -> str:
+    syndicate = ",".join(
+        f"{a.get('lenderId')}:{_cell(a.get('percentage'))}%"
+        for a in deal.get("syndicate") or []
+    )
+    return _row(
+        (
+            deal.get("title"),
+            deal.get("amount"),
+            deal.get("creditRating"),
+            deal.get("similarity"),
+            syndicate,
+        )
+    )
+
+
+def _table(columns, rows: List[str]) -> str:
+    return "\n".join(["|".join(columns), *rows]) if rows else "(none)"
+
+
+@dataclass
+class AllocatorPrompt:
+    """Template inputs for one allocator call and what went into them"""
+
+    inputs: Dict[str, str]
+    tokens: int
+    lenders: List[int]  # Positions of the lenders included, best first
+    truncated: int  # Candidates dropped to fit the budget, not by max_lenders
+    similar_deals: int
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "promptTokens": self.tokens,
+            "lenders": len(self.lenders),
+            "lendersTruncated": self.truncated,
+            "similarDeals": self.similar_deals,
+        }
+
+
+class PromptBuilder:
+    """
+    Builds allocator prompts within a token budget
+
+    The loan, constraints and template are always sent. Lenders are added
+    as table rows in descending match score until the budget is spent (or
+    max_lenders is reached); past syndicates are dropped, farthest first,
+    before they would leave no room for lenders. Token counts are
+    character-based estimates, so the budget is kept below the context
+    window by the response reserve.
+    """
+
+    def __init__(
+        self,
+        template: str,
+        max_tokens: int = DEFAULT_PROMPT_TOKENS,
+        max_lenders: Optional[int] = None,
+    ):
+        self.template = template
+        self.max_tokens = max_tokens
+        self.max_lenders = max_lenders
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.total_tokens = 0
+        self.peak_tokens = 0
+        self.truncated_calls = 0
+
+    @classmethod
+    def from_env(
+        cls, template: str, max_lenders: Optional[int] = None
+    ) -> "PromptBuilder":
+        return cls(
+            template,
+            int(os.getenv("ALLOCATOR_PROMPT_TOKENS", DEFAULT_PROMPT_TOKENS)),
+            max_lenders,
+        )
+
+    def build(
+        self,
+        loan: Dict[str, Any],
+        lenders: List[Dict[str, Any]],
+        positions: List[int],
+        scores: List[float],
+        constraints: Optional[Dict[str, Any]] = None,
+        similar: Optional[List[Dict[str, Any]]] = None,
+    ) -> AllocatorPrompt:
+        """
+        Args:
+            loan: Loan details
+            lenders: Lender profiles
+            positions: Candidate positions into lenders, best score first
+            scores: Match score of each candidate, in the same order
+            constraints: Syndicate constraints
+            similar: Similar past deals, nearest first
+        """
+        constraints = {k: v for k, v in (constraints or {}).items() if v is not None}
+        fixed = {
+            "loan_data": encode_loan(loan),
+            "constraints": _compact(constraints) if constraints else "(none)",
+        }
+        base = estimate_tokens(
+            self.template.format(**fixed, lender_profiles="", similar_deals="")
+        )
+        header = estimate_tokens("|".join(LENDER_COLUMNS)) + 1
+
+        candidates = list(zip(positions, scores))[: self.max_lenders]
+        deals = [encode_similar(deal) for deal in similar or []]
+        # Keep room for the best lender before spending it on precedent
+        first_row = (
+            estimate_tokens(encode_lender(lenders[candidates[0][0]], candidates[0][1]))
+            + 1
+            if candidates
+            else 0
+        )
+        deal_tokens = [estimate_tokens(d) + 1 for d in deals]
+        similar_header = estimate_tokens("|".join(SIMILAR_COLUMNS)) + 1
+        while len(deals) > MIN_SIMILAR_DEALS and (
+            base + header + first_row + similar_header + sum(deal_tokens)
+            > self.max_tokens
+        ):
+            deals.pop()
+            deal_tokens.pop()
+        used = base + header + (similar_header + sum(deal_tokens) if deals else 0)
+
+        rows = []
+        for position, score in candidates:
+            row = encode_lender(lenders[position], score)
+            cost = estimate_tokens(row) + 1
+            if used + cost > self.max_tokens:
+                break
+            used += cost
+            rows.append(row)
+        included = len(rows)
+
+        inputs = {
+            **fixed,
+            "lender_profiles": _table(LENDER_COLUMNS, rows),
+            "similar_deals": _table(SIMILAR_COLUMNS, deals),
+        }
+        prompt = AllocatorPrompt(
+            inputs=inputs,
+            tokens=estimate_tokens(self.template.format(**inputs)),
+            lenders=list(positions[:included]),
+            # Candidates past max_lenders were never offered to the budget
+            truncated=len(candidates) - included,
+            similar_deals=len(deals),
+        )
+        with self._lock:
+            self.calls += 1
+            self.total_tokens += prompt.tokens
+            self.peak_tokens = max(self.peak_tokens, prompt.tokens)
+            self.truncated_calls += prompt.truncated > 0
+        return prompt
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "budgetTokens": self.max_tokens,
+            "meanPromptTokens": (
+                round(self.total_tokens / self.calls, 1) if self.calls else 0.0
+            ),
+            "peakPromptTokens": self.peak_tokens,
+            "truncatedCalls": self.truncated_calls,
+        }
@@ -0,0 +1,122 @@
+"""
+Lazy LLM provider loading for AutoSyndicate™
+The crewai/langchain stacks are imported on first use instead of at startup
+"""
+
+from typing import Dict, Any, Optional, Callable, List
+import time
+import asyncio
+import importlib
+import threading
+
+# Provider name -> modules it needs
+PROVIDER_MODULES = {
+    "langchain": ("langchain_core.prompts", "langchain_core.output_parsers"),
+    "groq": ("langchain_groq",),
+    "gemini": ("langchain_google_genai",),
+    "crewai": ("crewai",),
+}
+
+
+class ProviderLoader:
+    """
+    Imports provider stacks once per process and records what it cost
+
+    Missing packages are remembered too, so agents fall back to their
+    deterministic paths without retrying the import on every request.
+    """
+
+    def __init__(self):
+        self._modules: Dict[str, Dict[str, Any]] = {}
+        self._errors: Dict[str, str] = {}
+        self._import_ms: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def load(self, name: str) -> Optional[Dict[str, Any]]:
+        """Modules for a provider keyed by module path, or None if unavailable"""
+        if name in self._modules or name in self._errors:
+            return self._modules.get(name)
+
+        with self._lock:
+            if name in self._modules or name in self._errors:
+                return self._modules.get(name)
+            started = time.perf_counter()
+            try:
+                modules = {
+                    path: importlib.import_module(path)
+                    for path in PROVIDER_MODULES[name]
+                }
+            except ImportError as e:
+                self._errors[name] = str(e)
+                modules = None
+            else:
+                self._modules[name] = modules
+            self._import_ms[name] = (time.perf_counter() - started) * 1000
+            return modules
+
+    async def aload(self, name: str) -> Optional[Dict[str, Any]]:
+        """load() off the event loop; imports can take seconds"""
+        if name in self._modules or name in self._errors:
+            return self._modules.get(name)
+        return await asyncio.to_thread(self.load, name)
+
+    async def warm_up(self, names: Optional[List[str]] = None):
+        """Import providers in the background so the first LLM call is fast"""
+        for name in names or ["langchain", "groq", "gemini"]:
+            await self.aload(name)
+
+    def stats(self) -> Dict[str, Any]:
+        providers = {}
+        for name in PROVIDER_MODULES:
+            if name in self._modules:
+                status = "loaded"
+            elif name in self._errors:
+                status = "unavailable"
+            else:
+                status = "not loaded"
+            providers[name] = {"status": status}
+            if name in self._import_ms:
+                providers[name]["importMs"] = round(self._import_ms[name], 1)
+        return providers
+
+
+providers = ProviderLoader()
+
+
+class LazyChain:
+    """
+    Prompt chain that is built on first use
+
+    build runs in a worker thread (it triggers the provider imports) and
+    returns None if the provider is unavailable; that outcome is cached.
+    """
+
+    def __init__(self, build: Callable[[], Any]):
+        self._build = build
+        self._chain = None
+        self._resolved = False
+        self._lock = asyncio.Lock()
+
+    async def get(self) -> Any:
+        if self._resolved:
+            return self._chain
+        async with self._lock:
+            if not self._resolved:
+                try:
+                    self._chain = await asyncio.to_thread(self._build)
+                except Exception as e:
+                    print(f"Error building LLM chain: {e}")
+                self._resolved = True
+        return self._chain
+
+
+def json_chain(template: str, llm: Any) -> Any:
+    """prompt | llm | JSON parser, using the lazily imported langchain core"""
+    core = providers.load("langchain")
+    prompts = core["langchain_core.prompts"]
+    parsers = core["langchain_core.output_parsers"]
+    return (
+        prompts.ChatPromptTemplate.from_template(template)
+        | llm
+        | parsers.JsonOutputParser()
+    )
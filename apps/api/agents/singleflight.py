@@ -0,0 +1,50 @@
+"""
+Single-flight request coalescing for AutoSyndicate™ agents
+Concurrent calls with the same key share one in-flight LLM invocation
+"""
+
+from typing import Dict, Any, Callable, Awaitable
+import asyncio
+
+
+class SingleFlight:
+    """
+    In-flight deduplication keyed on a canonical request key
+
+    The first caller for a key starts the call as a detached task; every
+    caller, the first included, awaits it through asyncio.shield. Cancelling
+    any caller, the leader too, only abandons that caller's wait: the shared
+    call keeps running for the others and is cleared once it completes.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.executed = 0
+        self.coalesced = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            task = asyncio.create_task(fn())
+            self._inflight[key] = task
+            self.executed += 1
+            task.add_done_callback(lambda done: self._finish(key, done))
+        return await asyncio.shield(task)
+
+    def _finish(self, key: str, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark retrieved so a failure nobody awaited does not log a warning
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.executed + self.coalesced
+        return {
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+            "inflight": len(self._inflight),
+            "coalesceRate": self.coalesced / total if total else 0.0,
+        }
@@ -0,0 +1,398 @@
+"""
+Live portfolio aggregates for AutoSyndicate™
+Sector composition, concentration (HHI) and per-lender exposure kept as
+running totals, updated per accepted allocation or repayment and
+optionally journalled to disk. A persistent book is single-process: one
+API worker owns its directory
+"""
+
+from typing import List, Dict, Any, Optional
+from dataclasses import dataclass, asdict
+import os
+import json
+import time
+import heapq
+import asyncio
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from analytics.snapshots import composition_chart
+
+CHECKPOINT_FILE = "checkpoint.json"
+JOURNAL_FILE = "journal.jsonl"
+LOCK_FILE = "book.lock"
+DEFAULT_CHECKPOINT_INTERVAL = 60.0
+# Exposure below this is treated as fully repaid
+DUST = 0.01
+
+
+@dataclass
+class Position:
+    """One accepted allocation and its outstanding amount"""
+
+    allocation_id: str
+    loan_id: str
+    lender_id: str
+    sector: str
+    outstanding: float
+
+
+class Exposure:
+    """
+    Totals per key plus their running sum of squares
+
+    The sum of squares makes the Herfindahl-Hirschman index an O(1) read:
+    HHI = sum(share^2) = sum_sq / total^2.
+    """
+
+    def __init__(self):
+        self.amounts: Dict[str, float] = {}
+        self.total = 0.0
+        self.sum_sq = 0.0
+
+    def add(self, key: str, delta: float):
+        old = self.amounts.get(key, 0.0)
+        new = old + delta
+        if new < DUST:
+            new = 0.0
+            self.amounts.pop(key, None)
+        else:
+            self.amounts[key] = new
+        self.total += new - old
+        self.sum_sq += new * new - old * old
+
+    def resync(self):
+        """Recompute the running sums exactly, dropping float drift"""
+        self.total = sum(self.amounts.values())
+        self.sum_sq = sum(v * v for v in self.amounts.values())
+
+    def hhi(self) -> float:
+        """Concentration on the 0-10,000 scale (10,000 = one name holds everything)"""
+        if self.total <= 0:
+            return 0.0
+        return 10_000 * self.sum_sq / (self.total * self.total)
+
+
+class BookLocked(RuntimeError):
+    """The book directory is already owned by another process"""
+
+
+class PortfolioBook:
+    """
+    In-memory book of accepted allocations with O(1) aggregate updates
+
+    Every change is appended to a journal before the aggregates move, and
+    the full state is checkpointed (and the journal truncated) at most every
+    checkpoint_interval seconds. On start the checkpoint is loaded and the
+    journal replayed, so no accepted change is lost across restarts.
+    Without a path the book is in memory only.
+
+    Aggregates live in this process's memory, so a persistent book must
+    have a single owner. It takes an exclusive lock on its
+    directory and raises BookLocked if another process (for example a
+    second uvicorn worker) already holds it, rather than letting two
+    writers interleave the journal and overwrite each other's checkpoints.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        checkpoint_interval: float = DEFAULT_CHECKPOINT_INTERVAL,
+    ):
+        self.path = path
+        self.checkpoint_interval = checkpoint_interval
+        self.positions: Dict[str, Position] = {}
+        self.loans: Dict[str, List[str]] = {}  # loanId -> allocationIds
+        self.sectors = Exposure()
+        self.lenders = Exposure()
+        self.checkpointed_at = 0.0
+        self.seq = 0  # Last journalled change
+        self._lock = threading.Lock()
+        self._journal = None
+        self._lockfile = None
+        self._dirty = False
+        self._task: Optional[asyncio.Task] = None
+        if path:
+            os.makedirs(path, exist_ok=True)
+            self._acquire()
+            self._restore()
+            self._journal = open(os.path.join(path, JOURNAL_FILE), "a")
+
+    @classmethod
+    def from_env(cls) -> "PortfolioBook":
+        return cls(
+            os.getenv("PORTFOLIO_BOOK_DIR") or None,
+            float(
+                os.getenv("PORTFOLIO_CHECKPOINT_INTERVAL", DEFAULT_CHECKPOINT_INTERVAL)
+            ),
+        )
+
+    def accept(
+        self,
+        allocation_id: str,
+        loan_id: str,
+        lender_id: str,
+        amount: float,
+        sector: str = "Other",
+    ) -> Position:
+        """
+        Add an accepted allocation to the book
+
+        Re-accepting an allocation id replaces the earlier position.
+        """
+        with self._lock:
+            self._log(
+                {
+                    "op": "accept",
+                    "allocationId": allocation_id,
+                    "loanId": loan_id,
+                    "lenderId": lender_id,
+                    "amount": amount,
+                    "sector": sector,
+                }
+            )
+            return self._accept(allocation_id, loan_id, lender_id, amount, sector)
+
+    def repay(self, loan_id: str, amount: Optional[float] = None) -> float:
+        """
+        Apply a repayment to a loan, pro rata across its lenders
+
+        Args:
+            loan_id: Loan being repaid
+            amount: Principal repaid; None repays the loan in full
+
+        Returns:
+            Principal actually removed from the book
+
+        Raises:
+            KeyError: If the loan has no outstanding positions
+        """
+        with self._lock:
+            if loan_id not in self.loans:
+                raise KeyError(loan_id)
+            self._log({"op": "repay", "loanId": loan_id, "amount": amount})
+            return self._repay(loan_id, amount)
+
+    def _accept(
+        self,
+        allocation_id: str,
+        loan_id: str,
+        lender_id: str,
+        amount: float,
+        sector: str,
+    ) -> Position:
+        if allocation_id in self.positions:
+            self._remove(self.positions[allocation_id])
+        position = Position(allocation_id, loan_id, lender_id, sector, float(amount))
+        self.positions[allocation_id] = position
+        self.loans.setdefault(loan_id, []).append(allocation_id)
+        self.sectors.add(sector, position.outstanding)
+        self.lenders.add(lender_id, position.outstanding)
+        return position
+
+    def _repay(self, loan_id: str, amount: Optional[float]) -> float:
+        # A syndicate has a handful of lenders, so this is constant per loan
+        positions = [self.positions[a] for a in self.loans[loan_id]]
+        outstanding = sum(p.outstanding for p in positions)
+        fraction = 1.0 if amount is None else min(amount / outstanding, 1.0)
+        repaid = 0.0
+        for position in positions:
+            delta = position.outstanding * fraction
+            if position.outstanding - delta < DUST:
+                delta = position.outstanding
+            repaid += delta
+            position.outstanding -= delta
+            self.sectors.add(position.sector, -delta)
+            self.lenders.add(position.lender_id, -delta)
+            if position.outstanding <= 0:
+                self._remove(position, adjust=False)
+        return repaid
+
+    def _remove(self, position: Position, adjust: bool = True):
+        if adjust:
+            self.sectors.add(position.sector, -position.outstanding)
+            self.lenders.add(position.lender_id, -position.outstanding)
+        del self.positions[position.allocation_id]
+        allocations = self.loans[position.loan_id]
+        allocations.remove(position.allocation_id)
+        if not allocations:
+            del self.loans[position.loan_id]
+
+    @property
+    def total(self) -> float:
+        return self.sectors.total
+
+    def composition(self) -> List[Dict[str, Any]]:
+        return composition_chart(self.sectors.amounts)
+
+    def concentration(self, top: int = 10) -> Dict[str, Any]:
+        """HHI by sector and lender plus the largest lender exposures"""
+        total = self.total
+        largest = heapq.nlargest(
+            top, self.lenders.amounts.items(), key=lambda item: item[1]
+        )
+        return {
+            "totalExposure": round(total, 2),
+            "sectorHHI": round(self.sectors.hhi(), 1),
+            "lenderHHI": round(self.lenders.hhi(), 1),
+            "topLenders": [
+                {
+                    "lenderId": lender_id,
+                    "exposure": round(amount, 2),
+                    "share": round(amount / total * 100, 2) if total else 0.0,
+                }
+                for lender_id, amount in largest
+            ],
+        }
+
+    def lender_exposure(self, lender_id: str) -> Dict[str, Any]:
+        amount = self.lenders.amounts.get(lender_id, 0.0)
+        return {
+            "lenderId": lender_id,
+            "exposure": round(amount, 2),
+            "share": round(amount / self.total * 100, 2) if self.total else 0.0,
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "positions": len(self.positions),
+            "loans": len(self.loans),
+            "totalExposure": round(self.total, 2),
+            "persistent": self.path is not None,
+            "checkpointedAt": self.checkpointed_at or None,
+        }
+
+    def _acquire(self):
+        """Take the directory lock, held until stop() or process exit"""
+        self._lockfile = open(os.path.join(self.path, LOCK_FILE), "a+")
+        if fcntl is None:
+            return
+        try:
+            fcntl.flock(self._lockfile, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            self._lockfile.close()
+            self._lockfile = None
+            raise BookLocked(
+                f"Portfolio book {self.path} is open in another process. "
+                "The book is single-process: run one API worker, or give each "
+                "deployment its own PORTFOLIO_BOOK_DIR."
+            )
+        self._lockfile.seek(0)
+        self._lockfile.truncate()
+        self._lockfile.write(str(os.getpid()))
+        self._lockfile.flush()
+
+    def _log(self, event: Dict[str, Any]):
+        self.seq += 1
+        self._dirty = True
+        if self._journal is not None:
+            self._journal.write(json.dumps({**event, "seq": self.seq}) + "\n")
+            self._journal.flush()
+            # The change is acknowledged once this returns, so it must be on disk
+            os.fsync(self._journal.fileno())
+
+    def _replay(self, event: Dict[str, Any]):
+        if event["op"] == "accept":
+            self._accept(
+                event["allocationId"],
+                event["loanId"],
+                event["lenderId"],
+                event["amount"],
+                event["sector"],
+            )
+        elif event["op"] == "repay" and event["loanId"] in self.loans:
+            self._repay(event["loanId"], event["amount"])
+
+    def _restore(self):
+        checkpoint = os.path.join(self.path, CHECKPOINT_FILE)
+        if os.path.exists(checkpoint):
+            with open(checkpoint) as f:
+                state = json.load(f)
+            for p in state["positions"]:
+                self._accept(
+                    p["allocation_id"],
+                    p["loan_id"],
+                    p["lender_id"],
+                    p["outstanding"],
+                    p["sector"],
+                )
+            self.checkpointed_at = state.get("checkpointedAt", 0.0)
+            self.seq = state.get("seq", 0)
+
+        journal = os.path.join(self.path, JOURNAL_FILE)
+        if os.path.exists(journal):
+            valid = 0
+            with open(journal, "rb") as f:
+                for line in f:
+                    try:
+                        event = json.loads(line)
+                    except ValueError:
+                        # A torn final line from a crash mid-write
+                        break
+                    valid += len(line)
+                    # Skip changes already in the checkpoint, in case the
+                    # last run stopped before truncating the journal
+                    if event["seq"] > self.seq:
+                        self._replay(event)
+                        self.seq = event["seq"]
+            # Drop the torn tail so new entries start on a clean line
+            os.truncate(journal, valid)
+        self.sectors.resync()
+        self.lenders.resync()
+
+    def checkpoint(self):
+        """Write the full state atomically and truncate the journal"""
+        if self.path is None:
+            return
+        with self._lock:
+            self.sectors.resync()
+            self.lenders.resync()
+            self.checkpointed_at = time.time()
+            state = {
+                "checkpointedAt": self.checkpointed_at,
+                "seq": self.seq,
+                "positions": [asdict(p) for p in self.positions.values()],
+            }
+            target = os.path.join(self.path, CHECKPOINT_FILE)
+            with open(f"{target}.tmp-{os.getpid()}", "w") as f:
+                json.dump(state, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(f"{target}.tmp-{os.getpid()}", target)
+            self._journal.close()
+            self._journal = open(os.path.join(self.path, JOURNAL_FILE), "w")
+            self._dirty = False
+
+    def start(self):
+        if self.path and self.checkpoint_interval > 0:
+            self._task = asyncio.create_task(self._checkpoint_forever())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._journal is not None:
+            if self._dirty:
+                self.checkpoint()
+            self._journal.close()
+            self._journal = None
+        if self._lockfile is not None:
+            self._lockfile.close()
+            self._lockfile = None
+
+    async def _checkpoint_forever(self):
+        while True:
+            await asyncio.sleep(self.checkpoint_interval)
+            if self._dirty:
+                try:
+                    await asyncio.to_thread(self.checkpoint)
+                except Exception as e:
+                    print(f"Error checkpointing portfolio: {e}")
@@ -0,0 +1,54 @@
+"""
+Snapshot bootstrap CLI for AutoSyndicate™
+
+Usage:
+    python -m analytics.seed_snapshots --synthetic 730
+
+Writes N days of synthetic portfolio history ending today, for
+environments without recorded snapshots.
+"""
+
+from datetime import date, timedelta
+import argparse
+import numpy as np
+
+from analytics.snapshots import DEFAULT_SNAPSHOT_DIR, SnapshotStore
+
+SECTORS = ["Technology", "Energy", "Healthcare", "Real Estate", "Infrastructure"]
+
+
+def synthetic_history(days: int, seed: int = 42):
+    """
+    Daily NAV as a drifting random walk from £10M, with a slowly moving
+    yield and sector weights that rebalance gradually
+    """
+    rng = np.random.default_rng(seed)
+    nav = 10_000_000 * np.exp(np.cumsum(rng.normal(0.0004, 0.004, days)))
+    yields = 4.5 + np.cumsum(rng.normal(0.0, 0.01, days)).clip(-1.5, 1.5)
+    weights = np.abs(
+        np.array([0.35, 0.25, 0.2, 0.15, 0.05])
+        + np.cumsum(rng.normal(0.0, 0.002, (days, len(SECTORS))), axis=0)
+    )
+    weights /= weights.sum(axis=1, keepdims=True)
+    start = date.today() - timedelta(days=days - 1)
+    for i in range(days):
+        exposure = dict(zip(SECTORS, (weights[i] * nav[i]).round(2)))
+        yield start + timedelta(days=i), float(nav[i]), float(yields[i]), exposure
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed portfolio snapshots")
+    parser.add_argument("--synthetic", type=int, required=True, help="Days to write")
+    parser.add_argument("--out", default=DEFAULT_SNAPSHOT_DIR, help="Store root")
+    args = parser.parse_args()
+
+    store = SnapshotStore(args.out)
+    if len(store):
+        raise SystemExit(f"{args.out} already holds {len(store)} snapshots")
+    for day, nav, yield_, exposure in synthetic_history(args.synthetic):
+        store.append(day, nav, yield_, exposure)
+    print(f"Wrote {len(store)} snapshots to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
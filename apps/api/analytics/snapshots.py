@@ -0,0 +1,405 @@
+"""
+Portfolio snapshot store for AutoSyndicate™
+Daily NAV, yield and sector exposure kept as append-only columnar .npy
+segments, with weekly and monthly rollups maintained on write
+"""
+
+from typing import List, Dict, Any, Optional, Tuple
+from bisect import bisect_left, bisect_right
+from datetime import date
+import os
+import json
+import re
+import shutil
+import threading
+import numpy as np
+
+DEFAULT_SNAPSHOT_DIR = "artifacts/snapshots"
+SECTORS_FILE = "sectors.json"
+MANIFEST_FILE = "manifest.json"
+# <year>.<generation>: one written version of a year's segment
+SEGMENT_DIR = re.compile(r"^(\d+)\.(\d+)$")
+COLUMNS = ("day", "nav", "yield", "exposure")
+
+DAILY = "D"
+WEEKLY = "W"
+MONTHLY = "M"
+# Chart timeframe -> (days covered, resolution)
+TIMEFRAMES = {
+    "1M": (31, DAILY),
+    "3M": (92, WEEKLY),
+    "6M": (183, WEEKLY),
+    "1Y": (366, MONTHLY),
+    "ALL": (None, MONTHLY),
+}
+
+COMPOSITION_COLORS = ["#00f3ff", "#bc13fe", "#ff0080", "#39ff14", "#faff00"]
+
+
+def to_day(value: date) -> int:
+    """Days since 1970-01-01"""
+    return int(np.datetime64(value, "D").astype(np.int64))
+
+
+def day_to_str(day: int) -> str:
+    return str(np.datetime64(int(day), "D"))
+
+
+def period_keys(days: np.ndarray, resolution: str) -> np.ndarray:
+    """Weeks (Monday start) or calendar months since the epoch"""
+    if resolution == WEEKLY:
+        return (days + 3) // 7  # 1970-01-01 was a Thursday
+    return days.astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+
+
+def composition_chart(
+    exposure: Dict[str, float], slices: int = len(COMPOSITION_COLORS)
+) -> List[Dict[str, Any]]:
+    """Largest sectors as chart slices in percent, the rest folded into Other"""
+    total = sum(exposure.values())
+    if total <= 0:
+        return []
+    ranked = sorted(
+        ((name, amount) for name, amount in exposure.items() if amount > 0),
+        key=lambda item: -item[1],
+    )
+    if len(ranked) > slices:
+        other = sum(amount for _, amount in ranked[slices - 1 :])
+        ranked = ranked[: slices - 1] + [("Other", other)]
+    return [
+        {
+            "name": name,
+            "value": round(float(amount / total * 100), 1),
+            "color": COMPOSITION_COLORS[idx % len(COMPOSITION_COLORS)],
+        }
+        for idx, (name, amount) in enumerate(ranked)
+    ]
+
+
+class Rollup:
+    """
+    One row per week or month: closing NAV and average yield
+
+    Kept as growable lists so the latest period is updated in O(1) per
+    appended snapshot.
+    """
+
+    def __init__(self, resolution: str):
+        self.resolution = resolution
+        self.keys: List[int] = []
+        self.last_day: List[int] = []
+        self.close: List[float] = []
+        self.yield_sum: List[float] = []
+        self.count: List[int] = []
+
+    def rebuild(self, days: np.ndarray, nav: np.ndarray, yields: np.ndarray):
+        if not len(days):
+            return
+        keys = period_keys(days, self.resolution)
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+        ends = np.r_[starts[1:], len(days)] - 1
+        self.keys = keys[starts].tolist()
+        self.last_day = days[ends].tolist()
+        self.close = nav[ends].tolist()
+        self.yield_sum = np.add.reduceat(yields, starts).tolist()
+        self.count = (ends - starts + 1).tolist()
+
+    def add(self, day: int, nav: float, yield_: float, replaced: Optional[float]):
+        """Fold in a snapshot; replaced is the yield it overwrites, if any"""
+        key = int(period_keys(np.array([day]), self.resolution)[0])
+        if self.keys and self.keys[-1] == key:
+            if replaced is None:
+                self.count[-1] += 1
+            else:
+                self.yield_sum[-1] -= replaced
+            self.yield_sum[-1] += yield_
+            self.last_day[-1] = day
+            self.close[-1] = nav
+            return
+        self.keys.append(key)
+        self.close.append(nav)
+        self.yield_sum.append(yield_)
+        self.count.append(1)
+        # Last: points() sizes its reads by last_day
+        self.last_day.append(day)
+
+    def points(self, start: int, end: int) -> List[Dict[str, Any]]:
+        lo = bisect_left(self.last_day, start)
+        hi = bisect_right(self.last_day, end)
+        return [
+            {
+                "date": day_to_str(self.last_day[i]),
+                "value": round(self.close[i], 2),
+                "yield": round(self.yield_sum[i] / self.count[i], 2),
+            }
+            for i in range(lo, hi)
+        ]
+
+
+class SnapshotStore:
+    """
+    Append-only columnar store of daily portfolio snapshots
+
+    Laid out as <root>/<year>.<generation>/{day,nav,yield,exposure}.npy,
+    with manifest.json naming the live directory of each year. Closed years
+    are opened memory-mapped and never rewritten; an append writes the
+    current year to a new directory and switches to it by replacing the
+    manifest, so a crash leaves either the old or the new segment. Range
+    queries binary-search the segment and row, so a chart request costs
+    O(points returned) regardless of how many years of history are stored.
+
+    Appends are serialised by a lock and may run in a worker thread while
+    reads run unlocked on the event loop, so in-memory state is only
+    extended after the segment is on disk, in an order readers tolerate.
+    """
+
+    def __init__(self, root: str = DEFAULT_SNAPSHOT_DIR):
+        self.root = root
+        self._lock = threading.Lock()
+        self.sectors: List[str] = []
+        self._segments: List[Dict[str, np.ndarray]] = []
+        self._years: List[int] = []
+        self._first_days: List[int] = []
+        self._dirs: Dict[int, str] = {}  # year -> live segment directory
+        self._generation = 0
+        self.rollups = {WEEKLY: Rollup(WEEKLY), MONTHLY: Rollup(MONTHLY)}
+        self._load()
+
+    @classmethod
+    def from_env(cls) -> "SnapshotStore":
+        return cls(os.getenv("SNAPSHOT_STORE_DIR", DEFAULT_SNAPSHOT_DIR))
+
+    def _load(self):
+        if not os.path.isdir(self.root):
+            return
+        manifest_path = os.path.join(self.root, MANIFEST_FILE)
+        sectors_path = os.path.join(self.root, SECTORS_FILE)
+        if os.path.exists(manifest_path):
+            with open(manifest_path) as f:
+                manifest = json.load(f)
+            self.sectors = manifest["sectors"]
+            self._dirs = {int(year): name for year, name in manifest["years"].items()}
+        else:
+            # Stores written before the manifest: one <year> directory each
+            if os.path.exists(sectors_path):
+                with open(sectors_path) as f:
+                    self.sectors = json.load(f)
+            self._dirs = {
+                int(name): name for name in os.listdir(self.root) if name.isdigit()
+            }
+        self._discard_unreferenced()
+        for year in sorted(self._dirs):
+            segment = self._map_segment(year)
+            if len(segment["day"]):
+                self._segments.append(segment)
+                self._years.append(year)
+                self._first_days.append(int(segment["day"][0]))
+        if self._segments:
+            # Open segment is kept in memory; appends replace it on disk
+            self._segments[-1] = {k: np.array(v) for k, v in self._segments[-1].items()}
+            days = np.concatenate([s["day"] for s in self._segments])
+            nav = np.concatenate([s["nav"] for s in self._segments])
+            yields = np.concatenate([s["yield"] for s in self._segments])
+            for rollup in self.rollups.values():
+                rollup.rebuild(days.astype(np.int64), nav, yields)
+
+    def __len__(self) -> int:
+        return sum(len(s["day"]) for s in self._segments)
+
+    @property
+    def last_day(self) -> Optional[int]:
+        return int(self._segments[-1]["day"][-1]) if self._segments else None
+
+    def append(
+        self,
+        day: date,
+        nav: float,
+        yield_: float,
+        exposure: Optional[Dict[str, float]] = None,
+    ):
+        """
+        Record the snapshot for a day
+
+        Days must arrive in order; re-recording the latest day overwrites it.
+
+        Raises:
+            ValueError: If the day is earlier than the latest snapshot
+        """
+        value = to_day(day)
+        with self._lock:
+            last = self.last_day
+            if last is not None and value < last:
+                raise ValueError(
+                    f"Snapshots are append-only; {day} is before {day_to_str(last)}"
+                )
+
+            for sector in exposure or {}:
+                if sector not in self.sectors:
+                    self.sectors.append(sector)
+            row = np.zeros(len(self.sectors))
+            for sector, amount in (exposure or {}).items():
+                row[self.sectors.index(sector)] = amount
+
+            replaced = None
+            if last is not None and day.year == self._years[-1]:
+                segment = self._segments[-1]
+                keep = len(segment["day"])
+                if value == last:
+                    replaced = float(segment["yield"][-1])
+                    keep -= 1
+                exposure_cols = np.zeros((keep, len(self.sectors)))
+                exposure_cols[:, : segment["exposure"].shape[1]] = segment["exposure"][
+                    :keep
+                ]
+                segment = {
+                    "day": np.append(segment["day"][:keep], np.int32(value)),
+                    "nav": np.append(segment["nav"][:keep], nav),
+                    "yield": np.append(segment["yield"][:keep], yield_),
+                    "exposure": np.vstack([exposure_cols, row]),
+                }
+                self._write_segment(day.year, segment)
+                self._segments[-1] = segment
+            else:
+                segment = {
+                    "day": np.array([value], dtype=np.int32),
+                    "nav": np.array([nav], dtype=np.float64),
+                    "yield": np.array([yield_], dtype=np.float64),
+                    "exposure": row[None, :],
+                }
+                self._write_segment(day.year, segment)
+                if self._segments:
+                    # Closed year: serve it memory-mapped from now on
+                    self._segments[-1] = self._map_segment(self._years[-1])
+                # Segment before its first day, so lookups by day stay in range
+                self._segments.append(segment)
+                self._years.append(day.year)
+                self._first_days.append(value)
+
+            for rollup in self.rollups.values():
+                rollup.add(value, nav, yield_, replaced)
+
+    def _discard_unreferenced(self):
+        """Remove segment versions a crash left behind the manifest"""
+        live = set(self._dirs.values())
+        for name in os.listdir(self.root):
+            match = SEGMENT_DIR.match(name)
+            if match:
+                self._generation = max(self._generation, int(match.group(2)))
+            if name not in live and (match or ".tmp-" in name or ".old-" in name):
+                shutil.rmtree(os.path.join(self.root, name), ignore_errors=True)
+
+    def _map_segment(self, year: int) -> Dict[str, np.ndarray]:
+        path = os.path.join(self.root, self._dirs[year])
+        return {
+            column: np.load(os.path.join(path, f"{column}.npy"), mmap_mode="r")
+            for column in COLUMNS
+        }
+
+    def _write_segment(self, year: int, segment: Dict[str, np.ndarray]):
+        """Write a new version of a year's segment and point the manifest at it"""
+        os.makedirs(self.root, exist_ok=True)
+        self._generation += 1
+        name = f"{year}.{self._generation}"
+        path = os.path.join(self.root, name)
+        os.makedirs(path)
+        for column in COLUMNS:
+            with open(os.path.join(path, f"{column}.npy"), "wb") as f:
+                np.save(f, segment[column])
+                f.flush()
+                os.fsync(f.fileno())
+
+        previous = self._dirs.get(year)
+        dirs = {**self._dirs, year: name}
+        manifest_path = os.path.join(self.root, MANIFEST_FILE)
+        with open(f"{manifest_path}.tmp-{os.getpid()}", "w") as f:
+            json.dump(
+                {
+                    "sectors": self.sectors,
+                    "years": {str(y): d for y, d in dirs.items()},
+                },
+                f,
+            )
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(f"{manifest_path}.tmp-{os.getpid()}", manifest_path)
+        self._dirs = dirs
+        if previous is not None:
+            shutil.rmtree(os.path.join(self.root, previous), ignore_errors=True)
+
+    def _rows(self, start: int, end: int) -> List[Tuple[Dict[str, np.ndarray], slice]]:
+        """(segment, row slice) pairs covering days in [start, end]"""
+        first = max(bisect_right(self._first_days, start) - 1, 0)
+        last = bisect_right(self._first_days, end)
+        rows = []
+        for segment in self._segments[first:last]:
+            days = segment["day"]
+            lo = int(np.searchsorted(days, start, side="left"))
+            hi = int(np.searchsorted(days, end, side="right"))
+            if hi > lo:
+                rows.append((segment, slice(lo, hi)))
+        return rows
+
+    def series(
+        self, start: int, end: int, resolution: str = DAILY
+    ) -> List[Dict[str, Any]]:
+        """Chart points for days in [start, end] at the given resolution"""
+        if resolution in self.rollups:
+            return self.rollups[resolution].points(start, end)
+        points = []
+        for segment, rows in self._rows(start, end):
+            for day, nav, yield_ in zip(
+                segment["day"][rows], segment["nav"][rows], segment["yield"][rows]
+            ):
+                points.append(
+                    {
+                        "date": day_to_str(day),
+                        "value": round(float(nav), 2),
+                        "yield": round(float(yield_), 2),
+                    }
+                )
+        return points
+
+    def performance(
+        self, timeframe: str = "1Y", end: Optional[date] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Performance chart series for a timeframe ending at end (default: latest)
+
+        Raises:
+            ValueError: If the timeframe is not one of TIMEFRAMES
+        """
+        if timeframe not in TIMEFRAMES:
+            raise ValueError(
+                f"Unknown timeframe {timeframe}; expected one of {', '.join(TIMEFRAMES)}"
+            )
+        if not self._segments:
+            return []
+        span, resolution = TIMEFRAMES[timeframe]
+        last = to_day(end) if end else self.last_day
+        first = self._first_days[0] if span is None else last - span + 1
+        return self.series(first, last, resolution)
+
+    def composition(
+        self, as_of: Optional[date] = None, slices: int = len(COMPOSITION_COLORS)
+    ) -> List[Dict[str, Any]]:
+        """Sector shares of the latest snapshot on or before as_of"""
+        if not self._segments:
+            return []
+        day = to_day(as_of) if as_of else self.last_day
+        idx = bisect_right(self._first_days, day) - 1
+        if idx < 0:
+            return []
+        segment = self._segments[idx]
+        row = int(np.searchsorted(segment["day"], day, side="right")) - 1
+        exposure = np.zeros(len(self.sectors))
+        latest = segment["exposure"][row]
+        exposure[: len(latest)] = latest
+        return composition_chart(dict(zip(self.sectors, exposure)), slices)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "snapshots": len(self),
+            "segments": len(self._segments),
+            "sectors": len(self.sectors),
+            "lastDate": None if self.last_day is None else day_to_str(self.last_day),
+        }
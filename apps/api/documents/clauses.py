@@ -0,0 +1,251 @@
+"""
+Rule-based clause extraction for AutoSyndicate™
+Compiled patterns for the predictable clauses of LMA-style facility
+agreements, run before any LLM call
+"""
+
+from typing import List, Dict, Any, Optional, Iterable, Tuple
+from dataclasses import dataclass, field
+import re
+
+# Fields the rule extractor is responsible for; the LLM is only asked for
+# the ones that come back below the confidence threshold
+RULE_FIELDS = ("borrower", "loanAmount", "term", "interestRate", "covenants")
+DEFAULT_CONFIDENCE_THRESHOLD = 0.8
+
+_FLAGS = re.IGNORECASE
+
+_NUMBER = r"(?P<value>\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d+(?:\.\d+)?)"
+_SCALE = r"(?P<scale>billion|bn|million|mm|m)?\b"
+_CURRENCY = r"(?P<currency>USD|EUR|GBP|US\$|\$|€|£)"
+
+SCALES = {"billion": 1e9, "bn": 1e9, "million": 1e6, "mm": 1e6, "m": 1e6}
+
+LOAN_AMOUNT = re.compile(
+    r"(?:aggregate|total|principal)?\s*(?:facility|commitments?|loan)\s*(?:amount)?"
+    r"[^.;\n]{0,80}?" + _CURRENCY + r"\s?" + _NUMBER + r"\s*" + _SCALE,
+    _FLAGS,
+)
+
+INTEREST_RATE = re.compile(
+    r"(?P<label>interest\s+rate|rate\s+of\s+interest|margin|coupon)"
+    r"[^.;\n]{0,80}?" + _NUMBER + r"\s*(?:%|per\s*cent|percent)",
+    _FLAGS,
+)
+
+TERM = re.compile(
+    r"(?:term|tenor|maturity|termination\s+date)[^.;\n]{0,80}?"
+    r"(?P<value>\d{1,3})\s*(?:\(\w+\)\s*)?(?P<unit>months?|years?)",
+    _FLAGS,
+)
+
+BORROWER = re.compile(
+    r"(?:borrower\s*[:\-]\s*|between\s+|by\s+)(?P<name>[A-Z][\w&.,'\- ]{1,80}?"
+    r"(?:Limited|Ltd\.?|PLC|plc|Inc\.?|LLC|L\.P\.|Corporation|Corp\.?|S\.A\.|AG|GmbH|B\.V\.|N\.V\.))"
+    r"(?=\W)",
+)
+
+# Canonical covenant name -> alias pattern
+COVENANT_ALIASES = {
+    "Leverage Ratio": r"(?:total\s+|net\s+|senior\s+)?leverage(?:\s+ratio)?|(?:net\s+)?debt\s+to\s+ebitda",
+    "Debt Service Coverage Ratio": r"debt\s+service\s+cover(?:age)?(?:\s+ratio)?|DSCR",
+    "Interest Coverage Ratio": r"interest\s+cover(?:age)?(?:\s+ratio)?|ICR",
+    "Fixed Charge Coverage Ratio": r"fixed\s+charge\s+cover(?:age)?(?:\s+ratio)?|FCCR",
+    "Loan to Value": r"loan[\s\-]+to[\s\-]+value(?:\s+ratio)?|LTV",
+    "Gearing Ratio": r"gearing(?:\s+ratio)?",
+    "Current Ratio": r"current\s+ratio",
+}  # fmt: skip
+
+_COMPARATOR = (
+    r"(?P<cmp>shall\s+not\s+exceed|not\s+(?:be\s+)?(?:more|greater|higher)\s+than"
+    r"|not\s+(?:be\s+)?(?:less|lower)\s+than|not\s+fall\s+below|(?:be\s+)?at\s+least"
+    r"|(?:a\s+)?(?:maximum|minimum)\s+of|(?:greater|more|higher|less|lower)\s+than"
+    r"|exceed|below|above)"
+)
+_RATIO = (
+    _NUMBER + r"\s*(?P<unit>x\b|times|:\s*1(?:\.0+)?\b|to\s*1(?:\.0+)?\b|%|per\s*cent)?"
+)
+
+COVENANTS = [
+    (
+        name,
+        re.compile(
+            rf"\b(?:{alias})\b[^;\n]{{0,150}}?\b{_COMPARATOR}\s+(?:\w+\s+){{0,3}}?{_RATIO}",
+            _FLAGS,
+        ),
+    )
+    for name, alias in COVENANT_ALIASES.items()
+]
+
+FREQUENCY = re.compile(
+    r"\b(?P<freq>monthly|each\s+month|quarterly|each\s+quarter(?:\s+date)?"
+    r"|semi[\s\-]?annual(?:ly)?|half[\s\-]?year(?:ly)?|annual(?:ly)?|each\s+financial\s+year)\b",
+    _FLAGS,
+)
+FREQUENCY_WINDOW = 300
+
+
+@dataclass
+class ClauseExtraction:
+    """Extracted fields with a 0-1 confidence per field"""
+
+    data: Dict[str, Any] = field(default_factory=dict)
+    confidence: Dict[str, float] = field(default_factory=dict)
+
+    def low_confidence_fields(
+        self, threshold: float = DEFAULT_CONFIDENCE_THRESHOLD
+    ) -> List[str]:
+        return [f for f in RULE_FIELDS if self.confidence.get(f, 0.0) < threshold]
+
+
+def _to_float(value: str) -> float:
+    return float(value.replace(",", ""))
+
+
+def _frequency(text: str) -> Optional[str]:
+    match = FREQUENCY.search(text)
+    if match is None:
+        return None
+    freq = match.group("freq").lower()
+    if "month" in freq:
+        return "MONTHLY"
+    if "quarter" in freq:
+        return "QUARTERLY"
+    if "semi" in freq or "half" in freq:
+        return "SEMI_ANNUALLY"
+    return "ANNUALLY"
+
+
+def _vote(values: List[Any], base: float) -> Tuple[Any, float]:
+    """
+    Pick the most frequent candidate and score it
+
+    Repeated agreeing matches raise confidence above the pattern's base;
+    conflicting candidates lower it in proportion to the disagreement.
+    """
+    if not values:
+        return None, 0.0
+    counts: Dict[Any, int] = {}
+    for value in values:
+        counts[value] = counts.get(value, 0) + 1
+    best = max(counts, key=counts.get)
+    agreement = counts[best] / len(values)
+    support = min(counts[best] - 1, 3) * 0.05
+    return best, round(min(base * agreement + support, 0.99), 2)
+
+
+def _loan_amounts(text: str) -> List[float]:
+    amounts = []
+    for match in LOAN_AMOUNT.finditer(text):
+        scale = SCALES.get((match.group("scale") or "").lower(), 1.0)
+        amount = _to_float(match.group("value")) * scale
+        # Anything under 100k is a fee or a clause number, not a facility size
+        if amount >= 100_000:
+            amounts.append(amount)
+    return amounts
+
+
+def _interest_rates(text: str) -> List[float]:
+    rates = []
+    for match in INTEREST_RATE.finditer(text):
+        rate = _to_float(match.group("value"))
+        if 0 < rate < 30:
+            rates.append(rate)
+    return rates
+
+
+def _terms(text: str) -> List[int]:
+    terms = []
+    for match in TERM.finditer(text):
+        value = int(match.group("value"))
+        months = value * 12 if match.group("unit").lower().startswith("year") else value
+        if 1 <= months <= 480:
+            terms.append(months)
+    return terms
+
+
+def _covenants(text: str) -> List[Dict[str, Any]]:
+    matches = []
+    for name, pattern in COVENANTS:
+        for match in pattern.finditer(text):
+            unit = (match.group("unit") or "").lower()
+            # A bare number next to a ratio covenant is usually a clause reference
+            if unit or "ratio" in match.group(0).lower():
+                matches.append((match.start(), match.end(), name, match))
+    matches.sort()
+
+    found = []
+    for idx, (start, end, name, match) in enumerate(matches):
+        # Look for the testing frequency up to the next covenant clause
+        stop = matches[idx + 1][0] if idx + 1 < len(matches) else len(text)
+        frequency = _frequency(text[start : min(stop, end + FREQUENCY_WINDOW)])
+        found.append(
+            {
+                "type": "FINANCIAL",
+                "name": name,
+                "threshold": _to_float(match.group("value")),
+                "frequency": frequency or "QUARTERLY",
+                "_explicitFrequency": frequency is not None,
+            }
+        )
+    return found
+
+
+def extract_clauses(texts: Iterable[str]) -> ClauseExtraction:
+    """
+    Run the clause patterns over a document's chunks
+
+    Each field takes the value most chunks agree on. Covenants are kept
+    per canonical name with the most common threshold; a covenant whose
+    testing frequency was not stated is marked less confident.
+    """
+    borrowers: List[str] = []
+    amounts: List[float] = []
+    rates: List[float] = []
+    terms: List[int] = []
+    covenants: Dict[str, List[Dict[str, Any]]] = {}
+
+    for text in texts:
+        borrowers.extend(m.group("name").strip() for m in BORROWER.finditer(text))
+        amounts.extend(_loan_amounts(text))
+        rates.extend(_interest_rates(text))
+        terms.extend(_terms(text))
+        for covenant in _covenants(text):
+            covenants.setdefault(covenant["name"], []).append(covenant)
+
+    result = ClauseExtraction()
+    for key, values, base in (
+        ("borrower", borrowers, 0.85),
+        ("loanAmount", amounts, 0.9),
+        ("interestRate", rates, 0.85),
+        ("term", terms, 0.85),
+    ):
+        value, confidence = _vote(values, base)
+        if value is not None:
+            result.data[key] = value
+            result.confidence[key] = confidence
+
+    merged, scores = [], []
+    for name, matches in covenants.items():
+        threshold, confidence = _vote([m["threshold"] for m in matches], 0.9)
+        chosen = next(m for m in matches if m["threshold"] == threshold)
+        if not any(m["_explicitFrequency"] for m in matches):
+            confidence *= 0.85
+        merged.append(
+            {
+                "type": chosen["type"],
+                "name": name,
+                "threshold": threshold,
+                "frequency": next(
+                    (m["frequency"] for m in matches if m["_explicitFrequency"]),
+                    chosen["frequency"],
+                ),
+            }
+        )
+        scores.append(confidence)
+    if merged:
+        result.data["covenants"] = merged
+        # The list is only as trustworthy as its weakest covenant
+        result.confidence["covenants"] = round(min(scores), 2)
+
+    return result
@@ -0,0 +1,282 @@
+"""
+Semantic clause index for AutoSyndicate™
+Parsed documents are split into clauses, embedded in batches and upserted
+into a local Qdrant collection for nearest-clause search
+"""
+
+from typing import List, Dict, Any, Optional, Iterable
+import os
+import re
+import uuid
+import zlib
+import threading
+import numpy as np
+
+from documents.clauses import COVENANT_ALIASES
+
+try:
+    from qdrant_client import QdrantClient
+    from qdrant_client.models import (
+        Distance,
+        FieldCondition,
+        Filter,
+        MatchValue,
+        PointStruct,
+        VectorParams,
+    )
+except ImportError:
+    QdrantClient = None
+# collection_exists arrived in qdrant-client 1.8 and query_points in 1.10;
+# older clients fall back to the in-process index
+if QdrantClient is not None and not hasattr(QdrantClient, "query_points"):
+    QdrantClient = None
+
+DEFAULT_DIMENSIONS = 512
+DEFAULT_COLLECTION = "clauses"
+UPSERT_BATCH = 256
+MIN_CLAUSE_CHARS = 80
+MAX_CLAUSE_CHARS = 1200
+CLAUSE_NAMESPACE = uuid.UUID("5b0e2a52-6f0c-4f43-9a1e-0d9d6c1b7a21")
+
+TOKEN = re.compile(r"[a-z]+|\d+(?:\.\d+)?")
+STOPWORDS = frozenset(
+    "a an and any as at be by each for from in is it of on or shall such that "
+    "the this to which with".split()
+)
+# Paragraph breaks, numbered clause headings and sentence ends
+CLAUSE_BREAK = re.compile(
+    r"\n\s*\n|\n(?=\s*\(?\d+(?:\.\d+)*\)?\s)|(?<=[.;])\s+(?=[A-Z(])"
+)
+CLAUSE_TYPES = [
+    (name, re.compile(rf"\b(?:{alias})\b", re.IGNORECASE))
+    for name, alias in COVENANT_ALIASES.items()
+]
+
+
+class HashingEmbedder:
+    """
+    Dependency-free text embedder
+
+    Unigrams and bigrams are hashed into a fixed number of signed buckets
+    with sublinear term frequency and L2 normalisation, so cosine similarity
+    tracks shared clause vocabulary. crc32 keeps vectors stable across
+    processes and restarts.
+    """
+
+    def __init__(self, dimensions: int = DEFAULT_DIMENSIONS):
+        self.dimensions = dimensions
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """Embed a batch of texts into an (n, dimensions) float32 matrix"""
+        rows, cols, signs = [], [], []
+        for row, text in enumerate(texts):
+            tokens = [t for t in TOKEN.findall(text.lower()) if t not in STOPWORDS]
+            for feature in tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]:
+                digest = zlib.crc32(feature.encode("utf-8"))
+                rows.append(row)
+                cols.append(digest % self.dimensions)
+                signs.append(1.0 if digest & 0x80000000 else -1.0)
+
+        counts = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        np.add.at(counts, (np.array(rows, dtype=np.int64), np.array(cols)), signs)
+        vectors = np.sign(counts) * np.log1p(np.abs(counts))
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms > 0, norms, 1.0)
+
+
+def split_clauses(text: str) -> List[str]:
+    """Split document text into clause-sized passages"""
+    clauses, buffer = [], ""
+    for piece in CLAUSE_BREAK.split(text):
+        piece = " ".join(piece.split())
+        if not piece:
+            continue
+        buffer = f"{buffer} {piece}".strip()
+        if len(buffer) >= MIN_CLAUSE_CHARS:
+            clauses.extend(
+                buffer[i : i + MAX_CLAUSE_CHARS]
+                for i in range(0, len(buffer), MAX_CLAUSE_CHARS)
+            )
+            buffer = ""
+    if buffer:
+        clauses.append(buffer)
+    return clauses
+
+
+def clause_type(text: str) -> str:
+    for name, pattern in CLAUSE_TYPES:
+        if pattern.search(text):
+            return name
+    return "GENERAL"
+
+
+class ClauseIndex:
+    """
+    Nearest-clause index over the parsed document corpus
+
+    Uses Qdrant in local mode (in memory, or on disk when path is set).
+    Point ids are derived from document URL and clause text, so re-parsing
+    a document upserts in place instead of duplicating it. Without
+    qdrant-client installed, an exact in-process matrix index with the same
+    interface is used instead.
+    """
+
+    def __init__(
+        self,
+        embedder: Optional[HashingEmbedder] = None,
+        path: Optional[str] = None,
+        collection: str = DEFAULT_COLLECTION,
+    ):
+        self.embedder = embedder or HashingEmbedder()
+        self.collection = collection
+        self.path = path
+        self._lock = threading.Lock()
+        self._client = None
+        if QdrantClient is not None:
+            self._client = (
+                QdrantClient(path=path) if path else QdrantClient(location=":memory:")
+            )
+            if not self._client.collection_exists(collection):
+                self._client.create_collection(
+                    collection,
+                    vectors_config=VectorParams(
+                        size=self.embedder.dimensions, distance=Distance.COSINE
+                    ),
+                )
+        else:
+            # Growable matrix; rows past len(self._payloads) are spare capacity
+            self._vectors = np.zeros((1024, self.embedder.dimensions), dtype=np.float32)
+            self._payloads: List[Dict[str, Any]] = []
+            self._rows: Dict[str, int] = {}
+
+    @classmethod
+    def from_env(cls) -> "ClauseIndex":
+        return cls(
+            HashingEmbedder(
+                int(os.getenv("CLAUSE_INDEX_DIMENSIONS", DEFAULT_DIMENSIONS))
+            ),
+            path=os.getenv("CLAUSE_INDEX_PATH") or None,
+        )
+
+    def index_document(
+        self, document_url: str, document_type: str, texts: Iterable[str]
+    ) -> int:
+        """Split, embed and upsert a document's clauses; returns clauses written"""
+        clauses = {}
+        for text in texts:
+            for clause in split_clauses(text):
+                # Overlapping chunks repeat clauses; the id collapses them
+                point_id = str(
+                    uuid.uuid5(CLAUSE_NAMESPACE, f"{document_url}\0{clause}")
+                )
+                clauses[point_id] = {
+                    "documentUrl": document_url,
+                    "documentType": document_type,
+                    "clauseType": clause_type(clause),
+                    "text": clause,
+                }
+
+        items = list(clauses.items())
+        for start in range(0, len(items), UPSERT_BATCH):
+            batch = items[start : start + UPSERT_BATCH]
+            vectors = self.embedder.embed([payload["text"] for _, payload in batch])
+            self._upsert(
+                [point_id for point_id, _ in batch], vectors, [p for _, p in batch]
+            )
+        return len(items)
+
+    def _upsert(
+        self, ids: List[str], vectors: np.ndarray, payloads: List[Dict[str, Any]]
+    ):
+        with self._lock:
+            if self._client is not None:
+                self._client.upsert(
+                    self.collection,
+                    points=[
+                        PointStruct(
+                            id=point_id, vector=vector.tolist(), payload=payload
+                        )
+                        for point_id, vector, payload in zip(ids, vectors, payloads)
+                    ],
+                )
+                return
+
+            for point_id, vector, payload in zip(ids, vectors, payloads):
+                row = self._rows.get(point_id)
+                if row is None:
+                    row = self._rows[point_id] = len(self._payloads)
+                    self._payloads.append(payload)
+                    if row == len(self._vectors):
+                        self._vectors = np.concatenate(
+                            [self._vectors, np.zeros_like(self._vectors)]
+                        )
+                else:
+                    self._payloads[row] = payload
+                self._vectors[row] = vector
+
+    def search(
+        self,
+        query: str,
+        limit: int = 10,
+        filters: Optional[Dict[str, str]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Top clauses by cosine similarity, optionally filtered on payload fields"""
+        vector = self.embedder.embed([query])[0]
+        filters = {k: v for k, v in (filters or {}).items() if v}
+
+        with self._lock:
+            if self._client is not None:
+                query_filter = (
+                    Filter(
+                        must=[
+                            FieldCondition(key=key, match=MatchValue(value=value))
+                            for key, value in filters.items()
+                        ]
+                    )
+                    if filters
+                    else None
+                )
+                points = self._client.query_points(
+                    self.collection,
+                    query=vector.tolist(),
+                    query_filter=query_filter,
+                    limit=limit,
+                ).points
+                return [{**p.payload, "score": round(p.score, 4)} for p in points]
+
+            if not self._payloads:
+                return []
+            scores = self._vectors[: len(self._payloads)] @ vector
+            if filters:
+                mask = np.array(
+                    [
+                        all(p.get(k) == v for k, v in filters.items())
+                        for p in self._payloads
+                    ]
+                )
+                scores = np.where(mask, scores, -np.inf)
+            k = min(limit, len(scores))
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [
+                {**self._payloads[i], "score": round(float(scores[i]), 4)}
+                for i in top
+                if np.isfinite(scores[i])
+            ]
+
+    def __len__(self) -> int:
+        if self._client is not None:
+            return self._client.count(self.collection).count
+        return len(self._payloads)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "qdrant-local" if self._client is not None else "in-process",
+            "clauses": len(self),
+            "dimensions": self.embedder.dimensions,
+            "persistent": self.path is not None and self._client is not None,
+        }
+
+    def close(self):
+        if self._client is not None:
+            self._client.close()
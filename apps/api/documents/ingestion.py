@@ -0,0 +1,369 @@
+"""
+Document ingestion for AutoSyndicate™
+Streams loan documents to disk, extracts text page by page and splits it
+into prompt-sized chunks
+"""
+
+from typing import List, Dict, Any, Optional, Iterator, Iterable
+from dataclasses import dataclass
+from urllib.parse import urlparse
+import asyncio
+import ipaddress
+import os
+import re
+import socket
+import tempfile
+import httpcore
+import httpx
+
+try:
+    from pypdf import PdfReader
+except ImportError:
+    PdfReader = None
+
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+DEFAULT_CHUNK_CHARS = 12000
+DEFAULT_CHUNK_OVERLAP = 500
+# Plain-text documents without form feeds are paged by line count
+TEXT_PAGE_LINES = 60
+STREAM_CHUNK_BYTES = 64 * 1024
+
+
+@dataclass
+class DocumentChunk:
+    """A run of consecutive pages sized for one LLM call"""
+
+    index: int
+    first_page: int
+    last_page: int
+    text: str
+
+
+class DocumentTooLarge(Exception):
+    pass
+
+
+class DocumentURLRejected(ValueError):
+    """The document URL is not one the service is allowed to fetch"""
+
+
+def parse_allowed_hosts(value: Optional[str]) -> List[str]:
+    """Comma-separated host allowlist, e.g. DOCUMENT_ALLOWED_HOSTS"""
+    return [
+        h.strip().lower().rstrip(".") for h in (value or "").split(",") if h.strip()
+    ]
+
+
+def _host_allowed(host: str, allowed_hosts: Iterable[str]) -> bool:
+    return any(host == h or host.endswith("." + h) for h in allowed_hosts)
+
+
+async def check_document_url(
+    url: str, allowed_hosts: Optional[Iterable[str]] = None
+) -> None:
+    """
+    Reject URLs that could reach internal services
+
+    Only http(s) is accepted. Hosts on the allowlist are trusted as
+    configured; every other host must resolve exclusively to public
+    addresses, so loopback, private, link-local (cloud metadata) and
+    reserved ranges are refused after DNS resolution.
+    """
+    parsed = urlparse(url)
+    if parsed.scheme not in ("http", "https"):
+        raise DocumentURLRejected(f"Unsupported document URL: {url}")
+    host = (parsed.hostname or "").lower().rstrip(".")
+    if not host:
+        raise DocumentURLRejected(f"Document URL has no host: {url}")
+
+    allowed_hosts = list(allowed_hosts or [])
+    if allowed_hosts:
+        if not _host_allowed(host, allowed_hosts):
+            raise DocumentURLRejected(f"Document host is not allowed: {host}")
+        return
+
+    await public_addresses(
+        host, parsed.port or (443 if parsed.scheme == "https" else 80)
+    )
+
+
+async def _resolve(host: str, port: int) -> List[str]:
+    infos = await asyncio.get_running_loop().getaddrinfo(
+        host, port, type=socket.SOCK_STREAM
+    )
+    return [info[4][0] for info in infos]
+
+
+async def public_addresses(host: str, port: int) -> List[str]:
+    """
+    Resolve a host, refusing it unless every address is public
+
+    Raises:
+        DocumentURLRejected: If the host does not resolve, or any address is
+            loopback, private, link-local, reserved or multicast
+    """
+    try:
+        addresses = await _resolve(host, port)
+    except socket.gaierror as e:
+        raise DocumentURLRejected(f"Cannot resolve document host {host}: {e}")
+    for address in addresses:
+        ip = ipaddress.ip_address(address.split("%")[0])
+        if not ip.is_global or ip.is_multicast:
+            raise DocumentURLRejected(
+                f"Document host {host} resolves to a non-public address"
+            )
+    return addresses
+
+
+class PublicAddressBackend(httpcore.AsyncNetworkBackend):
+    """
+    Network backend that only opens connections to public addresses
+
+    check_document_url resolves the host once, but the connection would
+    resolve it again, so a DNS answer that changes in between (rebinding)
+    could still reach an internal address. This backend resolves and checks
+    the host on every new connection and connects to the checked address
+    itself. TLS still verifies the certificate against the URL's hostname.
+    """
+
+    def __init__(
+        self,
+        backend: Optional[httpcore.AsyncNetworkBackend] = None,
+        allowed_hosts: Optional[Iterable[str]] = None,
+    ):
+        self.backend = backend or httpcore.AnyIOBackend()
+        self.allowed_hosts = list(allowed_hosts or [])
+
+    async def connect_tcp(
+        self,
+        host: str,
+        port: int,
+        timeout: Optional[float] = None,
+        local_address: Optional[str] = None,
+        socket_options: Optional[Iterable[Any]] = None,
+    ) -> httpcore.AsyncNetworkStream:
+        if self.allowed_hosts:
+            # Allowlisted hosts are trusted as configured
+            addresses = [host]
+            if not _host_allowed(host.lower().rstrip("."), self.allowed_hosts):
+                raise DocumentURLRejected(f"Document host is not allowed: {host}")
+        else:
+            addresses = await public_addresses(host, port)
+        error: Optional[Exception] = None
+        for address in addresses:
+            try:
+                return await self.backend.connect_tcp(
+                    address,
+                    port,
+                    timeout=timeout,
+                    local_address=local_address,
+                    socket_options=socket_options,
+                )
+            except (httpcore.ConnectError, httpcore.ConnectTimeout) as e:
+                error = e
+        raise error
+
+    async def connect_unix_socket(self, path: str, *args, **kwargs):
+        raise DocumentURLRejected("Documents are not fetched over Unix sockets")
+
+    async def sleep(self, seconds: float):
+        await self.backend.sleep(seconds)
+
+
+def document_client(
+    allowed_hosts: Optional[Iterable[str]] = None, **kwargs
+) -> httpx.AsyncClient:
+    """
+    HTTP client for fetching documents from request-supplied URLs
+
+    Connections go through PublicAddressBackend; kwargs (limits, timeout)
+    are passed to the transport and client.
+    """
+    limits = kwargs.pop("limits", httpx.Limits())
+    transport = httpx.AsyncHTTPTransport(limits=limits)
+    # httpx does not expose httpcore's network_backend option
+    transport._pool._network_backend = PublicAddressBackend(
+        transport._pool._network_backend, allowed_hosts
+    )
+    return httpx.AsyncClient(transport=transport, **kwargs)
+
+
+async def download_document(
+    client: httpx.AsyncClient,
+    url: str,
+    spool_dir: Optional[str] = None,
+    max_bytes: int = DEFAULT_MAX_BYTES,
+    allowed_hosts: Optional[Iterable[str]] = None,
+) -> str:
+    """
+    Stream a document to a spool file and return its path
+
+    The URL is checked with check_document_url first and redirects are not
+    followed, so request input cannot read local files or internal
+    endpoints. Pass a document_client so the address is checked again on
+    connect. The caller removes the spool file once it is done with it.
+    """
+    await check_document_url(url, allowed_hosts)
+
+    fd, path = tempfile.mkstemp(prefix="document-", dir=spool_dir)
+    try:
+        with os.fdopen(fd, "wb") as spool:
+            async with client.stream("GET", url, follow_redirects=False) as response:
+                response.raise_for_status()
+                received = 0
+                async for block in response.aiter_bytes(STREAM_CHUNK_BYTES):
+                    received += len(block)
+                    if received > max_bytes:
+                        raise DocumentTooLarge(
+                            f"Document exceeds {max_bytes} bytes: {url}"
+                        )
+                    spool.write(block)
+    except BaseException:
+        os.unlink(path)
+        raise
+    return path
+
+
+def document_error_status(error: BaseException) -> int:
+    """HTTP status to report for a failed document parse"""
+    if isinstance(error, DocumentURLRejected):
+        return 400
+    if isinstance(error, DocumentTooLarge):
+        return 413
+    if isinstance(error, httpx.HTTPStatusError):
+        # The document host refused the request: the URL is at fault
+        return 422 if error.response.status_code < 500 else 502
+    if isinstance(error, httpx.TransportError):
+        return 502
+    return 500
+
+
+def is_pdf(path: str) -> bool:
+    with open(path, "rb") as f:
+        return f.read(5) == b"%PDF-"
+
+
+def iter_pages(path: str) -> Iterator[str]:
+    """Yield the text of each page without loading the whole document"""
+    if is_pdf(path):
+        if PdfReader is None:
+            raise RuntimeError(
+                "PDF extraction requires the 'pypdf' package (poetry install -E documents)"
+            )
+        for page in PdfReader(path).pages:
+            yield page.extract_text() or ""
+        return
+
+    with open(path, encoding="utf-8", errors="replace") as f:
+        lines: List[str] = []
+        for line in f:
+            # Form feeds mark page breaks in text exports
+            *complete, line = line.split("\f")
+            for part in complete:
+                lines.append(part)
+                yield "".join(lines)
+                lines = []
+            lines.append(line)
+            if len(lines) >= TEXT_PAGE_LINES:
+                yield "".join(lines)
+                lines = []
+        if lines:
+            yield "".join(lines)
+
+
+def chunk_pages(
+    pages: Iterable[str],
+    max_chars: int = DEFAULT_CHUNK_CHARS,
+    overlap: int = DEFAULT_CHUNK_OVERLAP,
+) -> Iterator[DocumentChunk]:
+    """
+    Pack pages into chunks of at most max_chars
+
+    Each chunk repeats the tail of the previous one so clauses that straddle
+    a boundary are seen whole by at least one call. Oversized pages are
+    split on their own.
+    """
+    index, buffer, size, carry = 0, [], 0, ""
+    first_page = last_page = 1
+    for page_number, text in enumerate(pages, 1):
+        text = re.sub(r"[ \t]+", " ", text).strip()
+        if not text:
+            continue
+        for start in range(0, len(text), max_chars):
+            piece = text[start : start + max_chars]
+            if buffer and size + len(piece) > max_chars:
+                body = "\n\n".join(buffer)
+                yield DocumentChunk(index, first_page, last_page, carry + body)
+                index += 1
+                carry = body[-overlap:] + "\n\n" if overlap else ""
+                buffer, size, first_page = [], 0, page_number
+            if not buffer:
+                first_page = page_number
+            buffer.append(piece)
+            size += len(piece)
+            last_page = page_number
+    if buffer:
+        yield DocumentChunk(index, first_page, last_page, carry + "\n\n".join(buffer))
+
+
+def _first(values: Iterable[Any]) -> Any:
+    return next((v for v in values if v not in (None, "", [], {})), None)
+
+
+def _most_common(values: Iterable[Any]) -> Any:
+    counts: Dict[Any, int] = {}
+    for value in values:
+        if isinstance(value, (str, int, float)) and value != "":
+            counts[value] = counts.get(value, 0) + 1
+    # Ties go to the earliest value in the document
+    return max(counts, key=counts.get) if counts else None
+
+
+def merge_extractions(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Merge per-chunk extractions into one borrower/covenant record
+
+    Scalars take the value most chunks agree on, covenants are deduplicated
+    by name (first complete definition wins), and risk factors are unioned.
+    """
+    results = [r for r in results if isinstance(r, dict)]
+
+    covenants: Dict[str, Dict[str, Any]] = {}
+    for result in results:
+        for covenant in result.get("covenants") or []:
+            if not isinstance(covenant, dict):
+                continue
+            name = (covenant.get("name") or "").strip()
+            if not name:
+                continue
+            key = name.lower()
+            existing = covenants.get(key)
+            if existing is None:
+                covenants[key] = dict(covenant)
+            else:
+                for field, value in covenant.items():
+                    if existing.get(field) in (None, ""):
+                        existing[field] = value
+
+    risk_factors: Dict[str, str] = {}
+    for result in results:
+        for factor in result.get("riskFactors") or []:
+            if isinstance(factor, str) and factor.strip():
+                risk_factors.setdefault(factor.strip().lower(), factor.strip())
+
+    esg_metrics: Dict[str, Any] = {}
+    for result in results:
+        for field, value in (result.get("esgMetrics") or {}).items():
+            if esg_metrics.get(field) is None and value is not None:
+                esg_metrics[field] = value
+
+    return {
+        "borrower": _most_common(r.get("borrower") for r in results),
+        "loanAmount": _most_common(r.get("loanAmount") for r in results),
+        "term": _most_common(r.get("term") for r in results),
+        "interestRate": _most_common(r.get("interestRate") for r in results),
+        "purpose": _first(r.get("purpose") for r in results),
+        "covenants": list(covenants.values()),
+        "riskFactors": list(risk_factors.values()),
+        "esgMetrics": esg_metrics,
+    }
@@ -0,0 +1,491 @@
+"""
+Background job queue for AutoSyndicate™ document parsing
+Jobs run on an in-process worker pool with retries, and pending jobs are
+persisted to SQLite so they resume after a restart. Workers in several
+processes can share one database: jobs are claimed atomically under a lease
+"""
+
+from typing import Dict, Any, Optional, Callable, Awaitable, List
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from collections import OrderedDict
+import os
+import json
+import time
+import uuid
+import random
+import socket
+import sqlite3
+import asyncio
+import httpx
+
+PENDING = "PENDING"
+RUNNING = "RUNNING"
+RETRYING = "RETRYING"
+SUCCEEDED = "SUCCEEDED"
+FAILED = "FAILED"
+FINISHED = (SUCCEEDED, FAILED)
+
+DEFAULT_WORKERS = 4
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_BACKOFF_SECONDS = 2.0
+MAX_BACKOFF_SECONDS = 60.0
+DEFAULT_TIMEOUT_SECONDS = 300.0
+DEFAULT_DB_PATH = "artifacts/parse_jobs.db"
+# A claimed job is presumed abandoned this long after its attempt timeout
+LEASE_GRACE_SECONDS = 30.0
+RECOVERY_INTERVAL_SECONDS = 30.0
+# Finished jobs kept in memory for polling; older ones are read back from SQLite
+MAX_FINISHED_IN_MEMORY = 1000
+
+
+@dataclass
+class Job:
+    """One queued unit of work and its outcome"""
+
+    id: str
+    payload: Dict[str, Any]
+    status: str = PENDING
+    attempts: int = 0
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+    owner: Optional[str] = None
+    lease_until: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "jobId": self.id,
+            "status": self.status,
+            "attempts": self.attempts,
+            "result": self.result,
+            "error": self.error,
+            "createdAt": self.created_at,
+            "updatedAt": self.updated_at,
+        }
+
+
+JobHandler = Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]
+JobNotifier = Callable[[Job], Awaitable[None]]
+
+# Retryable HTTP statuses: timeouts and rate limits; 5xx is always retryable
+TRANSIENT_STATUSES = {408, 425, 429}
+# Provider SDK errors (google.api_core, openai/groq) that signal overload
+TRANSIENT_ERROR_NAMES = {
+    "ServiceUnavailable",
+    "ResourceExhausted",
+    "DeadlineExceeded",
+    "InternalServerError",
+    "TooManyRequests",
+    "RateLimitError",
+    "APIConnectionError",
+    "APITimeoutError",
+}
+
+
+def _transient_status(status: int) -> bool:
+    return status >= 500 or status in TRANSIENT_STATUSES
+
+
+def is_transient_error(error: BaseException) -> bool:
+    """
+    Whether a failed attempt is worth retrying
+
+    Timeouts, network errors, rate limits and 5xx responses are; bad input
+    (ValueError, rejected or oversized documents, other 4xx) fails at once.
+    """
+    if isinstance(error, (asyncio.TimeoutError, ConnectionError, httpx.TransportError)):
+        return True
+    if isinstance(error, httpx.HTTPStatusError):
+        return _transient_status(error.response.status_code)
+    if isinstance(error, ValueError):
+        return False
+    status = getattr(error, "status_code", None) or getattr(error, "code", None)
+    if isinstance(status, int) and status >= 400:
+        return _transient_status(status)
+    return type(error).__name__ in TRANSIENT_ERROR_NAMES
+
+
+class JobQueue:
+    """
+    Bounded worker pool over an asyncio queue
+
+    A transient failure (see is_transient_error) is retried with exponential
+    backoff and jitter until max_attempts is reached; each attempt is capped
+    at timeout seconds. notify is awaited whenever a job finishes,
+    successfully or not.
+
+    With a database, a worker runs a job only after claiming it with a
+    conditional UPDATE, so queues in several processes never run the same
+    attempt twice. A claim holds a lease longer than the attempt timeout;
+    jobs whose lease lapses (their process died) are picked up again by
+    whichever queue sweeps them first.
+    """
+
+    def __init__(
+        self,
+        handler: JobHandler,
+        workers: int = DEFAULT_WORKERS,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+        backoff_seconds: float = DEFAULT_BACKOFF_SECONDS,
+        timeout_seconds: float = DEFAULT_TIMEOUT_SECONDS,
+        db_path: Optional[str] = None,
+        notify: Optional[JobNotifier] = None,
+        lease_seconds: Optional[float] = None,
+        retryable: Callable[[BaseException], bool] = is_transient_error,
+    ):
+        self.handler = handler
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.timeout_seconds = timeout_seconds
+        self.lease_seconds = lease_seconds or timeout_seconds + LEASE_GRACE_SECONDS
+        self.notify = notify
+        self.retryable = retryable
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._tasks: List[asyncio.Task] = []
+        self._retries: set = set()
+        self._running: set = set()
+        self.succeeded = 0
+        self.failed = 0
+        self.retried = 0
+
+        self.db_path = db_path
+        self._db: Optional[sqlite3.Connection] = None
+        # SQLite calls block (up to the busy timeout while another process
+        # writes), so they run on one dedicated thread that owns the
+        # connection, never on the event loop
+        self._db_executor: Optional[ThreadPoolExecutor] = None
+
+    @classmethod
+    def from_env(
+        cls, handler: JobHandler, notify: Optional[JobNotifier] = None
+    ) -> "JobQueue":
+        return cls(
+            handler,
+            workers=int(os.getenv("PARSE_JOB_WORKERS", DEFAULT_WORKERS)),
+            max_attempts=int(os.getenv("PARSE_JOB_ATTEMPTS", DEFAULT_MAX_ATTEMPTS)),
+            backoff_seconds=float(
+                os.getenv("PARSE_JOB_BACKOFF", DEFAULT_BACKOFF_SECONDS)
+            ),
+            timeout_seconds=float(
+                os.getenv("PARSE_JOB_TIMEOUT", DEFAULT_TIMEOUT_SECONDS)
+            ),
+            db_path=os.getenv("PARSE_JOB_DB", DEFAULT_DB_PATH) or None,
+            notify=notify,
+            lease_seconds=float(os.getenv("PARSE_JOB_LEASE", "0")) or None,
+        )
+
+    async def start(self):
+        """Open the database, enqueue abandoned jobs, then start workers"""
+        if self.db_path:
+            self._db_executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="parse-jobs-db"
+            )
+            await self._call(self._open)
+        await self._enqueue_abandoned()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        if self._db is not None:
+            self._tasks.append(asyncio.create_task(self._sweep()))
+
+    async def stop(self):
+        for task in [*self._tasks, *self._retries]:
+            task.cancel()
+        await asyncio.gather(*self._tasks, *self._retries, return_exceptions=True)
+        self._tasks = []
+        self._retries.clear()
+        if self._db is not None:
+            await self._call(self._close)
+        if self._db_executor is not None:
+            self._db_executor.shutdown(wait=True)
+            self._db_executor = None
+
+    async def submit(self, payload: Dict[str, Any]) -> Job:
+        job = Job(
+            id=uuid.uuid4().hex,
+            payload=payload,
+            owner=self.owner,
+            lease_until=time.time() + self.lease_seconds,
+        )
+        self._remember(job)
+        await self._persist(job)
+        await self._queue.put(job.id)
+        return job
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        job = self._jobs.get(job_id)
+        # Unfinished jobs may be progressing in another process
+        if (job is None or job.status not in FINISHED) and self._db is not None:
+            row = await self._call(self._select, job_id)
+            job = self._row_to_job(row) if row else job
+        return job
+
+    async def _worker(self):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                job = self._jobs.get(job_id)
+                if job is not None and job.status not in FINISHED:
+                    await self._run(job)
+            except Exception as e:
+                print(f"Error in job worker: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: Job):
+        if job.id in self._running:
+            return
+        # Marked before the claim so a second queue entry cannot race it
+        self._running.add(job.id)
+        try:
+            if not await self._claim(job):
+                # Another process owns the job; get() reads its progress back
+                self._jobs.pop(job.id, None)
+                return
+            await self._attempt(job)
+        finally:
+            self._running.discard(job.id)
+
+    async def _claim(self, job: Job) -> bool:
+        """
+        Take the job for one attempt
+
+        Succeeds for our own pending or retrying jobs, and for any unfinished
+        job whose lease has lapsed. The conditional UPDATE is atomic across
+        processes sharing the database.
+        """
+        now = time.time()
+        lease_until = now + self.lease_seconds
+        if self._db is None:
+            job.attempts += 1
+        else:
+            attempts = await self._call(self._claim_row, job.id, now, lease_until)
+            if attempts is None:
+                return False
+            job.attempts = attempts
+        job.status = RUNNING
+        job.owner = self.owner
+        job.lease_until = lease_until
+        job.updated_at = now
+        return True
+
+    async def _attempt(self, job: Job):
+        try:
+            job.result = await asyncio.wait_for(
+                self.handler(job.payload), self.timeout_seconds
+            )
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            job.error = str(e) or type(e).__name__
+            if job.attempts < self.max_attempts and self.retryable(e):
+                job.status = RETRYING
+                self.retried += 1
+                await self._schedule_retry(job)
+                return
+            job.status = FAILED
+            self.failed += 1
+        else:
+            job.status = SUCCEEDED
+            job.error = None
+            self.succeeded += 1
+        await self._touch(job)
+        self._trim()
+        if self.notify is not None:
+            try:
+                await self.notify(job)
+            except Exception as e:
+                print(f"Error notifying job {job.id}: {e}")
+
+    async def _schedule_retry(self, job: Job):
+        delay = min(self.backoff_seconds * 2 ** (job.attempts - 1), MAX_BACKOFF_SECONDS)
+        delay *= random.uniform(0.5, 1.0)
+        # Hold the lease through the backoff so no other process takes it
+        job.lease_until = time.time() + delay + self.lease_seconds
+        await self._touch(job)
+
+        async def requeue():
+            await asyncio.sleep(delay)
+            await self._queue.put(job.id)
+
+        task = asyncio.create_task(requeue())
+        self._retries.add(task)
+        task.add_done_callback(self._retries.discard)
+
+    async def _sweep(self):
+        """Periodically pick up jobs abandoned by a dead process"""
+        while True:
+            await asyncio.sleep(RECOVERY_INTERVAL_SECONDS)
+            try:
+                await self._enqueue_abandoned()
+            except Exception as e:
+                print(f"Error sweeping parse jobs: {e}")
+
+    async def _enqueue_abandoned(self):
+        if self._db is None:
+            return
+        for row in await self._call(self._select_abandoned):
+            job = self._row_to_job(row)
+            local = self._jobs.get(job.id)
+            # Jobs we still hold are already queued, running or backing off
+            if local is not None and local.status not in FINISHED:
+                continue
+            self._remember(job)
+            self._queue.put_nowait(job.id)
+
+    async def _touch(self, job: Job):
+        job.updated_at = time.time()
+        await self._persist(job)
+
+    def _remember(self, job: Job):
+        self._jobs[job.id] = job
+        self._jobs.move_to_end(job.id)
+
+    def _trim(self):
+        finished = [j.id for j in self._jobs.values() if j.status in FINISHED]
+        for job_id in finished[: max(0, len(finished) - MAX_FINISHED_IN_MEMORY)]:
+            del self._jobs[job_id]
+
+    async def _persist(self, job: Job):
+        if self._db is None:
+            return
+        # Serialised here so the row is a consistent copy of the job
+        row = (
+            job.id,
+            json.dumps(job.payload),
+            job.status,
+            job.attempts,
+            None if job.result is None else json.dumps(job.result, default=str),
+            job.error,
+            job.created_at,
+            job.updated_at,
+            job.owner,
+            job.lease_until,
+        )
+        await self._call(self._write_row, row)
+
+    async def _call(self, fn: Callable[..., Any], *args) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._db_executor, fn, *args)
+
+    # The methods below run on the database thread
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        db = sqlite3.connect(self.db_path, timeout=30)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS parse_jobs ("
+            "id TEXT PRIMARY KEY, payload TEXT NOT NULL, status TEXT NOT NULL, "
+            "attempts INTEGER NOT NULL, result TEXT, error TEXT, "
+            "created_at REAL NOT NULL, updated_at REAL NOT NULL, "
+            "owner TEXT, lease_until REAL NOT NULL DEFAULT 0)"
+        )
+        columns = {row[1] for row in db.execute("PRAGMA table_info(parse_jobs)")}
+        # Databases created before leases
+        if "owner" not in columns:
+            db.execute("ALTER TABLE parse_jobs ADD COLUMN owner TEXT")
+        if "lease_until" not in columns:
+            db.execute(
+                "ALTER TABLE parse_jobs ADD COLUMN lease_until REAL NOT NULL "
+                "DEFAULT 0"
+            )
+        db.execute("CREATE INDEX IF NOT EXISTS parse_jobs_status ON parse_jobs(status)")
+        db.commit()
+        self._db = db
+
+    def _close(self):
+        # Release our leases so another process resumes the jobs right away
+        self._db.execute(
+            "UPDATE parse_jobs SET lease_until = 0 WHERE owner = ? "
+            "AND status NOT IN (?, ?)",
+            (self.owner, *FINISHED),
+        )
+        self._db.commit()
+        self._db.close()
+        self._db = None
+
+    def _claim_row(self, job_id: str, now: float, lease_until: float) -> Optional[int]:
+        """Attempt count after a successful claim, None if the job is taken"""
+        claimed = self._db.execute(
+            "UPDATE parse_jobs SET status = ?, owner = ?, lease_until = ?, "
+            "attempts = attempts + 1, updated_at = ? WHERE id = ? AND ("
+            "(owner = ? AND status IN (?, ?)) "
+            "OR (status IN (?, ?, ?) AND lease_until < ?))",
+            (
+                RUNNING,
+                self.owner,
+                lease_until,
+                now,
+                job_id,
+                self.owner,
+                PENDING,
+                RETRYING,
+                PENDING,
+                RUNNING,
+                RETRYING,
+                now,
+            ),
+        ).rowcount
+        self._db.commit()
+        if not claimed:
+            return None
+        return self._db.execute(
+            "SELECT attempts FROM parse_jobs WHERE id = ?", (job_id,)
+        ).fetchone()[0]
+
+    def _write_row(self, row: tuple):
+        self._db.execute(
+            "INSERT OR REPLACE INTO parse_jobs (id, payload, status, attempts, "
+            "result, error, created_at, updated_at, owner, lease_until) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            row,
+        )
+        self._db.commit()
+
+    def _select(self, job_id: str) -> Optional[tuple]:
+        return self._db.execute(
+            "SELECT id, payload, status, attempts, result, error, created_at, "
+            "updated_at, owner, lease_until FROM parse_jobs WHERE id = ?",
+            (job_id,),
+        ).fetchone()
+
+    def _select_abandoned(self) -> List[tuple]:
+        """Unfinished jobs whose lease has lapsed"""
+        return self._db.execute(
+            "SELECT id, payload, status, attempts, result, error, created_at, "
+            "updated_at, owner, lease_until FROM parse_jobs "
+            "WHERE status NOT IN (?, ?) AND lease_until < ? ORDER BY created_at",
+            (*FINISHED, time.time()),
+        ).fetchall()
+
+    @staticmethod
+    def _row_to_job(row: tuple) -> Job:
+        return Job(
+            id=row[0],
+            payload=json.loads(row[1]),
+            status=row[2],
+            attempts=row[3],
+            result=None if row[4] is None else json.loads(row[4]),
+            error=row[5],
+            created_at=row[6],
+            updated_at=row[7],
+            owner=row[8],
+            lease_until=row[9],
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        active = [j for j in self._jobs.values() if j.status not in FINISHED]
+        return {
+            "workers": self.workers,
+            "queued": self._queue.qsize(),
+            "running": sum(1 for j in active if j.status == RUNNING),
+            "retrying": sum(1 for j in active if j.status == RETRYING),
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "retried": self.retried,
+            "persistent": self.db_path is not None,
+        }
@@ -0,0 +1,238 @@
+"""
+Lender candidate selection for AutoSyndicate™
+Inverted index from sector keyword, risk appetite bucket and ticket size band
+to lender positions, so only a short list of lenders is scored and sent to
+the LLM
+"""
+
+from typing import List, Dict, Any, Optional, Tuple, Iterator
+import math
+import re
+import numpy as np
+
+from engine.scoring import (
+    DEFAULT_LOAN_RISK,
+    DEFAULT_RISK_LEVEL,
+    RISK_APPETITE_LEVELS,
+    LenderMatrix,
+)
+
+# Universes up to this size are only filtered on ticket size
+DEFAULT_MAX_CANDIDATES = 200
+# Postings are read best tier first until this many candidates are found
+DEFAULT_MIN_CANDIDATES = 50
+
+KEYWORD = re.compile(r"[a-z0-9]+")
+OTHER_BUCKET = "OTHER"
+# Ticket bands are decades of the amount; uncapped lenders stop at $1T
+MAX_BAND = 12
+
+PostingKey = Tuple[Optional[str], str, int]
+
+
+def keywords(text: str) -> List[str]:
+    return KEYWORD.findall(text.lower())
+
+
+def ticket_band(amount: float) -> int:
+    return min(int(math.floor(math.log10(max(amount, 1.0)))), MAX_BAND)
+
+
+def ticket_bands(amounts: np.ndarray) -> np.ndarray:
+    bands = np.floor(np.log10(np.maximum(amounts, 1.0)))
+    return np.minimum(bands, MAX_BAND).astype(np.intp)
+
+
+class LenderIndex:
+    """
+    Inverted index over a LenderMatrix
+
+    Postings are keyed by (preferred sector, risk appetite bucket, ticket
+    band), where a lender sits in every band its [minInvestment,
+    maxInvestment] range overlaps and lenders without sector preferences use
+    a None sector. Lenders with any sector preference are also posted once
+    per (bucket, band) in other_postings, which serves the "sector not
+    matched" tier without walking the vocabulary. Sector keywords map to
+    the vocabulary sectors containing them, so the loan purpose is matched
+    without scanning the vocabulary either. Postings are built with one
+    sort over the lender matrix; a lookup only reads the postings named by
+    the loan.
+    """
+
+    def __init__(
+        self,
+        lenders: LenderMatrix,
+        max_candidates: int = DEFAULT_MAX_CANDIDATES,
+        min_candidates: int = DEFAULT_MIN_CANDIDATES,
+    ):
+        self.lenders = lenders
+        self.max_candidates = max_candidates
+        self.min_candidates = min_candidates
+
+        n = len(lenders)
+        bucket_names = [*RISK_APPETITE_LEVELS, OTHER_BUCKET]
+        buckets = np.full(n, len(bucket_names) - 1, dtype=np.intp)
+        for code, level in enumerate(RISK_APPETITE_LEVELS.values()):
+            buckets[lenders.risk_level == level] = code
+        low = ticket_bands(lenders.min_investment)
+        high = ticket_bands(np.minimum(lenders.max_investment, 10.0**MAX_BAND))
+
+        # (lender, sector) pairs; lenders without preferences get sector None
+        sector_names = [*lenders.sector_vocab, None]
+        sector_bits = np.unpackbits(
+            lenders.sector_mask, axis=1, count=len(lenders.sector_vocab)
+        )
+        pair_lenders, pair_sectors = np.nonzero(sector_bits)
+        no_sectors = np.flatnonzero(~lenders.has_sectors)
+        pair_lenders = np.concatenate([pair_lenders, no_sectors])
+        pair_sectors = np.concatenate(
+            [pair_sectors, np.full(len(no_sectors), len(sector_names) - 1)]
+        )
+
+        # One row per (lender, sector, band) the lender's ticket range overlaps
+        widths = np.maximum(high - low + 1, 0)[pair_lenders]
+        row_lenders = np.repeat(pair_lenders, widths)
+        offsets = np.arange(widths.sum()) - np.repeat(
+            np.cumsum(widths) - widths, widths
+        )
+        row_bands = low[row_lenders] + offsets
+        keys = (
+            np.repeat(pair_sectors, widths) * len(bucket_names) + buckets[row_lenders]
+        ) * (MAX_BAND + 1) + row_bands
+
+        order = np.argsort(keys, kind="stable")
+        unique_keys, starts = np.unique(keys[order], return_index=True)
+        self.postings: Dict[PostingKey, np.ndarray] = {}
+        for key, rows in zip(unique_keys, np.split(row_lenders[order], starts[1:])):
+            sector, band = divmod(int(key), MAX_BAND + 1)
+            sector, bucket = divmod(sector, len(bucket_names))
+            self.postings[(sector_names[sector], bucket_names[bucket], band)] = rows
+        self.buckets = {bucket_names[code] for code in np.unique(buckets)}
+
+        # Lenders with sector preferences by (bucket, band), each listed once
+        # however many sectors it prefers
+        has_sector = np.repeat(pair_sectors, widths) < len(sector_names) - 1
+        other_keys = (
+            buckets[row_lenders[has_sector]] * (MAX_BAND + 1) + row_bands[has_sector]
+        )
+        pairs = np.unique(other_keys * max(n, 1) + row_lenders[has_sector])
+        other_keys, other_lenders = np.divmod(pairs, max(n, 1))
+        unique_keys, starts = np.unique(other_keys, return_index=True)
+        self.other_postings: Dict[Tuple[str, int], np.ndarray] = {}
+        for key, rows in zip(unique_keys, np.split(other_lenders, starts[1:])):
+            bucket, band = divmod(int(key), MAX_BAND + 1)
+            self.other_postings[(bucket_names[bucket], band)] = rows
+
+        self.keyword_postings: Dict[str, List[str]] = {}
+        for sector in lenders.sector_vocab:
+            for keyword in set(keywords(sector)):
+                self.keyword_postings.setdefault(keyword, []).append(sector)
+
+        self._by_min_ticket = np.argsort(lenders.min_investment, kind="stable")
+        self._min_tickets = lenders.min_investment[self._by_min_ticket]
+
+    def __len__(self) -> int:
+        return len(self.lenders)
+
+    def matched_sectors(self, purpose: str) -> List[str]:
+        """Indexed sectors named in the loan purpose"""
+        text = purpose.lower()
+        sectors = {
+            sector
+            for keyword in set(keywords(text))
+            for sector in self.keyword_postings.get(keyword, ())
+        }
+        return sorted(sector for sector in sectors if sector in text)
+
+    def ticket_eligible(
+        self, amount: float, capacity: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """Lenders whose minimum ticket fits inside the loan and their capacity"""
+        end = np.searchsorted(self._min_tickets, amount, side="right")
+        eligible = np.sort(self._by_min_ticket[:end])
+        if capacity is not None:
+            eligible = eligible[self._has_room(eligible, capacity)]
+        return eligible
+
+    def _has_room(self, positions: np.ndarray, capacity: np.ndarray) -> np.ndarray:
+        # A lender whose remaining capacity is below its minimum ticket can
+        # no longer take any ticket
+        room = capacity[positions]
+        return (room > 0) & (room >= self.lenders.min_investment[positions])
+
+    def risk_buckets(self, loan_risk: float) -> List[str]:
+        """Risk appetite buckets ordered from closest to furthest from the loan"""
+        levels = {**RISK_APPETITE_LEVELS, OTHER_BUCKET: DEFAULT_RISK_LEVEL}
+        return sorted(self.buckets, key=lambda b: (abs(levels[b] - loan_risk), b))
+
+    def _tiers(self, loan: Dict[str, Any]) -> Iterator[Optional[np.ndarray]]:
+        """Postings from the best to the weakest expected match"""
+        amount = float(loan.get("amount") or 0.0)
+        sectors = self.matched_sectors(loan.get("purpose") or "")
+        buckets = self.risk_buckets(loan.get("riskScore") or DEFAULT_LOAN_RISK)
+        # The loan's own band holds lenders that can take the whole loan;
+        # lower bands can only take a partial ticket
+        for band in range(ticket_band(amount), -1, -1):
+            for sector in [*sectors, None]:
+                for bucket in buckets:
+                    yield self.postings.get((sector, bucket, band))
+            # Unmatched sectors: matched-sector lenders were read above
+            for bucket in buckets:
+                yield self.other_postings.get((bucket, band))
+
+    def candidates(
+        self, loan: Dict[str, Any], capacity: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """
+        Short list of lender positions worth scoring for a loan
+
+        Lenders that cannot take a ticket are always dropped, which never
+        changes the allocation. Past max_candidates, postings are read in
+        tier order (ticket band, then sector match, then risk proximity)
+        until min_candidates distinct lenders are found whose room covers
+        the loan. If the postings run out first, every eligible lender is
+        returned.
+
+        Args:
+            loan: Loan details
+            capacity: Optional remaining capacity per lender (see
+                AllocatorAgent.optimize); exhausted lenders are skipped
+
+        Returns:
+            Sorted array of positions into the LenderMatrix
+        """
+        amount = float(loan.get("amount") or 0.0)
+        if len(self) <= self.max_candidates:
+            return self.ticket_eligible(amount, capacity)
+
+        room = self.lenders.max_investment
+        if capacity is not None:
+            room = np.minimum(room, capacity)
+        seen = np.zeros(len(self), dtype=bool)
+        found = []
+        count, covered = 0, 0.0
+        for posting in self._tiers(loan):
+            if posting is None:
+                continue
+            # Lenders with several matched sectors or bands appear in
+            # more than one posting
+            posting = posting[~seen[posting]]
+            posting = posting[self.lenders.min_investment[posting] <= amount]
+            if capacity is not None:
+                posting = posting[self._has_room(posting, capacity)]
+            if not len(posting):
+                continue
+            seen[posting] = True
+            found.append(posting)
+            count += len(posting)
+            covered += float(np.minimum(room[posting], amount).sum())
+            if count >= self.min_candidates and covered >= amount:
+                return np.sort(np.concatenate(found))
+        return self.ticket_eligible(amount, capacity)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "lenders": len(self),
+            "postings": len(self.postings) + len(self.other_postings),
+            "keywords": len(self.keyword_postings),
+        }
@@ -0,0 +1,359 @@
+"""
+ESG scoring for AutoSyndicate™
+Carbon intensity against sector baselines plus disclosure credits, scored
+as one vectorized pass per batch and memoized per borrower
+"""
+
+from typing import List, Dict, Any, Optional, Tuple
+from collections import OrderedDict
+import os
+import threading
+import numpy as np
+
+from engine.hashing import canonical_json, content_hash
+
+DEFAULT_CACHE_SIZE = 10_000
+# Bump when the methodology changes so cached scores are not reused
+SCORER_VERSION = "1"
+
+PILLARS = ("environmental", "social", "governance")
+PILLAR_WEIGHTS = np.array([0.4, 0.3, 0.3])
+# Weight of a third-party ESG score reported for the borrower
+REPORTED_WEIGHT = 0.3
+
+# At the sector median, and points lost per doubling of carbon intensity
+ENVIRONMENTAL_AT_BASELINE = 60.0
+ENVIRONMENTAL_PER_DOUBLING = 20.0
+ENVIRONMENTAL_CARBON_CAP = 90.0
+ENVIRONMENTAL_UNDISCLOSED = 45.0
+GOVERNANCE_BASE = 55.0
+GREEN_LOAN_CREDIT = 10.0
+# Carbon intensity this many times the sector median is flagged as a risk
+HIGH_CARBON_RATIO = 1.5
+# Sectors whose median intensity makes a transition plan material
+CARBON_INTENSIVE = 300.0
+MAX_RECOMMENDATIONS = 3
+
+# sector: (median carbon intensity in tCO2e per $M revenue, social baseline, SDGs)
+SECTOR_BASELINES: Dict[str, Tuple[float, float, Tuple[str, ...]]] = {
+    "Renewable Energy": (25.0, 62.0, ("SDG 7", "SDG 13")),
+    "Energy": (550.0, 50.0, ("SDG 7",)),
+    "Utilities": (900.0, 55.0, ("SDG 6", "SDG 7")),
+    "Materials": (700.0, 48.0, ("SDG 9", "SDG 12")),
+    "Manufacturing": (250.0, 52.0, ("SDG 9",)),
+    "Transportation": (400.0, 52.0, ("SDG 9", "SDG 11")),
+    "Agriculture": (350.0, 55.0, ("SDG 2", "SDG 15")),
+    "Real Estate": (60.0, 55.0, ("SDG 11",)),
+    "Infrastructure": (150.0, 58.0, ("SDG 9", "SDG 11")),
+    "Healthcare": (30.0, 65.0, ("SDG 3",)),
+    "Technology": (15.0, 58.0, ("SDG 9",)),
+    "Consumer": (50.0, 52.0, ("SDG 12",)),
+    "Financials": (10.0, 55.0, ("SDG 8",)),
+    "Other": (150.0, 55.0, ()),
+}
+
+# Checked in order, so specific sectors come before broad ones
+SECTOR_KEYWORDS: List[Tuple[str, Tuple[str, ...]]] = [
+    ("Renewable Energy", ("renewable", "solar", "wind", "hydro", "geothermal")),
+    ("Utilities", ("utility", "utilities", "water", "grid")),
+    ("Energy", ("energy", "oil", "gas", "power", "petroleum", "coal")),
+    ("Materials", ("mining", "steel", "cement", "chemical", "materials")),
+    ("Transportation", ("transport", "logistics", "shipping", "aviation", "fleet")),
+    ("Agriculture", ("agri", "farm", "food", "forestry")),
+    ("Real Estate", ("real estate", "property", "housing", "commercial building")),
+    ("Infrastructure", ("infrastructure", "construction", "bridge", "road", "rail")),
+    ("Healthcare", ("health", "hospital", "pharma", "medical", "biotech")),
+    ("Technology", ("technology", "software", "data center", "telecom", "tech")),
+    ("Manufacturing", ("manufactur", "industrial", "factory", "plant")),
+    ("Consumer", ("retail", "consumer", "hospitality", "restaurant")),
+    ("Financials", ("bank", "insurance", "financial", "fintech")),
+]
+
+# esgMetrics flag: (pillar, points when disclosed, recommendation when not)
+DISCLOSURES: Dict[str, Tuple[int, float, str]] = {
+    "transitionPlan": (0, 8.0, "Publish a formal climate transition plan"),
+    "scienceBasedTarget": (0, 7.0, "Set science-based emissions reduction targets"),
+    "scope3Reported": (0, 5.0, "Extend emissions reporting to Scope 3"),
+    "humanRightsPolicy": (1, 8.0, "Adopt a human rights and labour policy"),
+    "healthSafetyReporting": (1, 6.0, "Report health and safety incident rates"),
+    "supplierDiversity": (1, 6.0, "Implement supplier diversity program"),
+    "boardIndependence": (2, 10.0, "Strengthen board independence"),
+    "sustainabilityReport": (2, 8.0, "Publish an annual sustainability report"),
+    "tcfdReporting": (2, 8.0, "Align climate disclosures with TCFD"),
+    "antiCorruptionPolicy": (2, 6.0, "Adopt an anti-bribery and corruption policy"),
+}
+DISCLOSURE_FLAGS = list(DISCLOSURES)
+
+
+def _disclosure_points() -> np.ndarray:
+    """(disclosures, pillars) points matrix"""
+    points = np.zeros((len(DISCLOSURES), len(PILLARS)))
+    for row, (pillar, value, _) in enumerate(DISCLOSURES.values()):
+        points[row, pillar] = value
+    return points
+
+
+DISCLOSURE_POINTS = _disclosure_points()
+
+
+def infer_sector(*texts: Optional[str]) -> str:
+    """First baseline sector whose keywords appear in the texts"""
+    text = " ".join(t for t in texts if t).lower()
+    for sector, words in SECTOR_KEYWORDS:
+        if any(word in text for word in words):
+            return sector
+    return "Other"
+
+
+def _number(value: Any) -> Optional[float]:
+    try:
+        return None if value is None else float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def esg_inputs(loan: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Scorer inputs from a LoanRequest dict or ParserAgent output
+
+    ESG metrics and the borrower are read from the record itself or from
+    its structuredData (parsed document fields).
+    """
+    structured = loan.get("structuredData") or {}
+    metrics = loan.get("esgMetrics") or structured.get("esgMetrics") or {}
+    sector = loan.get("sector") or structured.get("sector")
+    if sector not in SECTOR_BASELINES:
+        sector = infer_sector(
+            sector, loan.get("purpose") or structured.get("purpose"), loan.get("title")
+        )
+    reported = _number(loan.get("esgScore"))
+    if reported is None:
+        reported = _number(metrics.get("esgScore"))
+    return {
+        "borrower": loan.get("borrower")
+        or structured.get("borrower")
+        or loan.get("id")
+        or "",
+        "sector": sector,
+        "carbonIntensity": _number(metrics.get("carbonIntensity")),
+        "greenLoanEligible": bool(metrics.get("greenLoanEligible")),
+        "reportedScore": reported,
+        # None = not stated, so missing data is distinguishable from "no"
+        "disclosures": {
+            flag: (None if metrics.get(flag) is None else bool(metrics.get(flag)))
+            for flag in DISCLOSURE_FLAGS
+        },
+    }
+
+
+def fingerprint(inputs: Dict[str, Any]) -> str:
+    return content_hash(SCORER_VERSION, canonical_json(inputs))
+
+
+class ESGScorer:
+    """
+    Batch ESG scorer with a per-borrower memo
+
+    Scores are 0-100 per pillar. The environmental pillar starts from
+    carbon intensity relative to the sector median (60 at the median, -20
+    per doubling), social from the sector baseline and governance from a
+    flat base; each disclosure the borrower makes adds its points to one
+    pillar. A third-party score, when reported, is blended into the total.
+
+    The memo keeps the latest result per borrower with the fingerprint of
+    its inputs, so rescoring a marketplace only computes borrowers whose
+    data changed. Misses are scored together as one set of array
+    operations.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._memo: "OrderedDict[str, Tuple[str, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_env(cls) -> "ESGScorer":
+        return cls(int(os.getenv("ESG_CACHE_SIZE", DEFAULT_CACHE_SIZE)))
+
+    def score(self, loans: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Score loans, reusing memoized borrower results whose inputs match
+
+        Args:
+            loans: LoanRequest dicts or ParserAgent outputs
+
+        Returns:
+            One analysis per loan, in order, with the loan's id
+        """
+        inputs = [esg_inputs(loan) for loan in loans]
+        keys = [fingerprint(i) for i in inputs]
+        results: List[Optional[Dict[str, Any]]] = [None] * len(loans)
+        missing: Dict[str, List[int]] = {}
+        with self._lock:
+            for idx, (record, key) in enumerate(zip(inputs, keys)):
+                entry = self._memo.get(record["borrower"])
+                if entry is not None and entry[0] == key:
+                    self._memo.move_to_end(record["borrower"])
+                    results[idx] = entry[1]
+                    self.hits += 1
+                else:
+                    # Loans in the batch with identical inputs are scored once
+                    missing.setdefault(key, []).append(idx)
+                    self.misses += 1
+
+        if missing:
+            first = [indices[0] for indices in missing.values()]
+            scored = self._score([inputs[idx] for idx in first])
+            with self._lock:
+                for indices, result in zip(missing.values(), scored):
+                    for idx in indices:
+                        results[idx] = result
+                    self._remember(
+                        inputs[indices[0]]["borrower"], keys[indices[0]], result
+                    )
+
+        return [
+            {"loanId": loan.get("id"), **result} for loan, result in zip(loans, results)
+        ]
+
+    def _remember(self, borrower: str, key: str, result: Dict[str, Any]):
+        self._memo[borrower] = (key, result)
+        self._memo.move_to_end(borrower)
+        while len(self._memo) > self.max_entries:
+            self._memo.popitem(last=False)
+
+    def _score(self, inputs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        n = len(inputs)
+        baselines = [SECTOR_BASELINES[i["sector"]] for i in inputs]
+        median = np.array([b[0] for b in baselines])
+        social_base = np.array([b[1] for b in baselines])
+        carbon = np.array(
+            [
+                np.nan if i["carbonIntensity"] is None else i["carbonIntensity"]
+                for i in inputs
+            ]
+        )
+        stated = np.array(
+            [
+                [i["disclosures"][f] is not None for f in DISCLOSURE_FLAGS]
+                for i in inputs
+            ]
+        ).reshape(n, len(DISCLOSURE_FLAGS))
+        disclosed = np.array(
+            [[bool(i["disclosures"][f]) for f in DISCLOSURE_FLAGS] for i in inputs]
+        ).reshape(n, len(DISCLOSURE_FLAGS))
+        green = np.array([i["greenLoanEligible"] for i in inputs], dtype=bool)
+        reported = np.array(
+            [
+                np.nan if i["reportedScore"] is None else i["reportedScore"]
+                for i in inputs
+            ]
+        )
+
+        has_carbon = ~np.isnan(carbon)
+        ratio = np.where(has_carbon, np.maximum(carbon, 0.1), median) / median
+        environmental = np.where(
+            has_carbon,
+            np.minimum(
+                ENVIRONMENTAL_AT_BASELINE - ENVIRONMENTAL_PER_DOUBLING * np.log2(ratio),
+                ENVIRONMENTAL_CARBON_CAP,
+            ),
+            ENVIRONMENTAL_UNDISCLOSED,
+        )
+        pillars = np.column_stack(
+            [
+                environmental + GREEN_LOAN_CREDIT * green,
+                social_base,
+                np.full(n, GOVERNANCE_BASE),
+            ]
+        )
+        pillars = np.clip(pillars + disclosed @ DISCLOSURE_POINTS, 0.0, 100.0)
+        overall = pillars @ PILLAR_WEIGHTS
+        has_reported = ~np.isnan(reported)
+        overall = np.where(
+            has_reported,
+            (1 - REPORTED_WEIGHT) * overall
+            + REPORTED_WEIGHT * np.clip(np.nan_to_num(reported), 0.0, 100.0),
+            overall,
+        )
+        # Confidence grows with how much of the input was actually stated
+        confidence = 0.5 + 0.3 * has_carbon + 0.2 * stated.mean(axis=1)
+
+        return [
+            self._result(
+                inputs[k], baselines[k], pillars[k], overall[k], ratio[k], confidence[k]
+            )
+            for k in range(n)
+        ]
+
+    @staticmethod
+    def _result(
+        record: Dict[str, Any],
+        baseline: Tuple[float, float, Tuple[str, ...]],
+        pillars: np.ndarray,
+        overall: float,
+        ratio: float,
+        confidence: float,
+    ) -> Dict[str, Any]:
+        disclosures = record["disclosures"]
+        carbon = record["carbonIntensity"]
+        environmental = float(pillars[0])
+
+        missing = sorted(
+            (flag for flag in DISCLOSURE_FLAGS if not disclosures[flag]),
+            key=lambda flag: -DISCLOSURES[flag][1],
+        )
+        recommendations = [DISCLOSURES[flag][2] for flag in missing]
+        risks = []
+        if carbon is None:
+            recommendations.insert(0, "Disclose carbon intensity")
+            risks.append("Limited environmental data disclosure")
+        elif ratio >= HIGH_CARBON_RATIO:
+            risks.append(
+                f"Carbon intensity {carbon:.0f} tCO2e/$M is {ratio:.1f}x the "
+                f"{record['sector']} median"
+            )
+        if baseline[0] >= CARBON_INTENSIVE and not disclosures["transitionPlan"]:
+            risks.append(
+                "No formal climate transition plan in a carbon-intensive sector"
+            )
+        if not disclosures["boardIndependence"]:
+            risks.append("Board independence not evidenced")
+
+        if record["greenLoanEligible"] or environmental >= 75:
+            green_bond = "Aligned"
+        elif environmental >= 55:
+            green_bond = "Partial"
+        else:
+            green_bond = "Not aligned"
+
+        return {
+            "borrower": record["borrower"],
+            "sector": record["sector"],
+            "esgScore": round(float(overall), 1),
+            "breakdown": {
+                pillar: round(float(value), 1)
+                for pillar, value in zip(PILLARS, pillars)
+            },
+            "carbonIntensity": carbon,
+            "sectorMedianCarbonIntensity": baseline[0],
+            "alignment": {
+                "unepFi": "Compliant" if overall >= 60 else "Review required",
+                "greenBondPrinciples": green_bond,
+                "sdgAlignment": list(baseline[2]) if environmental >= 55 else [],
+            },
+            "recommendations": recommendations[:MAX_RECOMMENDATIONS],
+            "risks": risks,
+            "confidence": round(float(confidence), 2),
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._memo),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRate": self.hits / lookups if lookups else 0.0,
+        }
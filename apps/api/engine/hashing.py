@@ -0,0 +1,22 @@
+"""
+Content hashing for AutoSyndicate™ caches
+One canonical JSON form and one digest for every content-addressed key
+"""
+
+from typing import Any
+import json
+import hashlib
+
+
+def canonical_json(value: Any) -> str:
+    """Compact JSON with sorted keys, so equal content serializes identically"""
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), default=str)
+
+
+def content_hash(*parts: str) -> str:
+    """SHA-256 hex digest of the parts, NUL-separated so boundaries count"""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
@@ -0,0 +1,143 @@
+"""
+Constraint-aware syndicate optimizer for AutoSyndicate™
+Fills a loan amount from scored lenders while respecting ticket bounds,
+lender count limits and concentration caps
+"""
+
+from typing import Dict, Any, Optional
+from dataclasses import dataclass
+import numpy as np
+
+DEFAULT_MAX_LENDERS = 5
+
+
+@dataclass
+class AllocationConstraints:
+    """Syndicate constraints parsed from an allocation request"""
+
+    max_lenders: int = DEFAULT_MAX_LENDERS
+    max_concentration: Optional[float] = None  # Max share of the loan per lender
+    min_match_score: float = 0.0
+
+    @classmethod
+    def from_dict(
+        cls, constraints: Optional[Dict[str, Any]]
+    ) -> "AllocationConstraints":
+        constraints = constraints or {}
+        max_concentration = constraints.get("maxConcentration")
+        if max_concentration is not None:
+            max_concentration = float(max_concentration)
+            # Accept both fractions (0.25) and percentages (25)
+            if max_concentration > 1:
+                max_concentration /= 100
+        return cls(
+            max_lenders=max(int(constraints.get("maxLenders", DEFAULT_MAX_LENDERS)), 1),
+            max_concentration=max_concentration,
+            min_match_score=float(constraints.get("minMatchScore", 0.0)),
+        )
+
+
+@dataclass
+class AllocationPlan:
+    """Solver output: selected lender indices and their ticket sizes"""
+
+    indices: np.ndarray
+    amounts: np.ndarray
+    target: float
+
+    @property
+    def allocated(self) -> float:
+        return float(self.amounts.sum())
+
+    @property
+    def shortfall(self) -> float:
+        return max(self.target - self.allocated, 0.0)
+
+    @property
+    def coverage(self) -> float:
+        return self.allocated / self.target if self.target > 0 else 0.0
+
+
+def solve_allocation(
+    amount: float,
+    scores: np.ndarray,
+    min_ticket: np.ndarray,
+    max_ticket: np.ndarray,
+    constraints: AllocationConstraints,
+    priority: Optional[np.ndarray] = None,
+) -> AllocationPlan:
+    """
+    Select lenders and size their tickets to fill the loan amount
+
+    Greedy selection takes lenders in match score order until their combined
+    capacity covers the loan. If the lender count limit binds first, an
+    exchange pass swaps low-capacity picks for high-capacity alternates. The
+    selected set is then sized by solving the LP relaxation exactly: every
+    lender starts at its minimum ticket and the remainder is filled in score
+    order up to each upper bound.
+
+    Args:
+        amount: Loan amount to fill
+        scores: Match score per lender
+        min_ticket: Minimum investment per lender
+        max_ticket: Maximum investment per lender (np.inf if uncapped)
+        constraints: Syndicate constraints
+        priority: Optional selection order (default: scores). Eligibility
+            under minMatchScore is always judged on scores.
+
+    Returns:
+        AllocationPlan with lender indices ordered by priority
+    """
+    empty = AllocationPlan(np.empty(0, dtype=np.intp), np.empty(0), amount)
+    if amount <= 0 or len(scores) == 0:
+        return empty
+
+    upper = np.minimum(max_ticket, amount)
+    if constraints.max_concentration is not None:
+        upper = np.minimum(upper, constraints.max_concentration * amount)
+    lower = min_ticket
+
+    eligible = (scores >= constraints.min_match_score) & (upper >= lower) & (upper > 0)
+    candidates = np.flatnonzero(eligible)
+    if len(candidates) == 0:
+        return empty
+    rank = scores if priority is None else priority
+    order = candidates[np.argsort(-rank[candidates], kind="stable")]
+
+    # Greedy: shortest score-ordered prefix whose capacity covers the loan
+    cumulative = np.cumsum(upper[order])
+    k = min(
+        constraints.max_lenders,
+        int(np.searchsorted(cumulative, amount)) + 1,
+        len(order),
+    )
+    selected = order[:k]
+    rest = order[k:]
+
+    # Refinement: knapsack-style exchange when the lender limit leaves a gap
+    need = amount - upper[selected].sum()
+    if need > 0 and len(rest):
+        rest_by_capacity = rest[np.lexsort((-rank[rest], -upper[rest]))]
+        selected_by_capacity = selected[np.argsort(upper[selected], kind="stable")]
+        m = min(len(selected), len(rest))
+        gains = upper[rest_by_capacity[:m]] - upper[selected_by_capacity[:m]]
+        gains = gains[gains > 0]  # Non-increasing, so this is a prefix
+        if len(gains):
+            swaps = min(int(np.searchsorted(np.cumsum(gains), need)) + 1, len(gains))
+            keep = np.setdiff1d(selected, selected_by_capacity[:swaps])
+            selected = np.concatenate([keep, rest_by_capacity[:swaps]])
+            selected = selected[np.argsort(-rank[selected], kind="stable")]
+
+    # Minimum tickets must fit inside the loan; drop the weakest picks first
+    while len(selected) and lower[selected].sum() > amount:
+        selected = selected[:-1]
+
+    # LP fill: minimum tickets first, then top up in score order
+    tickets = lower[selected].astype(np.float64)
+    headroom = upper[selected] - tickets
+    remaining = amount - tickets.sum()
+    filled_before = np.cumsum(headroom) - headroom
+    tickets += np.clip(remaining - filled_before, 0, headroom)
+
+    funded = tickets > 0
+    return AllocationPlan(selected[funded], tickets[funded], amount)
@@ -0,0 +1,144 @@
+"""
+Vectorized lender match scoring for AutoSyndicate™
+Packs lender profiles into columnar NumPy arrays and scores a loan against
+the whole lender universe in a single pass
+"""
+
+from typing import List, Dict, Any, Optional
+import numpy as np
+
+# Scoring weights (must sum to 1.0)
+AMOUNT_WEIGHT = 0.3
+RISK_WEIGHT = 0.3
+ESG_WEIGHT = 0.2
+SECTOR_WEIGHT = 0.2
+
+RISK_APPETITE_LEVELS = {"LOW": 0.3, "MODERATE": 0.6, "HIGH": 0.9}
+DEFAULT_RISK_LEVEL = 0.5
+DEFAULT_LOAN_RISK = 0.5
+
+
+class LenderMatrix:
+    """
+    Columnar view over a list of lender profiles
+
+    Each attribute is stored as one NumPy array indexed by lender position so
+    scoring a loan touches contiguous memory instead of per-lender dicts.
+    Preferred sectors are encoded as a packed bitmask over a shared
+    vocabulary, which turns sector matching into a bitwise AND.
+    """
+
+    def __init__(self, lender_profiles: List[Dict[str, Any]]):
+        n = len(lender_profiles)
+        self.profiles = lender_profiles
+        self.ids = [
+            lender.get("id", f"lender_{idx}")
+            for idx, lender in enumerate(lender_profiles)
+        ]
+        self.names = [
+            lender.get("institutionName") or lender.get("name") or f"Lender {idx + 1}"
+            for idx, lender in enumerate(lender_profiles)
+        ]
+
+        self.min_investment = np.empty(n, dtype=np.float64)
+        self.max_investment = np.empty(n, dtype=np.float64)
+        self.risk_level = np.empty(n, dtype=np.float64)
+        self.esg_flag = np.zeros(n, dtype=bool)
+        self.has_sectors = np.zeros(n, dtype=bool)
+
+        self.sector_vocab: Dict[str, int] = {}
+        sector_rows: List[List[int]] = []
+
+        for idx, lender in enumerate(lender_profiles):
+            min_investment = lender.get("minInvestment")
+            max_investment = lender.get("maxInvestment")
+            self.min_investment[idx] = (
+                100000 if min_investment is None else min_investment
+            )
+            self.max_investment[idx] = (
+                np.inf if max_investment is None else max_investment
+            )
+            self.risk_level[idx] = RISK_APPETITE_LEVELS.get(
+                lender.get("riskAppetite", "MODERATE"), DEFAULT_RISK_LEVEL
+            )
+            self.esg_flag[idx] = bool(lender.get("esgPreferences"))
+
+            row = []
+            for sector in lender.get("preferredSectors") or []:
+                key = sector.lower()
+                row.append(self.sector_vocab.setdefault(key, len(self.sector_vocab)))
+            self.has_sectors[idx] = bool(row)
+            sector_rows.append(row)
+
+        sector_bits = np.zeros((n, max(len(self.sector_vocab), 1)), dtype=bool)
+        for idx, row in enumerate(sector_rows):
+            sector_bits[idx, row] = True
+        self.sector_mask = np.packbits(sector_bits, axis=1)
+        self._sectors = list(self.sector_vocab)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def loan_sector_mask(self, purpose: Optional[str]) -> np.ndarray:
+        """Bitmask of vocabulary sectors mentioned in the loan purpose"""
+        bits = np.zeros(self.sector_mask.shape[1] * 8, dtype=bool)
+        if purpose:
+            text = purpose.lower()
+            for idx, sector in enumerate(self._sectors):
+                if sector in text:
+                    bits[idx] = True
+        return np.packbits(bits)
+
+    def score(
+        self, loan: Dict[str, Any], positions: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """
+        Score a loan against every lender
+
+        Args:
+            loan: Loan data (LoanRequest fields)
+            positions: Optional lender positions to score (default: all)
+
+        Returns:
+            Array of match scores in [0, 1], one per lender (or per position)
+        """
+        amount = loan.get("amount") or 0.0
+        loan_risk = loan.get("riskScore") or DEFAULT_LOAN_RISK
+        esg_score = loan.get("esgScore")
+        purpose = loan.get("purpose")
+        rows = slice(None) if positions is None else positions
+
+        # Amount compatibility
+        min_investment = self.min_investment[rows]
+        fits = (min_investment <= amount) & (amount <= self.max_investment[rows])
+        scores = AMOUNT_WEIGHT * fits
+
+        # Risk appetite matching
+        scores = scores + RISK_WEIGHT * (1 - np.abs(loan_risk - self.risk_level[rows]))
+
+        # ESG alignment, partial credit when either side has no ESG data
+        if esg_score:
+            scores = scores + np.where(
+                self.esg_flag[rows], ESG_WEIGHT * (esg_score / 100), ESG_WEIGHT / 2
+            )
+        else:
+            scores = scores + ESG_WEIGHT / 2
+
+        # Sector preference, partial credit when either side has no sector data
+        if purpose:
+            sector_mask = self.sector_mask[rows]
+            matched = (sector_mask & self.loan_sector_mask(purpose)).any(axis=1)
+            scores = scores + np.where(
+                self.has_sectors[rows], SECTOR_WEIGHT * matched, SECTOR_WEIGHT / 2
+            )
+        else:
+            scores = scores + SECTOR_WEIGHT / 2
+
+        return np.minimum(scores, 1.0)
+
+
+def score_lenders(
+    loan: Dict[str, Any], lender_profiles: List[Dict[str, Any]]
+) -> np.ndarray:
+    """Convenience wrapper to score a loan against raw lender profiles"""
+    return LenderMatrix(lender_profiles).score(loan)
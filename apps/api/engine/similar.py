@@ -0,0 +1,274 @@
+"""
+Similar-deal retrieval for AutoSyndicate™
+Nearest-neighbour index over historical loans and their final syndicates,
+used to warm-start allocations and to cite precedent deals
+"""
+
+from typing import List, Dict, Any, Optional, Tuple, Set
+from contextlib import closing
+import os
+import sqlite3
+import threading
+import numpy as np
+
+from documents.index import HashingEmbedder
+from models.risk import CREDIT_RATING_RANK, UNRATED_RANK
+
+DEFAULT_NEIGHBOURS = 5
+PURPOSE_DIMENSIONS = 16
+PURPOSE_WEIGHT = 1.5
+# Recently recorded deals searched linearly before they are merged into the tree
+REBUILD_THRESHOLD = 256
+# Allocation statuses that never became part of a final syndicate
+NON_FINAL_STATUSES = ("PROPOSED", "REJECTED", "DECLINED", "WITHDRAWN", "CANCELLED")
+
+# Numeric deal features and the spread that counts as one unit of distance
+DEAL_FEATURES = [
+    ("logAmount", 1.0),  # one order of magnitude
+    ("termYears", 5.0),
+    ("interestRate", 2.0),
+    ("creditRatingRank", 4.0),  # roughly one rating letter
+    ("esgScore", 25.0),
+]
+
+
+def deal_features(
+    loans: List[Dict[str, Any]], embedder: Optional[HashingEmbedder] = None
+) -> np.ndarray:
+    """
+    Scaled (n_loans, n_features) matrix for neighbour search
+
+    Size band, tenor, pricing, rating and ESG are scaled so one unit is a
+    meaningful difference; the purpose text adds a small hashed sector
+    signature.
+    """
+    embedder = embedder or HashingEmbedder(PURPOSE_DIMENSIONS)
+    numeric = np.empty((len(loans), len(DEAL_FEATURES)), dtype=np.float64)
+    for idx, loan in enumerate(loans):
+        rating = (loan.get("creditRating") or "").strip().upper()
+        esg_score = loan.get("esgScore")
+        numeric[idx] = (
+            np.log10(max(float(loan.get("amount") or 0.0), 1.0)),
+            float(loan.get("term") or 0.0) / 12.0,
+            float(loan.get("interestRate") or 0.0),
+            CREDIT_RATING_RANK.get(rating, UNRATED_RANK),
+            50.0 if esg_score is None else float(esg_score),
+        )
+    numeric /= np.array([scale for _, scale in DEAL_FEATURES])
+    purpose = embedder.embed([loan.get("purpose") or "" for loan in loans])
+    return np.hstack([numeric, PURPOSE_WEIGHT * purpose])
+
+
+class SimilarDealIndex:
+    """
+    k-nearest-neighbour index over historical syndicated deals
+
+    Each deal is a loan dict plus its final allocations, keyed by loan id:
+    recording a deal again replaces the earlier entry. Deals recorded or
+    replaced since the last build sit in a small buffer that is scanned
+    linearly next to the ball tree (replaced tree entries are skipped); the
+    tree is only rebuilt once REBUILD_THRESHOLD such deals have
+    accumulated. Recording an outcome is O(1) and a query costs O(log n)
+    plus at most REBUILD_THRESHOLD distance computations, instead of a full
+    rebuild after every new deal.
+    """
+
+    def __init__(self, deals: Optional[List[Dict[str, Any]]] = None):
+        self.embedder = HashingEmbedder(PURPOSE_DIMENSIONS)
+        self.deals: List[Dict[str, Any]] = []
+        self._features: List[np.ndarray] = []
+        self._tree = None
+        # Deals [0, _indexed) are in the tree, the rest in the recent buffer
+        self._indexed = 0
+        # Loan id -> position in deals; tree positions replaced since the build
+        self._positions: Dict[str, int] = {}
+        self._stale: Set[int] = set()
+        self._lock = threading.Lock()
+        if deals:
+            self.add_deals(deals)
+
+    @classmethod
+    def from_env(cls) -> "SimilarDealIndex":
+        source = SqliteDealSource.from_env()
+        if source and os.path.exists(source.db_path):
+            try:
+                return cls(source.fetch_deals())
+            except sqlite3.Error as e:
+                print(f"Error loading deal history: {e}")
+        return cls()
+
+    def add_deals(self, deals: List[Dict[str, Any]]):
+        """Record completed deals ({"loan": {...}, "allocations": [...]})"""
+        deals = [d for d in deals if d.get("allocations")]
+        if not deals:
+            return
+        features = deal_features([d["loan"] for d in deals], self.embedder)
+        with self._lock:
+            for deal, feature in zip(deals, features):
+                loan_id = deal["loan"].get("id")
+                idx = self._positions.get(loan_id)
+                if idx is None:
+                    if loan_id is not None:
+                        self._positions[loan_id] = len(self.deals)
+                    self.deals.append(deal)
+                    self._features.append(feature)
+                    continue
+                self.deals[idx] = deal
+                self._features[idx] = feature
+                if idx < self._indexed:
+                    self._stale.add(idx)
+
+    def __len__(self) -> int:
+        return len(self.deals)
+
+    def _nearest(self, loan: Dict[str, Any], k: int) -> Tuple[np.ndarray, np.ndarray]:
+        from sklearn.neighbors import NearestNeighbors
+
+        with self._lock:
+            total = len(self.deals)
+            if total - self._indexed + len(self._stale) >= REBUILD_THRESHOLD:
+                self._tree = NearestNeighbors(algorithm="ball_tree").fit(
+                    np.vstack(self._features[:total])
+                )
+                self._indexed = total
+                self._stale = set()
+            tree, indexed = self._tree, self._indexed
+            # Replaced tree entries are scanned with their current features
+            linear = np.array(
+                [*sorted(self._stale), *range(indexed, total)], dtype=np.intp
+            )
+            recent = (
+                np.vstack([self._features[i] for i in linear]) if len(linear) else None
+            )
+            replaced = len(self._stale)
+
+        query = deal_features([loan], self.embedder)
+        distances, indices = [], []
+        if tree is not None:
+            tree_distances, tree_indices = tree.kneighbors(
+                query, n_neighbors=min(k + replaced, indexed)
+            )
+            current = ~np.isin(tree_indices[0], linear)
+            distances.append(tree_distances[0][current])
+            indices.append(tree_indices[0][current])
+        if recent is not None:
+            distances.append(np.linalg.norm(recent - query, axis=1))
+            indices.append(linear)
+        distances, indices = np.concatenate(distances), np.concatenate(indices)
+        order = np.argsort(distances, kind="stable")[:k]
+        return distances[order], indices[order]
+
+    def query(
+        self, loan: Dict[str, Any], k: int = DEFAULT_NEIGHBOURS
+    ) -> List[Dict[str, Any]]:
+        """Top-k most similar past deals with their syndicates, nearest first"""
+        if not self.deals:
+            return []
+        distances, indices = self._nearest(loan, k)
+        similar = []
+        for distance, idx in zip(distances, indices):
+            deal = self.deals[idx]
+            past = deal["loan"]
+            similar.append(
+                {
+                    "loanId": past.get("id"),
+                    "title": past.get("title"),
+                    "amount": past.get("amount"),
+                    "creditRating": past.get("creditRating"),
+                    "purpose": past.get("purpose"),
+                    "similarity": round(float(1.0 / (1.0 + distance)), 4),
+                    "syndicate": [
+                        {
+                            "lenderId": a.get("lenderId"),
+                            "lenderName": a.get("lenderName"),
+                            "percentage": a.get("percentage"),
+                        }
+                        for a in deal["allocations"]
+                    ],
+                }
+            )
+        return similar
+
+    @staticmethod
+    def candidate_syndicate(similar: List[Dict[str, Any]]) -> Dict[str, float]:
+        """
+        Lender id -> prior weight in [0, 1] from the neighbours' syndicates
+
+        Each past deal votes with its similarity times the lender's share of
+        that deal; weights are normalised so the strongest lender scores 1.
+        """
+        votes: Dict[str, float] = {}
+        for deal in similar:
+            for member in deal["syndicate"]:
+                share = float(member.get("percentage") or 0.0) / 100.0
+                lender_id = member.get("lenderId")
+                if lender_id:
+                    votes[lender_id] = (
+                        votes.get(lender_id, 0.0) + deal["similarity"] * share
+                    )
+        top = max(votes.values(), default=0.0)
+        return {lender_id: v / top for lender_id, v in votes.items()} if top else {}
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "deals": len(self.deals),
+            "built": self._tree is not None,
+            "recent": len(self.deals) - self._indexed + len(self._stale),
+        }
+
+
+class SqliteDealSource:
+    """Reads closed loans and their final allocations from the Prisma SQLite database"""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+
+    @classmethod
+    def from_env(cls) -> Optional["SqliteDealSource"]:
+        url = os.getenv("DATABASE_URL", "")
+        if not url.startswith("file:"):
+            return None
+        return cls(url[len("file:") :])
+
+    def fetch_deals(self) -> List[Dict[str, Any]]:
+        placeholders = ", ".join("?" for _ in NON_FINAL_STATUSES)
+        with closing(sqlite3.connect(self.db_path)) as db:
+            rows = db.execute(
+                "SELECT l.id, l.title, l.amount, l.term, l.interestRate, l.purpose, "
+                "l.creditRating, l.esgScore, a.lenderProfileId, p.institutionName, "
+                "a.amount, a.percentage "
+                "FROM allocations a "
+                "JOIN loan_requests l ON l.id = a.loanRequestId "
+                "LEFT JOIN lender_profiles p ON p.id = a.lenderProfileId "
+                f"WHERE a.status NOT IN ({placeholders}) "
+                "ORDER BY l.id",
+                NON_FINAL_STATUSES,
+            ).fetchall()
+
+        deals: Dict[str, Dict[str, Any]] = {}
+        for row in rows:
+            deal = deals.setdefault(
+                row[0],
+                {
+                    "loan": {
+                        "id": row[0],
+                        "title": row[1],
+                        "amount": row[2],
+                        "term": row[3],
+                        "interestRate": row[4],
+                        "purpose": row[5],
+                        "creditRating": row[6],
+                        "esgScore": row[7],
+                    },
+                    "allocations": [],
+                },
+            )
+            deal["allocations"].append(
+                {
+                    "lenderId": row[8],
+                    "lenderName": row[9],
+                    "amount": row[10],
+                    "percentage": row[11],
+                }
+            )
+        return list(deals.values())
@@ -0,0 +1,529 @@
+"""
+Portfolio stress testing for AutoSyndicate™
+Deterministic rate and sector leverage shocks plus factor-model Monte Carlo
+over every loan and covenant in the book, as NumPy matrix operations
+"""
+
+from typing import List, Dict, Any, Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+import os
+import time
+import asyncio
+import multiprocessing
+import numpy as np
+
+from monitoring.covenants import covenant_direction
+
+DEFAULT_LGD = 0.45  # Senior unsecured loss given default
+DEFAULT_RATE_BETA = 0.25  # Logit PD change per +1pp of rates without a model
+LEVERAGE_BETA = 2.5  # Logit PD change per +100% leverage
+RATE_VOLATILITY = 1.0  # One standard deviation of the scenario rate move, in pp
+LEVERAGE_VOLATILITY = 0.1  # One standard deviation of a sector leverage move
+MACRO_LOADING = 0.5  # Share of sector leverage moves driven by the macro factor
+# Rating rank 1 (AAA) maps to 0.01% and each notch multiplies PD by e^slope
+RATING_PD_FLOOR = 1e-4
+RATING_PD_SLOPE = 0.46
+MAX_PD = 0.99
+
+DEFAULT_SCENARIOS = 10_000
+MAX_SCENARIOS = 100_000
+CHUNK_SCENARIOS = 500
+# Scenario x loan cells above which chunks are spread over the process pool
+PARALLEL_CELLS = 5_000_000
+LOSS_PERCENTILES = (50, 95, 99, 99.9)
+HISTOGRAM_BINS = 20
+TOP_COVENANTS = 20
+
+# Coverage covenants whose denominator is interest and moves with rates
+RATE_SENSITIVE_KEYWORDS = ("interest", "debt service", "fixed charge", "dscr", "icr")
+
+
+def rating_pd(ranks: np.ndarray) -> np.ndarray:
+    """One-year default probability implied by rating rank (AAA 0.01%, CCC ~25%)"""
+    return np.minimum(RATING_PD_FLOOR * np.exp(RATING_PD_SLOPE * (ranks - 1)), MAX_PD)
+
+
+def _sigmoid(logits: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-logits))
+
+
+@dataclass
+class StressShock:
+    """Deterministic shock, also the centre of the Monte Carlo scenarios"""
+
+    rate_shock_bp: float = 0.0
+    sector_shocks: Dict[str, float] = field(default_factory=dict)  # +0.2 = +20%
+
+    @property
+    def rate_pp(self) -> float:
+        return self.rate_shock_bp / 100.0
+
+
+@dataclass
+class StressBook:
+    """
+    Columnar view of loans, lender shares and covenants
+
+    weights[i, l] is lender l's share of loan i's loss given default, so a
+    scenario-by-loan default matrix times weights gives per-lender losses.
+
+    Covenants are reduced to the pressure at which they breach. Pressure is
+    sector leverage growth, times (rate + shift) / rate for interest-based
+    floors: a ceiling at threshold t with value v breaches past t / v and a
+    floor past v / t (covenant ratios are positive).
+    """
+
+    loan_ids: List[str]
+    sectors: List[str]
+    lender_ids: List[str]
+    exposure: np.ndarray
+    lgd: np.ndarray
+    logit_pd: np.ndarray
+    loan_sector: np.ndarray
+    weights: np.ndarray
+    covenant_ids: List[str]
+    covenant_sector: np.ndarray
+    covenant_critical: np.ndarray
+    covenant_rate: np.ndarray  # Loan rate for interest-based floors, else 0
+    rate_beta: float = DEFAULT_RATE_BETA
+    leverage_beta: float = LEVERAGE_BETA
+
+    def __post_init__(self):
+        # Covenants that only move with sector leverage, sorted by critical
+        # level per sector, so breach counts are binary searches
+        static = self.covenant_rate <= 0
+        self._sector_covenants = []
+        for sector in range(len(self.sectors)):
+            members = np.flatnonzero(static & (self.covenant_sector == sector))
+            members = members[np.argsort(self.covenant_critical[members])]
+            self._sector_covenants.append((members, self.covenant_critical[members]))
+        self._rate_covenants = np.flatnonzero(~static)
+
+    def __len__(self) -> int:
+        return len(self.loan_ids)
+
+    @classmethod
+    def from_records(
+        cls,
+        loans: List[Dict[str, Any]],
+        pd: np.ndarray,
+        allocations: Optional[List[Dict[str, Any]]] = None,
+        covenants: Optional[List[Dict[str, Any]]] = None,
+        rate_beta: float = DEFAULT_RATE_BETA,
+    ) -> "StressBook":
+        """
+        Build a book from loan, allocation and covenant dicts
+
+        Args:
+            loans: Dicts with id, amount, interestRate, sector and optional lgd
+            pd: Base one-year default probability per loan
+            allocations: Dicts with loanId, lenderId and amount
+            covenants: Dicts with id, loanId, name, type, threshold and value
+            rate_beta: Logit PD change per +1pp of rates
+        """
+        allocations = allocations or []
+        covenants = covenants or []
+        loan_index = {loan["id"]: idx for idx, loan in enumerate(loans)}
+
+        sector_index: Dict[str, int] = {}
+        sectors: List[str] = []
+
+        def sector_of(name: Optional[str]) -> int:
+            key = (name or "Other").strip().lower()
+            if key not in sector_index:
+                sector_index[key] = len(sectors)
+                sectors.append((name or "Other").strip())
+            return sector_index[key]
+
+        loan_sector = np.array(
+            [sector_of(l.get("sector")) for l in loans], dtype=np.intp
+        )
+        exposure = np.array([float(l.get("amount") or 0.0) for l in loans])
+        lgd = np.array(
+            [DEFAULT_LGD if l.get("lgd") is None else float(l["lgd"]) for l in loans]
+        )
+        pd = np.clip(np.asarray(pd, dtype=np.float64), 1e-6, MAX_PD)
+
+        lender_index: Dict[str, int] = {}
+        entries: List[Tuple[int, int, float]] = []
+        for allocation in allocations:
+            idx = loan_index.get(allocation.get("loanId"))
+            if idx is None:
+                continue
+            lender = lender_index.setdefault(
+                allocation.get("lenderId"), len(lender_index)
+            )
+            entries.append((idx, lender, float(allocation.get("amount") or 0.0)))
+        weights = np.zeros((len(loans), len(lender_index)), dtype=np.float32)
+        if entries:
+            rows, cols, amounts = (np.array(v) for v in zip(*entries))
+            np.add.at(weights, (rows, cols), amounts)
+            # Lender shares of each loan, applied to the loan's loss given default
+            funded = weights.sum(axis=1, keepdims=True)
+            weights = np.divide(weights, funded, out=weights, where=funded > 0)
+            weights *= (exposure * lgd)[:, None].astype(np.float32)
+
+        critical, covenant_rates, covenant_sectors = [], [], []
+        for covenant in covenants:
+            name, kind = covenant.get("name") or "", covenant.get("type") or ""
+            direction = covenant_direction(name, kind)
+            value = max(float(covenant["value"]), 1e-12)
+            threshold = max(float(covenant["threshold"]), 1e-12)
+            critical.append(threshold / value if direction < 0 else value / threshold)
+            idx = loan_index.get(covenant.get("loanId"))
+            text = f"{name} {kind}".lower()
+            rate_hit = (
+                direction > 0
+                and idx is not None
+                and any(k in text for k in RATE_SENSITIVE_KEYWORDS)
+            )
+            covenant_rates.append(
+                float(loans[idx].get("interestRate") or 0.0) if rate_hit else 0.0
+            )
+            covenant_sectors.append(
+                sector_of(loans[idx].get("sector") if idx is not None else None)
+            )
+
+        return cls(
+            loan_ids=[l["id"] for l in loans],
+            sectors=sectors,
+            lender_ids=list(lender_index),
+            exposure=exposure,
+            lgd=lgd,
+            logit_pd=np.log(pd / (1 - pd)),
+            loan_sector=loan_sector,
+            weights=weights,
+            covenant_ids=[c.get("id") for c in covenants],
+            covenant_sector=np.array(covenant_sectors, dtype=np.intp),
+            covenant_critical=np.array(critical, dtype=np.float64),
+            covenant_rate=np.array(covenant_rates, dtype=np.float64),
+            rate_beta=rate_beta,
+        )
+
+    def sector_vector(self, shock: StressShock) -> np.ndarray:
+        """Deterministic leverage move per book sector"""
+        shocks = {k.strip().lower(): v for k, v in shock.sector_shocks.items()}
+        return np.array([shocks.get(s.lower(), 0.0) for s in self.sectors])
+
+    def default_probability(
+        self, rate_shift: np.ndarray, leverage_shift: np.ndarray
+    ) -> np.ndarray:
+        """
+        (scenarios, loans) default probabilities
+
+        Args:
+            rate_shift: Rate move per scenario, in pp
+            leverage_shift: (scenarios, sectors) relative leverage move
+        """
+        # Computed in the dtype of the shifts; Monte Carlo passes float32
+        logits = (
+            self.logit_pd.astype(rate_shift.dtype)[None, :]
+            + rate_shift.dtype.type(self.rate_beta) * rate_shift[:, None]
+            + leverage_shift.dtype.type(self.leverage_beta)
+            * leverage_shift[:, self.loan_sector]
+        )
+        return _sigmoid(logits)
+
+    def _pressure(self, rate_shift: np.ndarray, leverage_shift: np.ndarray):
+        """Sector leverage growth (scenarios, sectors) and rate pressure on
+        the interest-based covenants (scenarios, rate covenants)"""
+        growth = np.maximum(1.0 + leverage_shift, 0.1)
+        rates = self.covenant_rate[self._rate_covenants]
+        shifted = np.maximum(rates[None, :] + rate_shift[:, None], 0.01)
+        return growth, shifted / rates
+
+    def covenant_breaches(
+        self, rate_shift: np.ndarray, leverage_shift: np.ndarray
+    ) -> np.ndarray:
+        """(scenarios, covenants) breach flags under the shifted state"""
+        growth, rate_pressure = self._pressure(rate_shift, leverage_shift)
+        pressure = growth[:, self.covenant_sector]
+        pressure[:, self._rate_covenants] *= rate_pressure
+        return pressure > self.covenant_critical
+
+    def breach_counts(
+        self, rate_shift: np.ndarray, leverage_shift: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Breached covenants per scenario and breaching scenarios per covenant,
+        without materializing the (scenarios, covenants) matrix for the
+        covenants that only move with sector leverage
+        """
+        scenarios = len(rate_shift)
+        growth, rate_pressure = self._pressure(rate_shift, leverage_shift)
+        per_scenario = np.zeros(scenarios, dtype=np.int64)
+        per_covenant = np.zeros(len(self.covenant_ids), dtype=np.int64)
+        for sector, (members, critical) in enumerate(self._sector_covenants):
+            if not len(members):
+                continue
+            level = growth[:, sector]
+            per_scenario += np.searchsorted(critical, level, side="left")
+            per_covenant[members] = scenarios - np.searchsorted(
+                np.sort(level), critical, side="right"
+            )
+        if len(self._rate_covenants):
+            rate = self._rate_covenants
+            breached = (
+                growth[:, self.covenant_sector[rate]] * rate_pressure
+                > self.covenant_critical[rate]
+            )
+            per_scenario += breached.sum(axis=1)
+            per_covenant[rate] = breached.sum(axis=0)
+        return per_scenario, per_covenant
+
+
+def deterministic_stress(book: StressBook, shock: StressShock) -> Dict[str, Any]:
+    """Expected loss and covenant breaches before and after the shock"""
+    none = (np.zeros(1), np.zeros((1, len(book.sectors))))
+    shocked = (np.array([shock.rate_pp]), book.sector_vector(shock)[None, :])
+
+    results = {}
+    for label, (rate_shift, leverage_shift) in (("base", none), ("stressed", shocked)):
+        pd = book.default_probability(rate_shift, leverage_shift)[0]
+        breached = book.covenant_breaches(rate_shift, leverage_shift)[0]
+        results[label] = {
+            "pd": pd,
+            "expectedLoss": float(pd @ (book.exposure * book.lgd)),
+            "lenderLoss": pd.astype(np.float32) @ book.weights,
+            "breached": breached,
+        }
+
+    base, stressed = results["base"], results["stressed"]
+    new_breaches = stressed["breached"] & ~base["breached"]
+    return {
+        "rateShockBp": shock.rate_shock_bp,
+        "sectorShocks": shock.sector_shocks,
+        "baseExpectedLoss": round(base["expectedLoss"], 2),
+        "stressedExpectedLoss": round(stressed["expectedLoss"], 2),
+        "averagePd": {
+            "base": round(float(base["pd"].mean()), 6) if len(book) else 0.0,
+            "stressed": round(float(stressed["pd"].mean()), 6) if len(book) else 0.0,
+        },
+        "covenantBreaches": {
+            "base": int(base["breached"].sum()),
+            "stressed": int(stressed["breached"].sum()),
+            "newlyBreached": [
+                book.covenant_ids[i] for i in np.flatnonzero(new_breaches)
+            ],
+        },
+        "_lenderLoss": (base["lenderLoss"], stressed["lenderLoss"]),
+    }
+
+
+def simulate_chunks(
+    book: StressBook,
+    shock: StressShock,
+    chunks: List[Tuple[np.random.SeedSequence, int]],
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Run Monte Carlo chunks in this process
+
+    Each scenario draws a macro factor that pushes rates up and a
+    per-sector factor, loaded on the macro factor, that moves leverage.
+    Loans then default independently given their scenario PD.
+
+    Returns:
+        (losses, lender_losses, breach_counts, covenant_breach_totals)
+    """
+    losses = [np.zeros(0, dtype=np.float32)]
+    lender_losses = [np.zeros((0, len(book.lender_ids)), dtype=np.float32)]
+    breach_counts = [np.zeros(0, dtype=np.int64)]
+    covenant_totals = np.zeros(len(book.covenant_ids), dtype=np.int64)
+    centre = book.sector_vector(shock)
+    loss_given_default = (book.exposure * book.lgd).astype(np.float32)
+
+    for seed, count in chunks:
+        rng = np.random.default_rng(seed)
+        macro = rng.standard_normal(count)
+        sector = rng.standard_normal((count, len(book.sectors)))
+        rate_shift = shock.rate_pp - RATE_VOLATILITY * macro
+        leverage_shift = centre[None, :] - LEVERAGE_VOLATILITY * (
+            MACRO_LOADING * macro[:, None] + np.sqrt(1 - MACRO_LOADING**2) * sector
+        )
+
+        pd = book.default_probability(
+            rate_shift.astype(np.float32), leverage_shift.astype(np.float32)
+        )
+        defaults = (rng.random(pd.shape, dtype=np.float32) < pd).astype(np.float32)
+        losses.append(defaults @ loss_given_default)
+        lender_losses.append(defaults @ book.weights)
+
+        per_scenario, per_covenant = book.breach_counts(rate_shift, leverage_shift)
+        breach_counts.append(per_scenario)
+        covenant_totals += per_covenant
+
+    return (
+        np.concatenate(losses),
+        np.concatenate(lender_losses),
+        np.concatenate(breach_counts),
+        covenant_totals,
+    )
+
+
+def summarize(
+    book: StressBook,
+    deterministic: Dict[str, Any],
+    losses: np.ndarray,
+    lender_losses: np.ndarray,
+    breach_counts: np.ndarray,
+    covenant_totals: np.ndarray,
+) -> Dict[str, Any]:
+    """Loss distribution, breach statistics and per-lender impact"""
+    base_lender, stressed_lender = deterministic.pop("_lenderLoss")
+    scenarios = len(losses)
+    monte_carlo: Dict[str, Any] = {"scenarios": scenarios}
+    tail_contribution = np.zeros(len(book.lender_ids))
+    mc_lender = np.zeros(len(book.lender_ids))
+
+    if scenarios:
+        losses = losses.astype(np.float64)
+        var99 = float(np.percentile(losses, 99))
+        tail = losses >= var99
+        counts, edges = np.histogram(losses, bins=HISTOGRAM_BINS)
+        probability = covenant_totals / scenarios
+        top = np.argsort(-probability, kind="stable")[:TOP_COVENANTS]
+        monte_carlo.update(
+            {
+                "expectedLoss": round(float(losses.mean()), 2),
+                "lossPercentiles": {
+                    f"p{p:g}": round(float(np.percentile(losses, p)), 2)
+                    for p in LOSS_PERCENTILES
+                },
+                "valueAtRisk99": round(var99, 2),
+                "expectedShortfall99": round(float(losses[tail].mean()), 2),
+                "lossHistogram": {
+                    "edges": [round(float(e), 2) for e in edges],
+                    "counts": counts.tolist(),
+                },
+                "breachCounts": {
+                    "mean": round(float(breach_counts.mean()), 3),
+                    "p95": float(np.percentile(breach_counts, 95)),
+                    "max": int(breach_counts.max()),
+                },
+                "covenantBreachProbability": [
+                    {
+                        "covenantId": book.covenant_ids[i],
+                        "probability": round(float(probability[i]), 4),
+                    }
+                    for i in top
+                    if probability[i] > 0
+                ],
+            }
+        )
+        if len(book.lender_ids):
+            mc_lender = lender_losses.mean(axis=0)
+            tail_contribution = lender_losses[tail].mean(axis=0)
+
+    # Lender share of each loan's loss if every loan defaulted
+    at_risk = book.weights.sum(axis=0)
+    lenders = [
+        {
+            "lenderId": lender_id,
+            "lossGivenDefault": round(float(at_risk[l]), 2),
+            "baseExpectedLoss": round(float(base_lender[l]), 2),
+            "stressedExpectedLoss": round(float(stressed_lender[l]), 2),
+            "monteCarloExpectedLoss": round(float(mc_lender[l]), 2),
+            "tailLossContribution": round(float(tail_contribution[l]), 2),
+        }
+        for l, lender_id in enumerate(book.lender_ids)
+    ]
+    lenders.sort(key=lambda lender: -lender["stressedExpectedLoss"])
+
+    return {
+        "loans": len(book),
+        "covenants": len(book.covenant_ids),
+        "totalExposure": round(float(book.exposure.sum()), 2),
+        "deterministic": deterministic,
+        "monteCarlo": monte_carlo,
+        "lenders": lenders,
+    }
+
+
+class StressSimulator:
+    """
+    Runs portfolio stress tests off the event loop
+
+    Scenarios are cut into fixed-size chunks with their own child seeds, so
+    results for a given seed do not depend on the worker count. Large runs
+    are split into contiguous chunk groups across a process pool (started
+    on first use); small ones run in a thread.
+    """
+
+    def __init__(self, workers: Optional[int] = None):
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self.runs = 0
+
+    @classmethod
+    def from_env(cls) -> "StressSimulator":
+        workers = os.getenv("SIMULATION_WORKERS")
+        return cls(int(workers) if workers else None)
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn: forking a process that runs threads is not safe
+            self._pool = ProcessPoolExecutor(
+                self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._pool
+
+    async def run(
+        self,
+        book: StressBook,
+        shock: StressShock,
+        scenarios: int = DEFAULT_SCENARIOS,
+        seed: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        started = time.perf_counter()
+        sizes = [CHUNK_SCENARIOS] * (scenarios // CHUNK_SCENARIOS)
+        if scenarios % CHUNK_SCENARIOS:
+            sizes.append(scenarios % CHUNK_SCENARIOS)
+        seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+        chunks = list(zip(seeds, sizes))
+
+        deterministic = deterministic_stress(book, shock)
+        parallel = self.workers > 1 and scenarios * len(book) >= PARALLEL_CELLS
+        if parallel:
+            loop = asyncio.get_running_loop()
+            groups = np.array_split(np.arange(len(chunks)), self.workers)
+            parts = await asyncio.gather(
+                *[
+                    loop.run_in_executor(
+                        self._executor(),
+                        simulate_chunks,
+                        book,
+                        shock,
+                        [chunks[i] for i in group],
+                    )
+                    for group in groups
+                    if len(group)
+                ]
+            )
+        else:
+            parts = [await asyncio.to_thread(simulate_chunks, book, shock, chunks)]
+
+        result = summarize(
+            book,
+            deterministic,
+            np.concatenate([p[0] for p in parts]),
+            np.concatenate([p[1] for p in parts]),
+            np.concatenate([p[2] for p in parts]),
+            sum(p[3] for p in parts),
+        )
+        self.runs += 1
+        result["elapsedMs"] = round((time.perf_counter() - started) * 1000, 1)
+        result["workers"] = self.workers if parallel else 1
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "poolStarted": self._pool is not None,
+            "runs": self.runs,
+        }
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
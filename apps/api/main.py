@@ -1,42 +1,173 @@
-from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
+import time
+
+# Process boot marker for the startup-time report on /health
+BOOT_STARTED = time.perf_counter()
+
+from fastapi import (
+    FastAPI,
+    HTTPException,
+    WebSocket,
+    WebSocketDisconnect,
+    Request,
+    Depends,
+)
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
 import json
-from datetime import datetime
-from agents.crew_agents import ParserAgent, AllocatorAgent
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import date, datetime
+from agents.pool import AgentPool
+from analytics.portfolio import PortfolioBook
+from analytics.snapshots import SnapshotStore
+from agents.providers import providers
+from realtime.manager import (
+    ConnectionManager,
+    event_topic,
+    loan_topic,
+    lender_topic,
+    job_topic,
+)
+from documents.ingestion import document_error_status
+from documents.jobs import Job, JobQueue
+from engine.candidates import LenderIndex
+from engine.scoring import LenderMatrix
+from engine.stress import (
+    DEFAULT_RATE_BETA,
+    DEFAULT_SCENARIOS,
+    MAX_SCENARIOS,
+    StressBook,
+    StressShock,
+    StressSimulator,
+    rating_pd,
+)
+from models.registry import ModelRegistry, DEFAULT_REGISTRY_DIR
+from models.risk import FEATURES, RiskModel, loan_features
+from monitoring.covenants import (
+    CovenantMonitor,
+    CovenantStatsStore,
+    SqliteCovenantSource,
+    next_check_date,
+)
+import os
+import numpy as np
 
 
-# WebSocket Connection Manager
-class ConnectionManager:
-    def __init__(self):
-        self.active_connections: List[WebSocket] = []
+manager = ConnectionManager.from_env()
+covenant_stats = CovenantStatsStore()
 
-    async def connect(self, websocket: WebSocket):
-        await websocket.accept()
-        self.active_connections.append(websocket)
 
-    def disconnect(self, websocket: WebSocket):
-        self.active_connections.remove(websocket)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Agents are built once per process; their LLM stacks import on first use
+    app.state.agent_pool = AgentPool()
+    await manager.start()
 
-    async def send_personal_message(self, message: str, websocket: WebSocket):
-        await websocket.send_text(message)
+    # Optionally import the provider stacks in the background after startup
+    app.state.provider_warmup = None
+    if os.getenv("AGENT_WARMUP", "false").lower() in ("1", "true", "yes"):
+        app.state.provider_warmup = asyncio.create_task(providers.warm_up())
+
+    # Memory-mapped model artifacts; new versions are hot-swapped on request
+    app.state.model_registry = ModelRegistry(
+        os.getenv("MODEL_REGISTRY_DIR", DEFAULT_REGISTRY_DIR),
+        float(os.getenv("MODEL_REGISTRY_CHECK_INTERVAL", "5")),
+    )
+    RiskModel.load(app.state.model_registry)
+
+    # Columnar portfolio history behind the analytics charts
+    app.state.snapshot_store = SnapshotStore.from_env()
+    # Live book aggregates, checkpointed in the background
+    app.state.portfolio_book = PortfolioBook.from_env()
+    app.state.portfolio_book.start()
+    # Stress test process pool, started on the first large simulation
+    app.state.stress_simulator = StressSimulator.from_env()
+
+    # Document parse jobs run on a background worker pool
+    pool = app.state.agent_pool
+
+    async def run_parse_job(payload: Dict[str, Any]) -> Dict[str, Any]:
+        async with pool.parser() as agent:
+            result = await agent.parse_document(
+                payload["documentUrl"],
+                payload["documentType"],
+                bypass_cache=payload.get("bypassCache", False),
+                fallback=False,
+            )
+        return {
+            "documentType": payload["documentType"],
+            "extractedData": result.data,
+            "confidence": result.confidence,
+        }
+
+    async def notify_parse_job(job: Job):
+        await manager.publish(
+            [job_topic(job.id)], {"type": "PARSE_JOB", "job": job.to_dict()}
+        )
+
+    app.state.parse_jobs = JobQueue.from_env(run_parse_job, notify_parse_job)
+    await app.state.parse_jobs.start()
+
+    # Scheduled covenant evaluation over the whole book
+    app.state.covenant_monitor = None
+    interval = float(os.getenv("COVENANT_MONITOR_INTERVAL", "300"))
+    source = SqliteCovenantSource.from_env()
+    if interval > 0 and source and os.path.exists(source.db_path):
+        app.state.covenant_monitor = CovenantMonitor(
+            covenant_stats, source.fetch_updates, manager.publish, interval
+        )
+        app.state.covenant_monitor.start()
+
+    app.state.ready_ms = (time.perf_counter() - BOOT_STARTED) * 1000
+    yield
+
+    if app.state.provider_warmup:
+        app.state.provider_warmup.cancel()
+    if app.state.covenant_monitor:
+        await app.state.covenant_monitor.stop()
+    await app.state.parse_jobs.stop()
+    await app.state.portfolio_book.stop()
+    app.state.stress_simulator.close()
+    await manager.stop()
+    await app.state.agent_pool.aclose()
+
+
+def get_agent_pool(request: Request) -> AgentPool:
+    return request.app.state.agent_pool
+
+
+def get_parse_jobs(request: Request) -> JobQueue:
+    return request.app.state.parse_jobs
+
+
+def get_model_registry(request: Request) -> ModelRegistry:
+    return request.app.state.model_registry
 
-    async def broadcast(self, message: str):
-        for connection in self.active_connections:
-            try:
-                await connection.send_text(message)
-            except Exception:
-                # Handle disconnected clients gracefully if needed
-                pass
 
+def get_snapshot_store(request: Request) -> SnapshotStore:
+    return request.app.state.snapshot_store
+
+
+def get_portfolio_book(request: Request) -> PortfolioBook:
+    return request.app.state.portfolio_book
+
+
+def get_stress_simulator(request: Request) -> StressSimulator:
+    return request.app.state.stress_simulator
+
+
+def get_risk_model(request: Request) -> Optional[RiskModel]:
+    # Heuristic fallback when no model has been published
+    return RiskModel.load(request.app.state.model_registry)
 
-manager = ConnectionManager()
 
 app = FastAPI(
     title="AutoSyndicate™ ML API",
     description="AI-powered capital allocation and loan processing microservice",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # CORS middleware
@@ -89,11 +220,32 @@ class AllocationRequest(BaseModel):
     loan: LoanRequest
     lenders: List[LenderProfile]
     constraints: Optional[Dict[str, Any]] = {}
+    useLlm: bool = False
+    bypassCache: bool = False
+
+
+class BatchAllocationRequest(BaseModel):
+    loans: List[LoanRequest]
+    lenders: List[LenderProfile]
+    constraints: Optional[Dict[str, Any]] = {}
+
+
+class DealOutcome(BaseModel):
+    loan: LoanRequest
+    allocations: List[AllocationRecommendation]
 
 
 class DocumentParseRequest(BaseModel):
     documentUrl: str
     documentType: str
+    bypassCache: bool = False
+
+
+class ClauseSearchRequest(BaseModel):
+    query: str
+    limit: int = 10
+    documentType: Optional[str] = None
+    clauseType: Optional[str] = None
 
 
 # ==================== ROUTES ====================
@@ -110,7 +262,12 @@ async def root():
 
 
 @app.get("/health")
-async def health():
+async def health(
+    request: Request,
+    pool: AgentPool = Depends(get_agent_pool),
+    model: Optional[RiskModel] = Depends(get_risk_model),
+    registry: ModelRegistry = Depends(get_model_registry),
+):
     return {
         "status": "healthy",
         "services": {
@@ -118,35 +275,81 @@ async def health():
             "gemini": "available",
             "sklearn": "available",
         },
+        "riskModel": model.version if model else "heuristic",
+        "models": registry.stats(),
+        "startup": {
+            "readyMs": round(request.app.state.ready_ms, 1),
+            "providers": providers.stats(),
+        },
+        "llmCache": pool.cache.stats(),
+        "llmCoalescing": pool.inflight.stats(),
+        "parseJobs": request.app.state.parse_jobs.stats(),
+        "clauseIndex": pool.clause_index.stats(),
+        "dealIndex": pool.deal_index.stats(),
+        "esgScores": pool.esg_scorer.stats(),
+        "allocatorPrompts": pool.allocator_agent.prompts.stats(),
+        "snapshots": request.app.state.snapshot_store.stats(),
+        "portfolio": request.app.state.portfolio_book.stats(),
+        "stressSimulator": request.app.state.stress_simulator.stats(),
     }
 
 
 @app.websocket("/ws/{client_id}")
-async def websocket_endpoint(websocket: WebSocket, client_id: str):
-    await manager.connect(websocket)
+async def websocket_endpoint(
+    websocket: WebSocket, client_id: str, topics: Optional[str] = None
+):
+    """
+    Real-time event stream
+    Pass ?topics=loan:L123,event:BREACH_ALERT to start with a topic filter,
+    otherwise the client receives all events until it unsubscribes from "*"
+    """
+    initial_topics = topics.split(",") if topics else None
+    await manager.connect(websocket, client_id, initial_topics)
     try:
         while True:
-            await websocket.receive_text()
-            # Keep the connection alive
+            text = await websocket.receive_text()
+            # Subscription control messages; anything else is a keep-alive
+            await manager.handle_message(websocket, text)
     except WebSocketDisconnect:
+        pass
+    finally:
         manager.disconnect(websocket)
 
 
+@app.get("/api/realtime/stats")
+async def realtime_stats():
+    """
+    WebSocket fan-out health: queue depth, drops and delivery latency per client
+    """
+    return manager.stats()
+
+
 @app.post("/api/trigger-notification")
-async def trigger_notification(message: str):
+async def trigger_notification(
+    message: str, loanId: Optional[str] = None, lenderId: Optional[str] = None
+):
     """
-    Trigger a real-time notification to all connected clients
+    Trigger a real-time notification to subscribed clients
     """
     timestamp = datetime.now().strftime("%H:%M:%S")
     payload = json.dumps(
         {"type": "NOTIFICATION", "message": message, "timestamp": timestamp}
     )
-    await manager.broadcast(payload)
+    topics = [event_topic("NOTIFICATION")]
+    if loanId:
+        topics.append(loan_topic(loanId))
+    if lenderId:
+        topics.append(lender_topic(lenderId))
+    await manager.publish(topics, payload)
     return {"status": "sent"}
 
 
 @app.post("/api/allocate", response_model=List[AllocationRecommendation])
-async def allocate_capital(request: AllocationRequest):
+async def allocate_capital(
+    request: AllocationRequest,
+    response: Response,
+    pool: AgentPool = Depends(get_agent_pool),
+):
     """
     ML-driven capital allocation engine
     Matches loan characteristics with lender preferences
@@ -157,16 +360,22 @@ async def allocate_capital(request: AllocationRequest):
         lender_profiles_data = [lender.model_dump() for lender in request.lenders]
         constraints = request.constraints
 
-        # Initialize Agent
-        agent = AllocatorAgent()
-
-        # Run allocation
-        result = await agent.allocate_capital(
-            loan_data, lender_profiles_data, constraints
-        )
+        # Run allocation on the shared agent
+        async with pool.allocator() as agent:
+            result = await agent.allocate_capital(
+                loan_data,
+                lender_profiles_data,
+                constraints,
+                use_llm=request.useLlm,
+                bypass_cache=request.bypassCache,
+            )
 
         if not result.success:
             raise HTTPException(status_code=500, detail="Allocation failed")
+        if "prompt" in result.data:
+            response.headers["X-Prompt-Tokens"] = str(
+                result.data["prompt"]["promptTokens"]
+            )
 
         recommendations = []
         for alloc in result.data.get("allocations", []):
@@ -189,15 +398,89 @@ async def allocate_capital(request: AllocationRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/api/allocate/batch")
+async def allocate_capital_batch(
+    request: BatchAllocationRequest, pool: AgentPool = Depends(get_agent_pool)
+):
+    """
+    Joint capital allocation for a pipeline of loans
+    Lenders are validated and packed once, and each lender's remaining
+    maxInvestment is tracked across deals. Results stream as NDJSON,
+    one line per loan in request order.
+    """
+    # Deterministic path only, so no pool slot is held for the whole stream
+    agent = pool.allocator_agent
+    lenders = LenderMatrix([lender.model_dump() for lender in request.lenders])
+    index = LenderIndex(lenders)
+    capacity = lenders.max_investment.copy()
+
+    async def stream_allocations():
+        for loan in request.loans:
+            try:
+                data = agent.optimize(
+                    loan.model_dump(), lenders, request.constraints, capacity, index
+                )
+                line = {"loanId": loan.id, **data}
+            except Exception as e:
+                print(f"Error in batch allocate for {loan.id}: {e}")
+                line = {"loanId": loan.id, "error": str(e)}
+            yield json.dumps(line) + "\n"
+            # Let other requests run between deals
+            await asyncio.sleep(0)
+
+    return StreamingResponse(stream_allocations(), media_type="application/x-ndjson")
+
+
+@app.post("/api/deals/similar")
+async def similar_deals(
+    loan: LoanRequest, k: int = 5, pool: AgentPool = Depends(get_agent_pool)
+):
+    """
+    Most similar historical syndicates for a loan
+    Returns the precedent deals and the candidate syndicate they imply
+    """
+    try:
+        similar = pool.deal_index.query(loan.model_dump(), max(1, min(k, 50)))
+        return {
+            "loanId": loan.id,
+            "similarDeals": similar,
+            "candidateSyndicate": pool.deal_index.candidate_syndicate(similar),
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/api/deals/outcome")
+async def record_deal_outcome(
+    outcome: DealOutcome, pool: AgentPool = Depends(get_agent_pool)
+):
+    """Add a closed deal and its final syndicate to the similar-deal index"""
+    pool.deal_index.add_deals(
+        [
+            {
+                "loan": outcome.loan.model_dump(),
+                "allocations": [a.model_dump() for a in outcome.allocations],
+            }
+        ]
+    )
+    return {"recorded": outcome.loan.id, "deals": len(pool.deal_index)}
+
+
 @app.post("/api/parse-document")
-async def parse_document(request: DocumentParseRequest):
+async def parse_document(
+    request: DocumentParseRequest, pool: AgentPool = Depends(get_agent_pool)
+):
     """
     AI-powered document parsing using Gemini
     Extracts structured data from loan documents
     """
     try:
-        agent = ParserAgent()
-        result = await agent.parse_document(request.documentUrl, request.documentType)
+        async with pool.parser() as agent:
+            result = await agent.parse_document(
+                request.documentUrl,
+                request.documentType,
+                bypass_cache=request.bypassCache,
+            )
 
         if not result.success:
             raise HTTPException(status_code=500, detail="Parsing failed")
@@ -209,30 +492,79 @@ async def parse_document(request: DocumentParseRequest):
             "confidence": result.confidence,
         }
 
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=document_error_status(e), detail=str(e))
+
+
+@app.post("/api/parse-document/jobs", status_code=202)
+async def submit_parse_job(
+    request: DocumentParseRequest, jobs: JobQueue = Depends(get_parse_jobs)
+):
+    """
+    Queue a document for background parsing
+    Poll the returned job or subscribe to its topic for the result
+    """
+    job = await jobs.submit(request.model_dump())
+    return {**job.to_dict(), "topic": job_topic(job.id)}
+
+
+@app.get("/api/parse-document/jobs/{job_id}")
+async def get_parse_job(job_id: str, jobs: JobQueue = Depends(get_parse_jobs)):
+    """Status and, once finished, the result of a parse job"""
+    job = await jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+
+@app.post("/api/documents/search")
+async def search_documents(
+    request: ClauseSearchRequest, pool: AgentPool = Depends(get_agent_pool)
+):
+    """
+    Nearest-clause search across every parsed document
+    Filter by documentType or clauseType (e.g. "Leverage Ratio")
+    """
+    try:
+        hits = await asyncio.to_thread(
+            pool.clause_index.search,
+            request.query,
+            max(1, min(request.limit, 100)),
+            {"documentType": request.documentType, "clauseType": request.clauseType},
+        )
+        return {"query": request.query, "results": hits}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.post("/api/risk-assessment")
-async def assess_risk(loan: LoanRequest):
+async def assess_risk(
+    loan: LoanRequest, model: Optional[RiskModel] = Depends(get_risk_model)
+):
     """
     ML-based risk scoring using scikit-learn
     """
     try:
-        # Mock risk assessment
-        # In production, this would use trained ML models
-        risk_score = calculate_risk_score(loan)
+        factors: Dict[str, Any] = {"creditRating": loan.creditRating or "NR"}
+        if model is not None:
+            features = model.design([loan.model_dump()])
+            probability = model.predict(features)
+            # PD mapped onto the heuristic scale so the category bands hold
+            risk_score = float(model.risk_score(probability)[0])
+            factors["defaultProbability"] = float(probability[0])
+            factors["modelVersion"] = model.version
+            factors["contributions"] = model.contributions(features[0])
+        else:
+            risk_score = calculate_risk_score(loan)
+            factors["modelVersion"] = "heuristic"
 
         return {
             "loanId": loan.id,
             "riskScore": risk_score,
             "riskCategory": get_risk_category(risk_score),
-            "factors": {
-                "creditRating": loan.creditRating or "BB+",
-                "loanToValue": 0.75,
-                "debtServiceCoverage": 1.35,
-                "industryRisk": "Medium",
-            },
+            "factors": factors,
             "recommendation": (
                 "Approve with standard terms"
                 if risk_score < 0.6
@@ -244,99 +576,390 @@ async def assess_risk(loan: LoanRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/api/risk-assessment/batch")
+async def assess_risk_batch(
+    loans: List[LoanRequest], model: Optional[RiskModel] = Depends(get_risk_model)
+):
+    """
+    Score many loans with one vectorized model call
+    """
+    try:
+        if model is not None:
+            probabilities = model.predict(
+                model.design([loan.model_dump() for loan in loans])
+            )
+            scores = model.risk_score(probabilities)
+            version = model.version
+        else:
+            probabilities = [None] * len(loans)
+            scores = [calculate_risk_score(loan) for loan in loans]
+            version = "heuristic"
+
+        return {
+            "modelVersion": version,
+            "results": [
+                {
+                    "loanId": loan.id,
+                    "riskScore": float(score),
+                    "riskCategory": get_risk_category(score),
+                    "defaultProbability": (
+                        None if probability is None else float(probability)
+                    ),
+                }
+                for loan, score, probability in zip(loans, scores, probabilities)
+            ],
+        }
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+class CovenantObservation(BaseModel):
+    covenantId: str
+    value: float
+    threshold: Optional[float] = None
+    name: Optional[str] = None
+    type: Optional[str] = None
+    frequency: Optional[str] = None
+    loanId: Optional[str] = None
+
+
+def covenant_prediction(store: CovenantStatsStore, covenant_id: str) -> Dict[str, Any]:
+    """Prediction for one tracked covenant, read from its incremental state"""
+    slot = store.index[covenant_id]
+    assessment = store.assess([slot])
+    breach_probability = round(float(assessment.breach_probability[0]), 4)
+    return {
+        "covenantId": covenant_id,
+        "breachProbability": breach_probability,
+        "status": assessment.statuses[0],
+        "currentValue": float(assessment.current[0]),
+        "headroom": round(float(assessment.headroom[0]), 4),
+        "trend": assessment.trends[0],
+        "observations": int(store.stats(covenant_id)["observations"]),
+        "nextCheckDate": next_check_date(store.frequencies[slot]),
+        "recommendedAction": (
+            "Continue monitoring"
+            if breach_probability < 0.3
+            else "Increase monitoring frequency"
+        ),
+    }
+
+
 @app.post("/api/covenant-predict")
 async def predict_covenant_breach(data: Dict[str, Any]):
     """
     Predictive analytics for covenant breach probability
+    Tracked covenants are predicted from their incremental state; the
+    historicalValues list only seeds a covenant the first time it is seen.
     """
     try:
         covenant_id = data.get("covenantId")
-        _historical_values = data.get("historicalValues", [])
+        store = covenant_stats if covenant_id else CovenantStatsStore(capacity=1)
+        covenant_id = covenant_id or "adhoc"
 
-        # Mock prediction
-        breach_probability = 0.15  # 15% probability
+        seed = covenant_id not in store
+        store.register({**data, "id": covenant_id})
+        if seed:
+            for value in data.get("historicalValues", []):
+                store.observe(covenant_id, value)
 
-        return {
-            "covenantId": covenant_id,
-            "breachProbability": breach_probability,
-            "trend": "stable",
-            "nextCheckDate": "2026-04-01",
-            "recommendedAction": (
-                "Continue monitoring"
-                if breach_probability < 0.3
-                else "Increase monitoring frequency"
-            ),
-        }
+        return covenant_prediction(store, covenant_id)
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/api/covenant-observe")
+async def observe_covenant(observation: CovenantObservation):
+    """
+    Record a new CovenantCheck value and return the updated prediction
+    """
+    covenant_stats.register(
+        {
+            "id": observation.covenantId,
+            "loanRequestId": observation.loanId,
+            "name": observation.name,
+            "type": observation.type,
+            "threshold": observation.threshold,
+            "frequency": observation.frequency,
+        }
+    )
+    covenant_stats.observe(observation.covenantId, observation.value)
+    return covenant_prediction(covenant_stats, observation.covenantId)
+
+
+@app.get("/api/covenants/monitor")
+async def covenant_monitor_status(request: Request):
+    """
+    Summary of the latest scheduled covenant evaluation
+    """
+    monitor = request.app.state.covenant_monitor
+    if monitor is None:
+        return {"enabled": False}
+    return {"enabled": True, "intervalSeconds": monitor.interval, **monitor.last_run}
+
+
 @app.post("/api/esg-analysis")
-async def analyze_esg(loan: LoanRequest):
+async def analyze_esg(loan: LoanRequest, pool: AgentPool = Depends(get_agent_pool)):
     """
     ESG scoring and analysis
     """
     try:
-        esg_score = loan.esgScore or calculate_esg_score(loan)
+        result = await pool.esg_agent.analyze_esg(loan.model_dump())
+        return result.data
 
-        return {
-            "loanId": loan.id,
-            "esgScore": esg_score,
-            "breakdown": {"environmental": 75.2, "social": 68.5, "governance": 82.1},
-            "alignment": {"unepFi": "Compliant", "greenBondPrinciples": "Partial"},
-            "recommendations": [
-                "Enhance carbon disclosure reporting",
-                "Implement supplier diversity program",
-            ],
-        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/api/esg-analysis/batch")
+async def analyze_esg_batch(
+    loans: List[LoanRequest], pool: AgentPool = Depends(get_agent_pool)
+):
+    """
+    Score a whole marketplace in one vectorized pass, reusing unchanged
+    borrowers' memoized scores
+    """
+    try:
+        results = pool.esg_scorer.score([loan.model_dump() for loan in loans])
+        return {"results": results, "cache": pool.esg_scorer.stats()}
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+class PortfolioSnapshot(BaseModel):
+    asOf: Optional[date] = None
+    value: float
+    yield_: float = Field(alias="yield")
+    sectorExposure: Dict[str, float] = {}
+
+
 @app.get("/api/analytics/performance")
-async def get_performance_data(timeframe: str = "1Y"):
+async def get_performance_data(
+    timeframe: str = "1Y",
+    end: Optional[date] = None,
+    store: SnapshotStore = Depends(get_snapshot_store),
+):
     """
     Get historical performance data for charts
+    Daily points for 1M, weekly rollups for 3M/6M and monthly for 1Y/ALL,
+    read from the portfolio snapshot store
     """
-    # Mock data generation for demo
-    # In production, this would query historical portfolio snapshots
-    data = []
-    base_value = 10000000  # £10M base
-    points = 12 if timeframe == "1Y" else 30
+    try:
+        return store.performance(timeframe, end)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-    for i in range(points):
-        month = (datetime.now().month - (points - 1 - i) - 1) % 12 + 1
-        year = datetime.now().year - (1 if month > datetime.now().month else 0)
-        date_str = f"{year}-{month:02d}-01"
 
-        # Add some random growth/volatility
-        base_value *= 1.0 + (0.01 + 0.03 * (i / points))  # 1-4% growth trend
+@app.get("/api/analytics/composition")
+async def get_composition_data(
+    asOf: Optional[date] = None,
+    store: SnapshotStore = Depends(get_snapshot_store),
+    book: PortfolioBook = Depends(get_portfolio_book),
+):
+    """
+    Get portfolio composition data by sector
+    The live book is served from its running totals; asOf (or an empty
+    book) reads the snapshot history instead
+    """
+    if asOf is None and book.positions:
+        return book.composition()
+    return store.composition(asOf)
 
-        data.append(
-            {
-                "date": date_str,
-                "value": round(base_value, 2),
-                "yield": round(4.5 + (0.5 * (i / points)), 2),
-            }
+
+@app.get("/api/analytics/concentration")
+async def get_concentration(
+    top: int = 10, book: PortfolioBook = Depends(get_portfolio_book)
+):
+    """
+    Sector and lender concentration (HHI, 0-10,000) of the live book
+    """
+    return book.concentration(max(1, min(top, 100)))
+
+
+@app.post("/api/analytics/snapshots")
+async def record_snapshot(
+    snapshot: PortfolioSnapshot,
+    store: SnapshotStore = Depends(get_snapshot_store),
+    book: PortfolioBook = Depends(get_portfolio_book),
+):
+    """
+    Record the daily portfolio snapshot (NAV, yield, sector exposure)
+    Sector exposure defaults to the live book; re-recording the latest
+    day overwrites it
+    """
+    try:
+        await asyncio.to_thread(
+            store.append,
+            snapshot.asOf or date.today(),
+            snapshot.value,
+            snapshot.yield_,
+            snapshot.sectorExposure or dict(book.sectors.amounts),
         )
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return store.stats()
 
-    return data
 
+class AcceptedAllocation(BaseModel):
+    allocationId: str
+    loanId: str
+    lenderId: str
+    amount: float
+    sector: str = "Other"
 
-@app.get("/api/analytics/composition")
-async def get_composition_data():
+
+class Repayment(BaseModel):
+    amount: Optional[float] = None  # None repays the loan in full
+
+
+@app.post("/api/portfolio/allocations")
+async def accept_allocation(
+    allocation: AcceptedAllocation, book: PortfolioBook = Depends(get_portfolio_book)
+):
     """
-    Get portfolio composition data by sector
+    Add an accepted allocation to the live book
     """
-    return [
-        {"name": "Technology", "value": 35, "color": "#00f3ff"},
-        {"name": "Energy", "value": 25, "color": "#bc13fe"},
-        {"name": "Healthcare", "value": 20, "color": "#ff0080"},
-        {"name": "Real Estate", "value": 15, "color": "#39ff14"},
-        {"name": "Other", "value": 5, "color": "#faff00"},
-    ]
+    if allocation.amount <= 0:
+        raise HTTPException(status_code=400, detail="amount must be positive")
+    book.accept(
+        allocation.allocationId,
+        allocation.loanId,
+        allocation.lenderId,
+        allocation.amount,
+        allocation.sector,
+    )
+    return book.stats()
+
+
+@app.post("/api/portfolio/loans/{loan_id}/repay")
+async def repay_loan(
+    loan_id: str,
+    repayment: Repayment,
+    book: PortfolioBook = Depends(get_portfolio_book),
+):
+    """
+    Apply a repayment pro rata across the loan's lenders
+    """
+    if repayment.amount is not None and repayment.amount <= 0:
+        raise HTTPException(status_code=400, detail="amount must be positive")
+    try:
+        repaid = book.repay(loan_id, repayment.amount)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"No open positions for {loan_id}")
+    return {"loanId": loan_id, "repaid": round(repaid, 2), **book.stats()}
+
+
+@app.get("/api/portfolio/lenders/{lender_id}/exposure")
+async def lender_exposure(
+    lender_id: str, book: PortfolioBook = Depends(get_portfolio_book)
+):
+    """
+    Outstanding exposure of one lender in the live book
+    """
+    return book.lender_exposure(lender_id)
+
+
+class StressLoan(BaseModel):
+    id: str
+    amount: float
+    interestRate: float
+    term: int = 0
+    sector: str = "Other"
+    riskScore: Optional[float] = None
+    creditRating: Optional[str] = None
+    esgScore: Optional[float] = None
+    probabilityOfDefault: Optional[float] = None  # Overrides the risk model
+    lgd: Optional[float] = None
+
+
+class StressCovenant(BaseModel):
+    id: str
+    loanId: str
+    name: str
+    type: str = "FINANCIAL"
+    threshold: float
+    value: float  # Latest reported value
+
+
+class StressAllocation(BaseModel):
+    loanId: str
+    lenderId: str
+    amount: float
+
+
+class PortfolioSimulationRequest(BaseModel):
+    loans: List[StressLoan]
+    covenants: List[StressCovenant] = []
+    # Defaults to the live book's positions in these loans
+    allocations: List[StressAllocation] = []
+    rateShockBp: float = 200
+    sectorShocks: Dict[str, float] = {}  # Sector -> leverage jump, 0.2 = +20%
+    scenarios: int = DEFAULT_SCENARIOS
+    seed: Optional[int] = None
+
+
+@app.post("/api/simulate/portfolio")
+async def simulate_portfolio(
+    request: PortfolioSimulationRequest,
+    model: Optional[RiskModel] = Depends(get_risk_model),
+    book: PortfolioBook = Depends(get_portfolio_book),
+    simulator: StressSimulator = Depends(get_stress_simulator),
+):
+    """
+    Stress the book under rate and sector leverage shocks
+
+    Runs the deterministic shock plus Monte Carlo scenarios around it over
+    every loan and covenant, returning covenant breach counts, the loss
+    distribution and per-lender impact.
+    """
+    if not request.loans:
+        raise HTTPException(status_code=400, detail="loans must not be empty")
+    if not 0 <= request.scenarios <= MAX_SCENARIOS:
+        raise HTTPException(
+            status_code=400, detail=f"scenarios must be between 0 and {MAX_SCENARIOS}"
+        )
+    try:
+        loans = [loan.model_dump() for loan in request.loans]
+        if model is not None:
+            pd = model.predict(model.design(loans))
+            # d(logit PD) / d(interest rate) of the logistic model
+            rate = model.features.index("interestRate")
+            rate_beta = float(model.coef[rate] / model.scale[rate])
+        else:
+            features = loan_features(loans)
+            pd = rating_pd(features[:, FEATURES.index("creditRatingRank")])
+            rate_beta = DEFAULT_RATE_BETA
+        explicit = [loan.probabilityOfDefault for loan in request.loans]
+        pd = np.array([p if p is not None else q for p, q in zip(explicit, pd)])
+
+        allocations = [a.model_dump() for a in request.allocations]
+        if not allocations:
+            loan_ids = {loan.id for loan in request.loans}
+            allocations = [
+                {"loanId": p.loan_id, "lenderId": p.lender_id, "amount": p.outstanding}
+                for p in list(book.positions.values())
+                if p.loan_id in loan_ids
+            ]
+
+        stress_book = StressBook.from_records(
+            loans,
+            pd,
+            allocations,
+            [c.model_dump() for c in request.covenants],
+            rate_beta,
+        )
+        shock = StressShock(request.rateShockBp, request.sectorShocks)
+        result = await simulator.run(
+            stress_book, shock, request.scenarios, request.seed
+        )
+        result["riskModel"] = model.version if model else "rating"
+        return result
+    except Exception as e:
+        print(f"Error in portfolio simulation: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.post("/api/simulate-breach")
@@ -344,7 +967,8 @@ async def simulate_breach():
     """
     Simultate a covenant breach for demo purposes
     """
-    await manager.broadcast(
+    await manager.publish(
+        [event_topic("BREACH_ALERT"), loan_topic("L123")],
         {
             "type": "BREACH_ALERT",
             "loanId": "L123",
@@ -354,7 +978,7 @@ async def simulate_breach():
             "threshold": "3.5x",
             "priority": "CRITICAL",
             "message": "CRITICAL: Covenant breach detected for Alpha Infrastructure Ltd. Leverage Ratio at 3.8x (Limit: 3.5x).",
-        }
+        },
     )
     return {"status": "Breach simulated"}
 
@@ -394,36 +1018,8 @@ async def chat(msg: ChatMessage):
 
 def calculate_match_score(loan: LoanRequest, lender: LenderProfile) -> float:
     """Calculate match score between loan and lender"""
-    score = 0.0
-
-    # Amount compatibility (30%)
-    if lender.minInvestment <= loan.amount <= (lender.maxInvestment or float("inf")):
-        score += 0.3
-
-    # Risk appetite matching (30%)
-    risk_map = {"LOW": 0.3, "MODERATE": 0.6, "HIGH": 0.9}
-    loan_risk = loan.riskScore or 0.5
-    lender_risk = risk_map.get(lender.riskAppetite, 0.5)
-    risk_diff = abs(loan_risk - lender_risk)
-    score += 0.3 * (1 - risk_diff)
-
-    # ESG alignment (20%)
-    if loan.esgScore and lender.esgPreferences:
-        score += 0.2 * (loan.esgScore / 100)
-    else:
-        score += 0.1  # Partial credit if no ESG data
-
-    # Sector preference (20%)
-    if loan.purpose and lender.preferredSectors:
-        # Simple keyword matching
-        if any(
-            sector.lower() in loan.purpose.lower() for sector in lender.preferredSectors
-        ):
-            score += 0.2
-    else:
-        score += 0.1  # Partial credit
-
-    return min(score, 1.0)
+    lenders = LenderMatrix([lender.model_dump()])
+    return float(lenders.score(loan.model_dump())[0])
 
 
 def generate_allocation_reasoning(
@@ -481,12 +1077,6 @@ def get_risk_category(risk_score: float) -> str:
         return "High Risk"
 
 
-def calculate_esg_score(loan: LoanRequest) -> float:
-    """Calculate ESG score for a loan"""
-    # Mock calculation
-    return 72.5
-
-
 if __name__ == "__main__":
     import uvicorn
 
@@ -0,0 +1,183 @@
+"""
+Memory-mapped model registry for AutoSyndicate™
+Model parameters and lookup tables live as .npy files opened with
+mmap_mode, so every worker on a host shares one page-cache copy
+"""
+
+from typing import Dict, Any, Optional, Callable
+import os
+import json
+import time
+import errno
+import shutil
+import tempfile
+import threading
+import numpy as np
+
+DEFAULT_REGISTRY_DIR = "artifacts"
+LATEST_POINTER = "LATEST"
+METADATA_FILE = "metadata.json"
+DEFAULT_CHECK_INTERVAL = 5.0
+
+
+class LoadedArtifact:
+    """One mapped model version plus the serving object built from it"""
+
+    def __init__(self, name: str, path: str):
+        started = time.perf_counter()
+        self.name = name
+        self.path = path
+        self.directory = os.path.basename(path)
+        with open(os.path.join(path, METADATA_FILE)) as f:
+            self.metadata: Dict[str, Any] = json.load(f)
+        self.version = self.metadata.get("version", self.directory)
+        self.arrays: Dict[str, np.ndarray] = {
+            filename[: -len(".npy")]: np.load(
+                os.path.join(path, filename), mmap_mode="r"
+            )
+            for filename in sorted(os.listdir(path))
+            if filename.endswith(".npy")
+        }
+        self.model: Any = None
+        self.load_ms = (time.perf_counter() - started) * 1000
+        self.loaded_at = time.time()
+
+    @property
+    def mapped_bytes(self) -> int:
+        return int(sum(array.nbytes for array in self.arrays.values()))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "loadMs": round(self.load_ms, 3),
+            "mappedBytes": self.mapped_bytes,
+            "arrays": len(self.arrays),
+            "loadedAt": self.loaded_at,
+        }
+
+
+class ModelRegistry:
+    """
+    Versioned artifact store laid out as <root>/<name>/<version>/*.npy
+
+    <root>/<name>/LATEST names the live version's directory. get() re-reads
+    the pointer at most every check_interval seconds and maps the new
+    version when it changes, so publishing a model hot-swaps it in running
+    workers. Published directories are never rewritten: republishing a
+    version writes <version>~<n> and moves the pointer to it.
+    """
+
+    def __init__(
+        self,
+        root: str = DEFAULT_REGISTRY_DIR,
+        check_interval: float = DEFAULT_CHECK_INTERVAL,
+    ):
+        self.root = root
+        self.check_interval = check_interval
+        self._loaded: Dict[str, LoadedArtifact] = {}
+        self._checked_at: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def publish(
+        self,
+        name: str,
+        version: str,
+        arrays: Dict[str, np.ndarray],
+        metadata: Dict[str, Any],
+    ) -> str:
+        """
+        Write a version and point LATEST at it
+
+        The version is staged in a temporary directory and renamed into
+        place, then LATEST is replaced, so readers only ever see the old or
+        the new version complete. Earlier copies of a republished version
+        are removed once the pointer has moved.
+        """
+        model_dir = os.path.join(self.root, name)
+        os.makedirs(model_dir, exist_ok=True)
+        staging = tempfile.mkdtemp(prefix=f".{version}.tmp-", dir=model_dir)
+        try:
+            # mkdtemp is owner-only; workers may run as another user
+            os.chmod(staging, 0o755)
+            for key, array in arrays.items():
+                np.save(
+                    os.path.join(staging, f"{key}.npy"), np.ascontiguousarray(array)
+                )
+            with open(os.path.join(staging, METADATA_FILE), "w") as f:
+                json.dump({**metadata, "version": version}, f, indent=2)
+            directory = self._install(model_dir, staging, version)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        pointer = os.path.join(model_dir, LATEST_POINTER)
+        with open(f"{pointer}.tmp-{os.getpid()}", "w") as f:
+            f.write(directory)
+        os.replace(f"{pointer}.tmp-{os.getpid()}", pointer)
+
+        for other in os.listdir(model_dir):
+            copy = other[len(version) + 1 :]
+            earlier = other == version or (
+                other.startswith(f"{version}~") and copy.isdigit()
+            )
+            if earlier and other != directory:
+                shutil.rmtree(os.path.join(model_dir, other), ignore_errors=True)
+        return os.path.join(model_dir, directory)
+
+    @staticmethod
+    def _install(model_dir: str, staging: str, version: str) -> str:
+        """Rename staging to the first free <version>[~<n>] directory"""
+        directory, copy = version, 0
+        while True:
+            try:
+                os.rename(staging, os.path.join(model_dir, directory))
+                return directory
+            except OSError as e:
+                if e.errno not in (errno.EEXIST, errno.ENOTEMPTY):
+                    raise
+            copy += 1
+            directory = f"{version}~{copy}"
+
+    def latest_directory(self, name: str) -> Optional[str]:
+        pointer = os.path.join(self.root, name, LATEST_POINTER)
+        try:
+            with open(pointer) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def get(
+        self, name: str, build: Optional[Callable[[LoadedArtifact], Any]] = None
+    ) -> Optional[LoadedArtifact]:
+        """
+        Current artifact for a model, hot-swapping if LATEST moved
+
+        build, if given, turns the mapped arrays into a serving object once
+        per version; it is stored on the artifact as .model.
+        """
+        now = time.monotonic()
+        loaded = self._loaded.get(name)
+        if loaded and now - self._checked_at.get(name, 0) < self.check_interval:
+            return loaded
+
+        with self._lock:
+            self._checked_at[name] = now
+            directory = self.latest_directory(name)
+            if directory is None:
+                return loaded
+            if loaded is None or loaded.directory != directory:
+                try:
+                    candidate = LoadedArtifact(
+                        name, os.path.join(self.root, name, directory)
+                    )
+                    if build is not None:
+                        candidate.model = build(candidate)
+                except Exception as e:
+                    # Keep serving the previous version if the new one is broken
+                    print(f"Error loading model {name}@{directory}: {e}")
+                    return loaded
+                self._loaded[name] = loaded = candidate
+            return loaded
+
+    def stats(self) -> Dict[str, Any]:
+        return {name: artifact.stats() for name, artifact in self._loaded.items()}
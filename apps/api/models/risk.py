@@ -0,0 +1,222 @@
+"""
+Loan risk model for AutoSyndicate™
+Feature extraction, registry artifacts and vectorized inference
+"""
+
+from typing import List, Dict, Any, Optional
+from datetime import datetime
+import numpy as np
+
+from models.registry import ModelRegistry, LoadedArtifact
+
+# The request's riskScore is never a feature: it is this model's own
+# output, so feeding it back would let a stored score confirm itself
+FEATURES = [
+    "interestRate",
+    "term",
+    "logAmount",
+    "esgScore",
+    "creditRatingRank",
+]
+# Columns of models trained before riskScore was dropped; served at the
+# neutral "not provided" values
+LEGACY_FEATURES = {"riskScore": 0.5, "riskScoreMissing": 1.0}
+
+# S&P-style rating ladder, 1 = AAA ... 22 = D
+CREDIT_RATINGS = [
+    "AAA", "AA+", "AA", "AA-", "A+", "A", "A-",
+    "BBB+", "BBB", "BBB-", "BB+", "BB", "BB-",
+    "B+", "B", "B-", "CCC+", "CCC", "CCC-", "CC", "C", "D",
+]  # fmt: skip
+CREDIT_RATING_RANK = {rating: rank for rank, rating in enumerate(CREDIT_RATINGS, 1)}
+UNRATED_RANK = CREDIT_RATING_RANK["BB+"]
+DEFAULT_ESG_SCORE = 50.0
+
+# Risk scores on the rule-based 0-1 scale, whose 0.3 / 0.6 cut-offs split
+# Low / Medium / High risk. A trained model maps its default probability
+# onto that scale by placing the cut-offs at these quantiles of the
+# training book's PD: the riskiest 40% are Medium or worse, 10% High.
+SCORE_CUTOFFS = (0.3, 0.6)
+CUTOFF_QUANTILES = (0.6, 0.9)
+# Cut-off PDs for models published without a calibration
+DEFAULT_CUTOFF_PD = (0.02, 0.10)
+
+RISK_MODEL_NAME = "risk"
+
+
+def _feature_values(loan: Dict[str, Any]) -> Dict[str, float]:
+    esg_score = loan.get("esgScore")
+    rating = (loan.get("creditRating") or "").strip().upper()
+    return {
+        "interestRate": loan.get("interestRate") or 0.0,
+        "term": loan.get("term") or 0.0,
+        "logAmount": np.log1p(max(loan.get("amount") or 0.0, 0.0)),
+        "esgScore": DEFAULT_ESG_SCORE if esg_score is None else esg_score,
+        "creditRatingRank": CREDIT_RATING_RANK.get(rating, UNRATED_RANK),
+        **LEGACY_FEATURES,
+    }
+
+
+def loan_features(
+    loans: List[Dict[str, Any]], features: Optional[List[str]] = None
+) -> np.ndarray:
+    """Build the (n_loans, n_features) design matrix from LoanRequest dicts"""
+    features = features or FEATURES
+    X = np.empty((len(loans), len(features)), dtype=np.float64)
+    for idx, loan in enumerate(loans):
+        values = _feature_values(loan)
+        X[idx] = [values[name] for name in features]
+    return X
+
+
+def _logit(p: np.ndarray) -> np.ndarray:
+    p = np.clip(p, 1e-9, 1 - 1e-9)
+    return np.log(p / (1 - p))
+
+
+def score_calibration(pd: np.ndarray) -> Dict[str, List[float]]:
+    """Logit anchors that put SCORE_CUTOFFS at CUTOFF_QUANTILES of pd"""
+    return {
+        "logits": _logit(np.quantile(pd, CUTOFF_QUANTILES)).tolist(),
+        "scores": list(SCORE_CUTOFFS),
+    }
+
+
+class RiskModel:
+    """
+    Trained default-probability model
+
+    Serving only needs the standard scaler + logistic regression parameters,
+    so they are published to the model registry as .npy arrays and scored
+    with a single matrix-vector product straight off the mapped pages.
+
+    predict returns the default probability; risk_score maps it onto the
+    rule-based 0-1 scale with the calibration stored in the version's
+    metadata, so category bands mean the same with or without a model.
+    """
+
+    def __init__(
+        self,
+        mean: np.ndarray,
+        scale: np.ndarray,
+        coef: np.ndarray,
+        intercept: float,
+        metadata: Dict[str, Any],
+    ):
+        self.mean = mean
+        self.scale = scale
+        self.coef = coef
+        self.intercept = float(intercept)
+        self.metadata = metadata
+        self.version = metadata.get("version", "unknown")
+        self.features: List[str] = list(metadata.get("features") or FEATURES)
+        calibration = metadata.get("scoreCalibration") or {
+            "logits": _logit(np.array(DEFAULT_CUTOFF_PD)).tolist(),
+            "scores": list(SCORE_CUTOFFS),
+        }
+        self.cutoff_logits = np.asarray(calibration["logits"], dtype=np.float64)
+        self.cutoff_scores = np.asarray(calibration["scores"], dtype=np.float64)
+
+    def design(self, loans: List[Dict[str, Any]]) -> np.ndarray:
+        """Design matrix in the column order this version was trained on"""
+        return loan_features(loans, self.features)
+
+    @classmethod
+    def from_pipeline(cls, pipeline: Any, metadata: Dict[str, Any]) -> "RiskModel":
+        """Lift the parameters out of a fitted scaler + classifier pipeline"""
+        scaler = pipeline.named_steps["scaler"]
+        classifier = pipeline.named_steps["classifier"]
+        return cls(
+            np.asarray(scaler.mean_, dtype=np.float64),
+            np.asarray(scaler.scale_, dtype=np.float64),
+            np.asarray(classifier.coef_[0], dtype=np.float64),
+            float(classifier.intercept_[0]),
+            metadata,
+        )
+
+    @classmethod
+    def from_artifact(cls, artifact: LoadedArtifact) -> "RiskModel":
+        """Build a model over memory-mapped registry arrays"""
+        arrays = artifact.arrays
+        return cls(
+            arrays["mean"],
+            arrays["scale"],
+            arrays["coef"],
+            float(arrays["intercept"][0]),
+            artifact.metadata,
+        )
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """Default probability per row of the design matrix"""
+        logits = ((X - self.mean) / self.scale) @ self.coef + self.intercept
+        return 1.0 / (1.0 + np.exp(-logits))
+
+    def risk_score(self, pd: np.ndarray) -> np.ndarray:
+        """
+        Default probabilities on the rule-based 0-1 risk score scale
+
+        Linear in logit(PD) through the two calibrated cut-offs, clipped to
+        [0, 1], so the 0.3 / 0.6 category bands apply unchanged.
+        """
+        (l_low, l_high), (s_low, s_high) = self.cutoff_logits, self.cutoff_scores
+        slope = (s_high - s_low) / max(l_high - l_low, 1e-9)
+        return np.clip(s_low + (_logit(np.asarray(pd)) - l_low) * slope, 0.0, 1.0)
+
+    def contributions(self, x: np.ndarray) -> Dict[str, float]:
+        """Per-feature logit contributions for one loan"""
+        values = (x - self.mean) / self.scale * self.coef
+        return {name: round(float(v), 4) for name, v in zip(self.features, values)}
+
+    def save(self, registry: ModelRegistry) -> str:
+        """Publish as a new registry version and point LATEST at it"""
+        return registry.publish(
+            RISK_MODEL_NAME,
+            self.version,
+            {
+                "mean": self.mean,
+                "scale": self.scale,
+                "coef": self.coef,
+                "intercept": np.array([self.intercept]),
+            },
+            self.metadata,
+        )
+
+    @classmethod
+    def load(cls, registry: ModelRegistry) -> Optional["RiskModel"]:
+        """Current model from the registry, or None if none is published"""
+        artifact = registry.get(RISK_MODEL_NAME, cls.from_artifact)
+        return artifact.model if artifact else None
+
+
+def train_risk_model(
+    X: np.ndarray, y: np.ndarray, version: Optional[str] = None
+) -> RiskModel:
+    """Fit the scaler + logistic regression pipeline and record metrics"""
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import StandardScaler
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.model_selection import train_test_split
+    from sklearn.metrics import roc_auc_score
+
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=0.2, random_state=42, stratify=y
+    )
+    pipeline = Pipeline(
+        [
+            ("scaler", StandardScaler()),
+            ("classifier", LogisticRegression(max_iter=1000)),
+        ]
+    )
+    pipeline.fit(X_train, y_train)
+    auc = roc_auc_score(y_test, pipeline.predict_proba(X_test)[:, 1])
+
+    metadata = {
+        "version": version or datetime.utcnow().strftime("%Y%m%d%H%M%S"),
+        "features": FEATURES,
+        "scoreCalibration": score_calibration(pipeline.predict_proba(X_train)[:, 1]),
+        "trainedAt": datetime.utcnow().isoformat(),
+        "samples": int(len(y)),
+        "positiveRate": float(np.mean(y)),
+        "testAuc": float(auc),
+    }
+    return RiskModel.from_pipeline(pipeline, metadata)
@@ -0,0 +1,434 @@
+"""
+Covenant monitoring engine for AutoSyndicate™
+Evaluates every covenant in the book as one columnar batch, keeps O(1)
+incremental per-covenant state, and publishes status changes on a schedule
+"""
+
+from typing import List, Dict, Any, Optional, Callable, Awaitable, Tuple
+from contextlib import closing
+from dataclasses import dataclass
+from datetime import date, timedelta
+import os
+import time
+import asyncio
+import sqlite3
+import numpy as np
+
+from realtime.manager import event_topic, loan_topic
+
+DEFAULT_INTERVAL_SECONDS = 300
+DEFAULT_THRESHOLD = 1.25
+AT_RISK_PROBABILITY = 0.3
+STABLE_SLOPE = 0.01  # Slope below 1% of threshold per period counts as stable
+MIN_VOLATILITY = 0.05  # Volatility floor as a fraction of the threshold
+LEVEL_SMOOTHING = 0.5  # Holt smoothing factors for incremental covenant state
+TREND_SMOOTHING = 0.3
+
+# Covenants expressed as a ceiling (value must stay at or below threshold).
+# Everything else is treated as a floor (e.g. DSCR, interest cover).
+MAXIMUM_COVENANT_KEYWORDS = ("leverage", "debt to", "debt/", "gearing", "capex", "ltv")
+
+CHECK_INTERVAL_DAYS = {
+    "MONTHLY": 30,
+    "QUARTERLY": 91,
+    "SEMI_ANNUALLY": 182,
+    "ANNUALLY": 365,
+}
+
+
+def covenant_direction(name: str, covenant_type: str = "") -> float:
+    """+1 for floor covenants, -1 for ceiling covenants"""
+    text = f"{name} {covenant_type}".lower()
+    return -1.0 if any(k in text for k in MAXIMUM_COVENANT_KEYWORDS) else 1.0
+
+
+def next_check_date(frequency: Optional[str], today: Optional[date] = None) -> str:
+    days = CHECK_INTERVAL_DAYS.get((frequency or "QUARTERLY").upper(), 91)
+    return ((today or date.today()) + timedelta(days=days)).isoformat()
+
+
+def normal_cdf(x: np.ndarray) -> np.ndarray:
+    """Standard normal CDF via the Abramowitz-Stegun erf approximation"""
+    z = np.abs(x) / np.sqrt(2.0)
+    t = 1.0 / (1.0 + 0.3275911 * z)
+    poly = t * (
+        0.254829592
+        + t * (-0.284496736 + t * (1.421413741 + t * (-1.453152027 + t * 1.061405429)))
+    )
+    erf = 1.0 - poly * np.exp(-z * z)
+    return 0.5 * (1.0 + np.sign(x) * erf)
+
+
+@dataclass
+class CovenantAssessment:
+    """Vectorized evaluation output, one entry per covenant in the batch"""
+
+    current: np.ndarray
+    headroom: np.ndarray
+    slope: np.ndarray
+    breach_probability: np.ndarray
+    statuses: List[str]
+    trends: List[str]
+
+
+def assess_covenant_state(
+    current: np.ndarray,
+    slope: np.ndarray,
+    sigma: np.ndarray,
+    thresholds: np.ndarray,
+    directions: np.ndarray,
+    has_data: np.ndarray,
+    stored_statuses: List[str],
+) -> CovenantAssessment:
+    """Classify covenants from their latest value, trend and volatility"""
+    scale = np.maximum(np.abs(thresholds), 1e-9)
+    sigma = np.maximum(sigma, MIN_VOLATILITY * scale)
+
+    headroom = directions * (current - thresholds) / scale
+    forecast = current + slope
+    breach_probability = normal_cdf(-directions * (forecast - thresholds) / sigma)
+    # Covenants without observations keep their stored status
+    breach_probability = np.where(has_data, breach_probability, 0.0)
+
+    statuses = np.where(
+        headroom < 0,
+        "BREACH",
+        np.where(breach_probability > AT_RISK_PROBABILITY, "AT_RISK", "COMPLIANT"),
+    )
+    statuses = np.where(has_data, statuses, np.array(stored_statuses, dtype=object))
+    relative_slope = directions * slope / scale
+    trends = np.where(
+        np.abs(relative_slope) < STABLE_SLOPE,
+        "stable",
+        np.where(relative_slope > 0, "improving", "deteriorating"),
+    )
+
+    return CovenantAssessment(
+        current=current,
+        headroom=headroom,
+        slope=slope,
+        breach_probability=breach_probability,
+        statuses=statuses.tolist(),
+        trends=trends.tolist(),
+    )
+
+
+class CovenantStatsStore:
+    """
+    Incremental per-covenant statistics in growable NumPy columns
+
+    Each covenant owns one slot. observe() updates that slot in O(1):
+    Welford running mean/variance, Holt (EWMA level + trend) smoothing and an
+    exponentially weighted variance of one-step forecast errors. assess()
+    classifies every tracked covenant from this state alone, so cost per
+    observation and per prediction stays flat however long the history is.
+    """
+
+    # Columns whose unregistered slots are not zero
+    _FILL = {"_thresholds": DEFAULT_THRESHOLD, "_directions": 1.0}
+
+    def __init__(
+        self,
+        level_smoothing: float = LEVEL_SMOOTHING,
+        trend_smoothing: float = TREND_SMOOTHING,
+        capacity: int = 1024,
+    ):
+        self.level_smoothing = level_smoothing
+        self.trend_smoothing = trend_smoothing
+        self.index: Dict[str, int] = {}
+        self.ids: List[str] = []
+        self.loan_ids: List[Optional[str]] = []
+        self.names: List[str] = []
+        self.frequencies: List[str] = []
+        self.statuses: List[str] = []
+        self._capacity = capacity
+        self._thresholds = np.full(capacity, self._FILL["_thresholds"])
+        self._directions = np.full(capacity, self._FILL["_directions"])
+        self._count = np.zeros(capacity, dtype=np.int64)
+        self._mean = np.zeros(capacity)
+        self._m2 = np.zeros(capacity)
+        self._level = np.zeros(capacity)
+        self._trend = np.zeros(capacity)
+        self._error_var = np.zeros(capacity)
+        self._last = np.zeros(capacity)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, covenant_id: str) -> bool:
+        return covenant_id in self.index
+
+    @property
+    def thresholds(self) -> np.ndarray:
+        return self._thresholds[: len(self.ids)]
+
+    @property
+    def directions(self) -> np.ndarray:
+        return self._directions[: len(self.ids)]
+
+    def _grow(self):
+        self._capacity *= 2
+        for name in (
+            "_thresholds",
+            "_directions",
+            "_count",
+            "_mean",
+            "_m2",
+            "_level",
+            "_trend",
+            "_error_var",
+            "_last",
+        ):
+            column = getattr(self, name)
+            grown = np.full(self._capacity, self._FILL.get(name, 0), dtype=column.dtype)
+            grown[: len(column)] = column
+            setattr(self, name, grown)
+
+    def register(self, covenant: Dict[str, Any]) -> int:
+        """Add or refresh a covenant's metadata and return its slot"""
+        covenant_id = covenant["id"]
+        slot = self.index.get(covenant_id)
+        if slot is None:
+            slot = len(self.ids)
+            if slot == self._capacity:
+                self._grow()
+            self.index[covenant_id] = slot
+            self.ids.append(covenant_id)
+            self.loan_ids.append(None)
+            self.names.append("")
+            self.frequencies.append("QUARTERLY")
+            self.statuses.append("COMPLIANT")
+
+        if covenant.get("loanRequestId"):
+            self.loan_ids[slot] = covenant["loanRequestId"]
+        if covenant.get("name"):
+            self.names[slot] = covenant["name"]
+        if covenant.get("frequency"):
+            self.frequencies[slot] = covenant["frequency"]
+        if covenant.get("status"):
+            self.statuses[slot] = covenant["status"]
+        if covenant.get("threshold") is not None:
+            self._thresholds[slot] = covenant["threshold"]
+        if covenant.get("name") or covenant.get("type"):
+            self._directions[slot] = covenant_direction(
+                covenant.get("name") or "", covenant.get("type") or ""
+            )
+        return slot
+
+    def observe(self, covenant_id: str, value: float) -> int:
+        """Fold one CovenantCheck value into the covenant's state in O(1)"""
+        slot = self.index.get(covenant_id)
+        if slot is None:
+            slot = self.register({"id": covenant_id})
+
+        value = float(value)
+        n = self._count[slot] + 1
+        self._count[slot] = n
+
+        delta = value - self._mean[slot]
+        self._mean[slot] += delta / n
+        self._m2[slot] += delta * (value - self._mean[slot])
+
+        if n == 1:
+            self._level[slot] = value
+            self._trend[slot] = 0.0
+        else:
+            alpha, beta = self.level_smoothing, self.trend_smoothing
+            level, trend = self._level[slot], self._trend[slot]
+            error = value - (level + trend)
+            new_level = alpha * value + (1 - alpha) * (level + trend)
+            self._trend[slot] = beta * (new_level - level) + (1 - beta) * trend
+            self._level[slot] = new_level
+            self._error_var[slot] += alpha * (error * error - self._error_var[slot])
+
+        self._last[slot] = value
+        return slot
+
+    def stats(self, covenant_id: str) -> Dict[str, Any]:
+        slot = self.index[covenant_id]
+        n = int(self._count[slot])
+        return {
+            "covenantId": covenant_id,
+            "observations": n,
+            "mean": float(self._mean[slot]),
+            "variance": float(self._m2[slot] / (n - 1)) if n > 1 else 0.0,
+            "level": float(self._level[slot]),
+            "trend": float(self._trend[slot]),
+            "lastValue": float(self._last[slot]),
+        }
+
+    def assess(self, slots: Optional[List[int]] = None) -> CovenantAssessment:
+        """Classify tracked covenants (all, or the given slots) from their state"""
+        n = len(self.ids)
+        select = slice(0, n) if slots is None else np.asarray(slots, dtype=np.intp)
+        stored = self.statuses if slots is None else [self.statuses[i] for i in slots]
+        count = self._count[select]
+        has_data = count > 0
+        thresholds = self._thresholds[select]
+        return assess_covenant_state(
+            current=np.where(has_data, self._last[select], thresholds),
+            slope=self._trend[select],
+            sigma=np.sqrt(self._error_var[select]),
+            thresholds=thresholds,
+            directions=self._directions[select],
+            has_data=has_data,
+            stored_statuses=stored,
+        )
+
+
+class SqliteCovenantSource:
+    """
+    Reads covenants and new covenant checks from the Prisma SQLite database
+
+    Checks are append-only, so a rowid watermark lets each poll fetch only
+    the rows inserted since the previous one.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self.watermark = 0
+
+    @classmethod
+    def from_env(cls) -> Optional["SqliteCovenantSource"]:
+        url = os.getenv("DATABASE_URL", "")
+        if not url.startswith("file:"):
+            return None
+        return cls(url[len("file:") :])
+
+    def fetch_updates(self) -> Tuple[List[Dict[str, Any]], List[Tuple[str, float]]]:
+        """Return all covenant metadata and (covenantId, value) checks since last poll"""
+        with closing(sqlite3.connect(self.db_path)) as db:
+            covenants = db.execute(
+                "SELECT id, loanRequestId, name, type, threshold, frequency, status "
+                "FROM covenants"
+            ).fetchall()
+            checks = db.execute(
+                "SELECT rowid, covenantId, value FROM covenant_checks "
+                "WHERE rowid > ? ORDER BY rowid",
+                (self.watermark,),
+            ).fetchall()
+
+        if checks:
+            self.watermark = checks[-1][0]
+        records = [
+            {
+                "id": row[0],
+                "loanRequestId": row[1],
+                "name": row[2],
+                "type": row[3],
+                "threshold": row[4],
+                "frequency": row[5],
+                "status": row[6],
+            }
+            for row in covenants
+        ]
+        return records, [(covenant_id, value) for _, covenant_id, value in checks]
+
+
+class CovenantMonitor:
+    """
+    Periodic covenant evaluation that publishes only status changes
+
+    Each run folds new checks into the incremental stats store and then
+    assesses the whole book from that state. The first run compares
+    against the status stored with each covenant; later runs compare
+    against the previous evaluation.
+    """
+
+    def __init__(
+        self,
+        store: CovenantStatsStore,
+        fetch_updates: Callable[
+            [], Tuple[List[Dict[str, Any]], List[Tuple[str, float]]]
+        ],
+        publish: Callable[[List[str], Dict[str, Any]], Awaitable[None]],
+        interval: float = DEFAULT_INTERVAL_SECONDS,
+    ):
+        self.store = store
+        self.fetch_updates = fetch_updates
+        self.publish = publish
+        self.interval = interval
+        self.last_status: Dict[str, str] = {}
+        self.last_run: Dict[str, Any] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run_forever())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def _run_forever(self):
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Error in covenant monitor: {e}")
+            await asyncio.sleep(self.interval)
+
+    async def run_once(self) -> Dict[str, Any]:
+        started = time.perf_counter()
+        # Database I/O off the event loop; state updates stay on it
+        covenants, checks = await asyncio.to_thread(self.fetch_updates)
+        book = self.store
+        for covenant in covenants:
+            book.register(covenant)
+        for covenant_id, value in checks:
+            book.observe(covenant_id, value)
+        assessment = book.assess()
+
+        changes = 0
+        for idx, covenant_id in enumerate(book.ids):
+            status = assessment.statuses[idx]
+            previous = self.last_status.get(covenant_id, book.statuses[idx])
+            self.last_status[covenant_id] = status
+            if status != previous:
+                changes += 1
+                await self._publish_change(book, assessment, idx, previous)
+
+        self.last_run = {
+            "covenants": len(book),
+            "observations": len(checks),
+            "changes": changes,
+            "breaches": assessment.statuses.count("BREACH"),
+            "atRisk": assessment.statuses.count("AT_RISK"),
+            "durationMs": round((time.perf_counter() - started) * 1000, 3),
+            "completedAt": time.time(),
+        }
+        return self.last_run
+
+    async def _publish_change(
+        self,
+        batch: CovenantStatsStore,
+        assessment: CovenantAssessment,
+        idx: int,
+        previous: str,
+    ):
+        status = assessment.statuses[idx]
+        event_type = "BREACH_ALERT" if status == "BREACH" else "COVENANT_STATUS"
+        name = batch.names[idx]
+        value = float(assessment.current[idx])
+        threshold = float(batch.thresholds[idx])
+        payload = {
+            "type": event_type,
+            "covenantId": batch.ids[idx],
+            "loanId": batch.loan_ids[idx],
+            "covenant": name,
+            "status": status,
+            "previousStatus": previous,
+            "value": round(value, 4),
+            "threshold": threshold,
+            "breachProbability": round(float(assessment.breach_probability[idx]), 4),
+            "trend": assessment.trends[idx],
+            "priority": {"BREACH": "CRITICAL", "AT_RISK": "HIGH"}.get(status, "INFO"),
+            "message": f"{name} moved from {previous} to {status} ({value:.2f} vs limit {threshold:.2f}).",
+        }
+        topics = [event_topic(event_type)]
+        if batch.loan_ids[idx]:
+            topics.append(loan_topic(batch.loan_ids[idx]))
+        await self.publish(topics, payload)
@@ -0,0 +1,175 @@
+"""
+Pub/sub backplanes for AutoSyndicate™ WebSocket fan-out
+Carry broadcasts between API workers so every process delivers to the
+sockets it holds
+"""
+
+from typing import List, Dict, Any, Optional, Callable
+from abc import ABC, abstractmethod
+import json
+import asyncio
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:
+    aioredis = None
+
+# deliver(topics, payload): topics is None for a broadcast to every client
+Deliver = Callable[[Optional[List[str]], str], None]
+
+DEFAULT_CHANNEL = "autosyndicate:ws"
+RECONNECT_DELAY = 1.0
+
+
+class Backplane(ABC):
+    """
+    Transport between publishers and the local ConnectionManager
+
+    publish sends a serialized payload to every worker attached to the
+    backplane, including the sender; each worker's deliver callback then
+    fans it out to its own sockets.
+    """
+
+    name = "base"
+
+    def __init__(self):
+        self.deliver: Optional[Deliver] = None
+        self.published = 0
+        self.received = 0
+
+    def attach(self, deliver: Deliver):
+        self.deliver = deliver
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    @abstractmethod
+    async def publish(self, topics: Optional[List[str]], payload: str):
+        """Send payload to every attached worker; topics=None broadcasts"""
+
+    def _dispatch(self, topics: Optional[List[str]], payload: str):
+        self.received += 1
+        if self.deliver is not None:
+            self.deliver(topics, payload)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.name,
+            "published": self.published,
+            "received": self.received,
+        }
+
+
+class InProcessBackplane(Backplane):
+    """Single-process default: publishing delivers straight to local sockets"""
+
+    name = "in-process"
+
+    async def publish(self, topics: Optional[List[str]], payload: str):
+        self.published += 1
+        self._dispatch(topics, payload)
+
+
+class MemoryBroker:
+    """Stand-in for an external broker, shared by several backplanes in one process"""
+
+    def __init__(self):
+        self.backplanes: List["MemoryBackplane"] = []
+
+
+class MemoryBackplane(Backplane):
+    """
+    Backplane over a MemoryBroker
+
+    Lets tests run several ConnectionManagers as if they were separate
+    workers behind a real broker.
+    """
+
+    name = "memory"
+
+    def __init__(self, broker: MemoryBroker):
+        super().__init__()
+        self.broker = broker
+
+    async def start(self):
+        if self not in self.broker.backplanes:
+            self.broker.backplanes.append(self)
+
+    async def stop(self):
+        if self in self.broker.backplanes:
+            self.broker.backplanes.remove(self)
+
+    async def publish(self, topics: Optional[List[str]], payload: str):
+        self.published += 1
+        for backplane in list(self.broker.backplanes):
+            backplane._dispatch(topics, payload)
+
+
+class RedisBackplane(Backplane):
+    """
+    Redis pub/sub backplane for multi-worker and multi-pod deployments
+
+    Every worker subscribes to one channel; envelopes carry the topic list
+    and the already-serialized payload.
+    """
+
+    name = "redis"
+
+    def __init__(self, url: str, channel: str = DEFAULT_CHANNEL):
+        super().__init__()
+        if aioredis is None:
+            raise RuntimeError(
+                "Redis backplane requires the 'redis' package (poetry install -E realtime)"
+            )
+        self.url = url
+        self.channel = channel
+        self._redis = None
+        self._listener: Optional[asyncio.Task] = None
+
+    async def start(self):
+        self._redis = aioredis.from_url(self.url)
+        self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        if self._listener:
+            self._listener.cancel()
+            self._listener = None
+        if self._redis:
+            await self._redis.aclose()
+            self._redis = None
+
+    async def publish(self, topics: Optional[List[str]], payload: str):
+        self.published += 1
+        envelope = json.dumps({"topics": topics, "payload": payload})
+        await self._redis.publish(self.channel, envelope)
+
+    async def _listen(self):
+        while True:
+            pubsub = self._redis.pubsub()
+            try:
+                await pubsub.subscribe(self.channel)
+                async for message in pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    envelope = json.loads(message["data"])
+                    self._dispatch(envelope.get("topics"), envelope["payload"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Redis backplane error, reconnecting: {e!r}")
+                await asyncio.sleep(RECONNECT_DELAY)
+            finally:
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+
+
+def backplane_from_url(url: Optional[str]) -> Backplane:
+    """Pick a backplane from WS_BACKPLANE_URL (redis://... or empty)"""
+    if url and url.startswith(("redis://", "rediss://")):
+        return RedisBackplane(url)
+    return InProcessBackplane()
@@ -0,0 +1,365 @@
+"""
+WebSocket connection management for AutoSyndicate™
+Per-client bounded send queues so one slow socket cannot stall broadcasts,
+and a topic index so publishes only touch interested subscribers
+"""
+
+from typing import List, Dict, Any, Optional, Union, Set, Iterable
+import os
+import json
+import time
+import asyncio
+from fastapi import WebSocket
+
+from realtime.backplane import Backplane, InProcessBackplane, backplane_from_url
+
+BACKPRESSURE_POLICIES = ("evict", "drop_oldest", "drop_newest")
+DEFAULT_QUEUE_SIZE = 256
+DEFAULT_SEND_TIMEOUT = 5.0
+DEFAULT_MAX_TOPICS = 64
+MAX_TOPIC_LENGTH = 128
+LATENCY_SMOOTHING = 0.2
+
+# Close code for clients evicted because they could not keep up
+WS_CLOSE_TRY_AGAIN_LATER = 1013
+
+# Wildcard topic: receives every published message. New clients join it
+# unless they connect with an explicit topic list.
+ALL_TOPICS = "*"
+
+
+def loan_topic(loan_id: str) -> str:
+    return f"loan:{loan_id}"
+
+
+def lender_topic(lender_id: str) -> str:
+    return f"lender:{lender_id}"
+
+
+def event_topic(event_type: str) -> str:
+    return f"event:{event_type}"
+
+
+def job_topic(job_id: str) -> str:
+    return f"job:{job_id}"
+
+
+def parse_topics(topics: Any) -> List[str]:
+    """
+    Topics from a control message: one string or a list of strings
+
+    Raises:
+        ValueError: If a topic is not a non-empty string of at most
+            MAX_TOPIC_LENGTH characters
+    """
+    if topics is None:
+        return []
+    if isinstance(topics, str):
+        topics = [topics]
+    if not isinstance(topics, list):
+        raise ValueError("topics must be a string or a list of strings")
+    for topic in topics:
+        if not isinstance(topic, str) or not topic:
+            raise ValueError("topics must be non-empty strings")
+        if len(topic) > MAX_TOPIC_LENGTH:
+            raise ValueError(f"Topics are limited to {MAX_TOPIC_LENGTH} characters")
+    return topics
+
+
+class ClientConnection:
+    """
+    One connected socket with its outbound queue and writer task
+
+    Messages are queued with their enqueue time so the writer can report
+    queue-to-wire delivery latency per client.
+    """
+
+    def __init__(self, websocket: WebSocket, client_id: str, queue_size: int):
+        self.websocket = websocket
+        self.client_id = client_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.writer: Optional[asyncio.Task] = None
+        self.topics: Set[str] = set()
+        self.connected_at = time.time()
+        self.sent = 0
+        self.dropped = 0
+        self.last_latency_ms = 0.0
+        self.avg_latency_ms = 0.0
+
+    def record_delivery(self, enqueued_at: float):
+        latency_ms = (time.perf_counter() - enqueued_at) * 1000
+        self.last_latency_ms = latency_ms
+        if self.sent == 0:
+            self.avg_latency_ms = latency_ms
+        else:
+            self.avg_latency_ms += LATENCY_SMOOTHING * (
+                latency_ms - self.avg_latency_ms
+            )
+        self.sent += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "clientId": self.client_id,
+            "connectedAt": self.connected_at,
+            "topics": sorted(self.topics),
+            "queued": self.queue.qsize(),
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "lastLatencyMs": round(self.last_latency_ms, 3),
+            "avgLatencyMs": round(self.avg_latency_ms, 3),
+        }
+
+
+class ConnectionManager:
+    """
+    WebSocket fan-out with per-client send queues
+
+    broadcast serializes a payload once and enqueues it on every client
+    without awaiting any socket. Each client has a writer task draining its
+    own bounded queue. When a queue is full the backpressure policy decides
+    what happens:
+
+    - evict: disconnect the slow client
+    - drop_oldest: discard the oldest queued message to make room
+    - drop_newest: discard the incoming message
+
+    Clients whose send fails or exceeds send_timeout are always evicted.
+
+    Clients subscribe to topics such as "loan:<id>", "lender:<id>" or
+    "event:BREACH_ALERT" by sending
+    {"action": "subscribe" | "unsubscribe", "topics": [...]}. publish looks
+    subscribers up in a topic index, so its cost scales with the number of
+    matching clients rather than with all open sockets. A client holds at
+    most max_topics topics; invalid or excess topics are answered with an
+    {"type": "ERROR"} frame and leave its subscriptions unchanged.
+
+    broadcast and publish go through a backplane so that, with several
+    workers, every process delivers the message to the sockets it holds.
+    The default backplane is in-process.
+    """
+
+    def __init__(
+        self,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        policy: str = "evict",
+        send_timeout: float = DEFAULT_SEND_TIMEOUT,
+        backplane: Optional[Backplane] = None,
+        max_topics: int = DEFAULT_MAX_TOPICS,
+    ):
+        if policy not in BACKPRESSURE_POLICIES:
+            raise ValueError(f"Unknown backpressure policy: {policy}")
+        self.queue_size = queue_size
+        self.policy = policy
+        self.send_timeout = send_timeout
+        self.max_topics = max_topics
+        self.active_connections: Dict[WebSocket, ClientConnection] = {}
+        self.subscribers: Dict[str, Set[ClientConnection]] = {}
+        self.evicted = 0
+        self.backplane = backplane or InProcessBackplane()
+        self.backplane.attach(self._deliver)
+
+    @classmethod
+    def from_env(cls) -> "ConnectionManager":
+        return cls(
+            queue_size=int(os.getenv("WS_QUEUE_SIZE", DEFAULT_QUEUE_SIZE)),
+            policy=os.getenv("WS_BACKPRESSURE_POLICY", "evict"),
+            send_timeout=float(os.getenv("WS_SEND_TIMEOUT", DEFAULT_SEND_TIMEOUT)),
+            backplane=backplane_from_url(os.getenv("WS_BACKPLANE_URL")),
+            max_topics=int(os.getenv("WS_MAX_TOPICS", DEFAULT_MAX_TOPICS)),
+        )
+
+    async def start(self):
+        await self.backplane.start()
+
+    async def stop(self):
+        await self.backplane.stop()
+        for websocket in list(self.active_connections):
+            self.disconnect(websocket)
+
+    async def connect(
+        self,
+        websocket: WebSocket,
+        client_id: str = "anonymous",
+        topics: Optional[Iterable[str]] = None,
+    ):
+        await websocket.accept()
+        connection = ClientConnection(websocket, client_id, self.queue_size)
+        connection.writer = asyncio.create_task(self._write_loop(connection))
+        self.active_connections[websocket] = connection
+        try:
+            self.subscribe(websocket, [ALL_TOPICS] if topics is None else topics)
+        except ValueError as e:
+            self._reject(connection, e)
+
+    def disconnect(self, websocket: WebSocket):
+        connection = self.active_connections.pop(websocket, None)
+        if connection is None:
+            return
+        self._unindex(connection, list(connection.topics))
+        if connection.writer is not asyncio.current_task():
+            connection.writer.cancel()
+
+    def subscribe(self, websocket: WebSocket, topics: Iterable[str]):
+        """
+        Add topics to a client's subscriptions, all or none
+
+        Raises:
+            ValueError: If a topic is invalid (see parse_topics) or the
+                client would exceed max_topics
+        """
+        connection = self.active_connections.get(websocket)
+        if connection is None:
+            return
+        topics = parse_topics(list(topics))
+        if len(connection.topics.union(topics)) > self.max_topics:
+            raise ValueError(
+                f"Subscriptions are limited to {self.max_topics} topics per client"
+            )
+        for topic in topics:
+            self.subscribers.setdefault(topic, set()).add(connection)
+            connection.topics.add(topic)
+
+    def unsubscribe(self, websocket: WebSocket, topics: Iterable[str]):
+        connection = self.active_connections.get(websocket)
+        if connection is not None:
+            self._unindex(connection, parse_topics(list(topics)))
+
+    def _unindex(self, connection: ClientConnection, topics: Iterable[str]):
+        for topic in topics:
+            connection.topics.discard(topic)
+            subscribers = self.subscribers.get(topic)
+            if subscribers is not None:
+                subscribers.discard(connection)
+                if not subscribers:
+                    del self.subscribers[topic]
+
+    async def handle_message(self, websocket: WebSocket, text: str):
+        """Apply a subscribe/unsubscribe control message; other text is ignored"""
+        try:
+            message = json.loads(text)
+        except ValueError:
+            return
+        if not isinstance(message, dict):
+            return
+
+        action = message.get("action")
+        if action not in ("subscribe", "unsubscribe"):
+            return
+        connection = self.active_connections.get(websocket)
+        if connection is None:
+            return
+        try:
+            topics = parse_topics(message.get("topics"))
+            if action == "subscribe":
+                self.subscribe(websocket, topics)
+            else:
+                self.unsubscribe(websocket, topics)
+        except ValueError as e:
+            self._reject(connection, e)
+        else:
+            self._offer(
+                connection,
+                json.dumps(
+                    {"type": "SUBSCRIPTIONS", "topics": sorted(connection.topics)}
+                ),
+            )
+
+    def _reject(self, connection: ClientConnection, error: ValueError):
+        self._offer(
+            connection,
+            json.dumps(
+                {
+                    "type": "ERROR",
+                    "detail": str(error),
+                    "topics": sorted(connection.topics),
+                }
+            ),
+        )
+
+    async def send_personal_message(
+        self, message: Union[str, Dict[str, Any]], websocket: WebSocket
+    ):
+        connection = self.active_connections.get(websocket)
+        if connection:
+            self._offer(connection, self._serialize(message))
+
+    async def broadcast(self, message: Union[str, Dict[str, Any]]):
+        """Deliver to every connected client regardless of subscriptions"""
+        await self.backplane.publish(None, self._serialize(message))
+
+    async def publish(self, topics: Iterable[str], message: Union[str, Dict[str, Any]]):
+        """Deliver once to each client subscribed to any of the topics"""
+        await self.backplane.publish(list(topics), self._serialize(message))
+
+    def _deliver(self, topics: Optional[List[str]], payload: str):
+        """Backplane callback: fan a payload out to this process's sockets"""
+        if topics is None:
+            recipients = list(self.active_connections.values())
+        else:
+            recipients = set(self.subscribers.get(ALL_TOPICS, ()))
+            for topic in topics:
+                recipients.update(self.subscribers.get(topic, ()))
+        for connection in recipients:
+            self._offer(connection, payload)
+
+    @staticmethod
+    def _serialize(message: Union[str, Dict[str, Any]]) -> str:
+        return message if isinstance(message, str) else json.dumps(message)
+
+    def _offer(self, connection: ClientConnection, payload: str):
+        item = (time.perf_counter(), payload)
+        try:
+            connection.queue.put_nowait(item)
+            return
+        except asyncio.QueueFull:
+            pass
+
+        if self.policy == "evict":
+            self._evict(connection)
+        elif self.policy == "drop_oldest":
+            connection.queue.get_nowait()
+            connection.queue.put_nowait(item)
+            connection.dropped += 1
+        else:
+            connection.dropped += 1
+
+    async def _write_loop(self, connection: ClientConnection):
+        while True:
+            enqueued_at, payload = await connection.queue.get()
+            try:
+                await asyncio.wait_for(
+                    connection.websocket.send_text(payload), self.send_timeout
+                )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Evicting WebSocket client {connection.client_id}: {e!r}")
+                self._evict(connection)
+                return
+            connection.record_delivery(enqueued_at)
+
+    def _evict(self, connection: ClientConnection):
+        if connection.websocket not in self.active_connections:
+            return
+        self.disconnect(connection.websocket)
+        self.evicted += 1
+        asyncio.create_task(self._close(connection.websocket))
+
+    @staticmethod
+    async def _close(websocket: WebSocket):
+        try:
+            await websocket.close(code=WS_CLOSE_TRY_AGAIN_LATER)
+        except Exception:
+            # Socket already gone
+            pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "connections": len(self.active_connections),
+            "policy": self.policy,
+            "queueSize": self.queue_size,
+            "evicted": self.evicted,
+            "backplane": self.backplane.stats(),
+            "topics": {topic: len(subs) for topic, subs in self.subscribers.items()},
+            "clients": [c.stats() for c in self.active_connections.values()],
+        }
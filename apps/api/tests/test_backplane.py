@@ -0,0 +1,83 @@
+import asyncio
+import json
+
+import pytest
+
+from realtime.backplane import Backplane, MemoryBackplane, MemoryBroker
+from realtime.manager import ConnectionManager
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent = []
+        self.closed = None
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text: str):
+        self.sent.append(json.loads(text))
+
+    async def close(self, code: int = 1000):
+        self.closed = code
+
+
+async def drain():
+    # Let the per-client writer tasks flush their queues
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+@pytest.fixture
+async def workers():
+    broker = MemoryBroker()
+    managers = [ConnectionManager(backplane=MemoryBackplane(broker)) for _ in range(2)]
+    for manager in managers:
+        await manager.start()
+    yield managers
+    for manager in managers:
+        await manager.stop()
+
+
+def test_backplane_is_abstract():
+    with pytest.raises(TypeError):
+        Backplane()
+
+
+async def test_publish_reaches_subscribers_on_other_workers(workers):
+    first, second = workers
+    loan_socket, lender_socket = FakeWebSocket(), FakeWebSocket()
+    await first.connect(loan_socket, topics=["loan:1"])
+    await second.connect(lender_socket, topics=["lender:7"])
+
+    await first.publish(["lender:7"], {"type": "ALLOCATION", "lenderId": "7"})
+    await drain()
+
+    assert loan_socket.sent == []
+    assert lender_socket.sent == [{"type": "ALLOCATION", "lenderId": "7"}]
+    assert first.backplane.published == 1
+    assert second.backplane.received == 1
+
+
+async def test_broadcast_reaches_every_worker(workers):
+    sockets = [FakeWebSocket(), FakeWebSocket()]
+    for manager, socket in zip(workers, sockets):
+        await manager.connect(socket, topics=[])
+
+    await workers[1].broadcast({"type": "PING"})
+    await drain()
+
+    assert [s.sent for s in sockets] == [[{"type": "PING"}], [{"type": "PING"}]]
+
+
+async def test_stopped_backplane_no_longer_receives(workers):
+    first, second = workers
+    socket = FakeWebSocket()
+    await second.connect(socket)
+    await second.backplane.stop()
+
+    await first.broadcast({"type": "PING"})
+    await drain()
+
+    assert socket.sent == []
+    assert first.backplane.broker.backplanes == [first.backplane]
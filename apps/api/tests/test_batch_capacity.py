@@ -0,0 +1,100 @@
+import numpy as np
+import pytest
+
+from agents.crew_agents import AllocatorAgent
+from engine.candidates import LenderIndex, ticket_band
+from engine.scoring import LenderMatrix
+
+LOAN_AMOUNT = 5e7
+
+
+def lender(prefix: str, i: int, sector: str):
+    return {
+        "id": f"{prefix}{i}",
+        "institutionName": f"{prefix}{i}",
+        "riskAppetite": "MODERATE",
+        "minInvestment": 1e6,
+        "maxInvestment": 1e7,
+        "preferredSectors": [sector],
+    }
+
+
+@pytest.fixture
+def matrix():
+    # A small pool of sector specialists in front of a large generalist pool
+    lenders = [lender("E", i, "Energy") for i in range(60)]
+    lenders += [lender("R", i, "Retail") for i in range(940)]
+    return LenderMatrix(lenders)
+
+
+def energy_loan(i: int):
+    return {
+        "id": f"loan-{i}",
+        "amount": LOAN_AMOUNT,
+        "purpose": "Energy plant",
+        "riskScore": 0.5,
+    }
+
+
+def test_candidates_skip_exhausted_lenders(matrix):
+    index = LenderIndex(matrix)
+    capacity = matrix.max_investment.copy()
+    capacity[:60] = 0.0
+
+    positions = index.candidates(energy_loan(0), capacity)
+
+    assert len(positions) > 0
+    assert (capacity[positions] >= matrix.min_investment[positions]).all()
+    assert (positions >= 60).all()
+
+
+def test_batch_keeps_allocating_after_specialists_run_out(matrix):
+    agent = AllocatorAgent()
+    index = LenderIndex(matrix)
+    capacity = matrix.max_investment.copy()
+
+    allocated = [
+        agent.optimize(energy_loan(i), matrix, {}, capacity, index)["allocated"]
+        for i in range(20)
+    ]
+
+    # 60 specialists x 1e7 cover the first 12 loans; the rest must fall back
+    assert allocated == pytest.approx([LOAN_AMOUNT] * 20)
+    assert (capacity >= -1e-6).all()
+    assert capacity.sum() == pytest.approx(
+        matrix.max_investment.sum() - 20 * LOAN_AMOUNT
+    )
+
+
+def test_index_and_full_scan_agree_on_a_fresh_book(matrix):
+    agent = AllocatorAgent()
+    loan = energy_loan(0)
+
+    full_scan = agent.optimize(loan, matrix, {}, matrix.max_investment.copy(), None)
+    shortlisted = agent.optimize(
+        loan, matrix, {}, matrix.max_investment.copy(), LenderIndex(matrix)
+    )
+
+    assert shortlisted["allocated"] == full_scan["allocated"]
+    assert np.isclose(shortlisted["allocated"], LOAN_AMOUNT)
+
+
+def test_unmatched_sectors_are_read_without_walking_the_vocabulary():
+    # Every lender has its own sector, so the vocabulary is as large as the book
+    matrix = LenderMatrix(
+        [lender("S", i, f"Sector {i}") for i in range(5000)]
+        + [{**lender("M", 0, "Sector 1"), "preferredSectors": ["Sector 1", "Sector 2"]}]
+    )
+    index = LenderIndex(matrix)
+    loan = {"id": "loan", "amount": LOAN_AMOUNT, "purpose": "General corporate"}
+
+    tiers = list(index._tiers(loan))
+    positions = index.candidates(loan)
+
+    buckets = len(index.risk_buckets(0.5))
+    assert len(tiers) == (ticket_band(LOAN_AMOUNT) + 1) * 2 * buckets
+    assert len(positions) >= index.min_candidates
+    assert (matrix.min_investment[positions] <= LOAN_AMOUNT).all()
+    # A lender preferring several sectors is posted once per band
+    other = index.other_postings[("MODERATE", 6)]
+    assert len(other) == len(np.unique(other)) == 5001
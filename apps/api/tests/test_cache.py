@@ -0,0 +1,97 @@
+import asyncio
+
+from agents.cache import ResponseCache, cached_ainvoke
+from agents.singleflight import SingleFlight
+
+
+class FakeChain:
+    def __init__(self, delay: float = 0.0):
+        self.calls = 0
+        self.delay = delay
+
+    async def ainvoke(self, inputs):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return {"echo": inputs["text"], "call": self.calls}
+
+
+def test_make_key_ignores_input_order_but_not_namespace():
+    key = ResponseCache.make_key("t", {"a": 1, "b": 2}, "groq")
+    assert key == ResponseCache.make_key("t", {"b": 2, "a": 1}, "groq")
+    assert key != ResponseCache.make_key("t", {"a": 1, "b": 2}, "gemini")
+    assert key != ResponseCache.make_key("u", {"a": 1, "b": 2}, "groq")
+
+
+async def test_memory_tier_evicts_least_recently_used():
+    cache = ResponseCache(max_entries=2)
+    await cache.set("a", 1)
+    await cache.set("b", 2)
+    assert await cache.get("a") == 1
+    await cache.set("c", 3)
+
+    assert await cache.get("b") is None
+    assert await cache.get("a") == 1
+    assert await cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+async def test_expired_entries_are_misses():
+    cache = ResponseCache(ttl_seconds=-1)
+    await cache.set("a", 1)
+
+    assert await cache.get("a") is None
+    assert cache.stats()["misses"] == 1
+
+
+async def test_sqlite_tier_survives_a_restart(tmp_path):
+    path = str(tmp_path / "llm_cache.db")
+    first = ResponseCache(db_path=path)
+    await first.set("k", {"borrower": "Acme", "covenants": [1.25]})
+    first.close()
+
+    second = ResponseCache(db_path=path)
+    assert await second.get("k") == {"borrower": "Acme", "covenants": [1.25]}
+    assert await second.get("k") == {"borrower": "Acme", "covenants": [1.25]}
+    assert second.stats()["diskHits"] == 1
+    assert second.stats()["hits"] == 1
+    second.close()
+
+
+async def test_sqlite_tier_is_bounded(tmp_path):
+    cache = ResponseCache(
+        max_entries=1, db_path=str(tmp_path / "llm_cache.db"), max_disk_entries=3
+    )
+    for i in range(5):
+        await cache.set(f"k{i}", i)
+
+    assert await cache.get("k0") is None
+    assert await cache.get("k4") == 4
+    assert await cache.get("k2") == 2
+    cache.close()
+
+
+async def test_cached_ainvoke_reuses_and_coalesces_responses():
+    cache, chain, flight = ResponseCache(), FakeChain(delay=0.01), SingleFlight()
+
+    results = await asyncio.gather(
+        *(
+            cached_ainvoke(cache, chain, "t", {"text": "x"}, inflight=flight)
+            for _ in range(4)
+        )
+    )
+    again = await cached_ainvoke(cache, chain, "t", {"text": "x"}, inflight=flight)
+
+    assert chain.calls == 1
+    assert results == [{"echo": "x", "call": 1}] * 4
+    assert again == {"echo": "x", "call": 1}
+
+
+async def test_bypass_cache_refreshes_the_entry():
+    cache, chain = ResponseCache(), FakeChain()
+    await cached_ainvoke(cache, chain, "t", {"text": "x"})
+
+    fresh = await cached_ainvoke(cache, chain, "t", {"text": "x"}, bypass_cache=True)
+    cached = await cached_ainvoke(cache, chain, "t", {"text": "x"})
+
+    assert fresh == cached == {"echo": "x", "call": 2}
+    assert chain.calls == 2
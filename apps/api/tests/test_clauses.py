@@ -0,0 +1,98 @@
+import pytest
+
+from documents.clauses import extract_clauses
+from documents.ingestion import chunk_pages
+
+AGREEMENT = """THIS AGREEMENT is dated 1 March 2024 and made between Northwind Energy \
+Holdings Limited (the "Borrower") and the Lenders.
+1. The Facility. The Lenders make available a term loan facility in an aggregate \
+amount of USD 250,000,000.
+2. Interest. The Margin is 2.75 per cent per annum.
+3. Repayment. The Termination Date is the date falling 60 months after the date of \
+this Agreement.
+21.2 Financial condition. The Borrower shall ensure that Leverage shall not exceed \
+3.50:1 in respect of each Relevant Period, tested quarterly.
+The Interest Cover Ratio shall not be less than 4.00x, tested semi-annually.
+"""
+
+
+def test_extracts_standard_lma_clauses():
+    result = extract_clauses([AGREEMENT])
+
+    assert result.data["borrower"] == "Northwind Energy Holdings Limited"
+    assert result.data["loanAmount"] == 250_000_000
+    assert result.data["interestRate"] == 2.75
+    assert result.data["term"] == 60
+    assert result.data["covenants"] == [
+        {
+            "type": "FINANCIAL",
+            "name": "Leverage Ratio",
+            "threshold": 3.5,
+            "frequency": "QUARTERLY",
+        },
+        {
+            "type": "FINANCIAL",
+            "name": "Interest Coverage Ratio",
+            "threshold": 4.0,
+            "frequency": "SEMI_ANNUALLY",
+        },
+    ]
+    assert result.low_confidence_fields() == []
+
+
+def test_scaled_amounts_and_years_are_normalised():
+    result = extract_clauses(
+        ["The total commitments are EUR 1.2bn. The facility has a tenor of 5 years."]
+    )
+
+    assert result.data["loanAmount"] == pytest.approx(1.2e9)
+    assert result.data["term"] == 60
+
+
+def test_agreement_across_chunks_raises_confidence():
+    single = extract_clauses([AGREEMENT])
+    repeated = extract_clauses([AGREEMENT, "Facility amount: USD 250 million."])
+
+    assert repeated.data["loanAmount"] == 250_000_000
+    assert repeated.confidence["loanAmount"] > single.confidence["loanAmount"]
+
+
+def test_conflicting_values_lower_confidence():
+    result = extract_clauses(
+        ["The Margin is 2.75 per cent.", "The Margin is 3.25 per cent."]
+    )
+
+    assert result.confidence["interestRate"] < 0.8
+    assert "interestRate" in result.low_confidence_fields()
+
+
+def test_covenant_without_stated_frequency_is_less_confident():
+    result = extract_clauses(["Leverage shall not exceed 3.00x."])
+
+    assert result.data["covenants"][0]["frequency"] == "QUARTERLY"
+    assert result.confidence["covenants"] < 0.8
+
+
+def test_missing_fields_are_left_to_the_llm():
+    result = extract_clauses(["Schedule 4. Conditions precedent. Clause 21.2 applies."])
+
+    assert result.data == {}
+    assert result.low_confidence_fields() == [
+        "borrower",
+        "loanAmount",
+        "term",
+        "interestRate",
+        "covenants",
+    ]
+
+
+def test_chunks_overlap_so_split_clauses_are_seen_whole():
+    pages = [f"Page {i} " + "x" * 90 for i in range(10)]
+
+    chunks = list(chunk_pages(pages, max_chars=250, overlap=40))
+
+    assert len(chunks) > 1
+    assert chunks[0].first_page == 1
+    assert chunks[-1].last_page == 10
+    for previous, chunk in zip(chunks, chunks[1:]):
+        assert chunk.text.startswith(previous.text[-40:])
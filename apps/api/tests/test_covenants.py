@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from monitoring.covenants import DEFAULT_THRESHOLD, CovenantStatsStore
+
+
+def test_growth_keeps_default_threshold_and_direction():
+    store = CovenantStatsStore(capacity=2)
+    for i in range(5):
+        store.register({"id": f"cov-{i}"})
+
+    assert store._capacity == 8
+    assert store.thresholds.tolist() == [DEFAULT_THRESHOLD] * 5
+    assert store.directions.tolist() == [1.0] * 5
+    # Unused slots past the registered ones carry the defaults too
+    assert (store._thresholds == DEFAULT_THRESHOLD).all()
+    assert (store._directions == 1.0).all()
+
+
+def test_growth_preserves_existing_state():
+    store = CovenantStatsStore(capacity=1)
+    store.register({"id": "lev", "name": "Leverage Ratio", "threshold": 3.5})
+    for value in (2.0, 2.5, 3.0):
+        store.observe("lev", value)
+    before = store.stats("lev")
+
+    store.register({"id": "dscr", "name": "Debt Service Coverage", "threshold": 1.2})
+
+    assert store.stats("lev") == before
+    assert store.thresholds.tolist() == [3.5, 1.2]
+    assert store.directions.tolist() == [-1.0, 1.0]
+
+
+def test_observe_keeps_welford_and_holt_state():
+    store = CovenantStatsStore(capacity=1)
+    values = [1.8, 1.7, 1.6, 1.5]
+    for value in values:
+        store.observe("dscr", value)
+
+    stats = store.stats("dscr")
+    assert stats["observations"] == 4
+    assert stats["mean"] == pytest.approx(np.mean(values))
+    assert stats["variance"] == pytest.approx(np.var(values, ddof=1))
+    assert stats["lastValue"] == 1.5
+    assert stats["trend"] < 0
+
+
+def test_assess_classifies_from_incremental_state():
+    store = CovenantStatsStore(capacity=1)
+    store.register({"id": "healthy", "name": "DSCR", "threshold": 1.25})
+    store.register({"id": "falling", "name": "DSCR", "threshold": 1.25})
+    store.register({"id": "breached", "name": "Leverage Ratio", "threshold": 3.0})
+    store.register({"id": "unseen", "threshold": 2.0, "status": "WAIVED"})
+    for value in (2.5, 2.5, 2.6):
+        store.observe("healthy", value)
+    for value in (1.6, 1.45, 1.3):
+        store.observe("falling", value)
+    store.observe("breached", 3.4)
+
+    assessment = store.assess()
+
+    assert assessment.statuses == ["COMPLIANT", "AT_RISK", "BREACH", "WAIVED"]
+    assert assessment.trends[1] == "deteriorating"
+    assert assessment.breach_probability[3] == 0.0
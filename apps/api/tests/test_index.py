@@ -0,0 +1,101 @@
+import pytest
+
+from documents import index as clause_index
+from documents.index import (
+    MAX_CLAUSE_CHARS,
+    MIN_CLAUSE_CHARS,
+    ClauseIndex,
+    HashingEmbedder,
+    clause_type,
+    split_clauses,
+)
+
+FACILITY = """1. Financial covenants. The Borrower shall ensure that Leverage shall not \
+exceed 3.50:1 in respect of each Relevant Period.
+
+2. Interest cover. The Borrower shall ensure that the Interest Cover Ratio shall not \
+be less than 4.00x on each test date.
+
+3. Negative pledge. No Obligor shall create or permit to subsist any Security over \
+any of its assets, save for Permitted Security."""
+
+
+@pytest.fixture(params=["matrix", "qdrant"])
+def index(request, monkeypatch):
+    if request.param == "matrix":
+        # The fallback used when qdrant-client is not installed
+        monkeypatch.setattr(clause_index, "QdrantClient", None)
+    elif clause_index.QdrantClient is None:
+        pytest.skip("qdrant-client is not installed")
+    index = ClauseIndex(HashingEmbedder(256))
+    yield index
+    index.close()
+
+
+def test_nearest_clause_ranks_first(index):
+    assert index.index_document("https://a/facility.pdf", "FACILITY", [FACILITY]) == 3
+
+    hits = index.search("maximum leverage ratio each relevant period", limit=2)
+
+    assert len(hits) == 2
+    assert hits[0]["clauseType"] == "Leverage Ratio"
+    assert hits[0]["documentUrl"] == "https://a/facility.pdf"
+    assert hits[0]["score"] > hits[1]["score"]
+
+
+def test_reindexing_a_document_upserts_in_place(index):
+    index.index_document("https://a/facility.pdf", "FACILITY", [FACILITY])
+    # Overlapping chunks and a re-parse repeat the same clauses
+    index.index_document("https://a/facility.pdf", "FACILITY", [FACILITY, FACILITY])
+    index.index_document("https://b/facility.pdf", "FACILITY", [FACILITY])
+
+    assert len(index) == 6
+
+
+def test_filters_restrict_results(index):
+    index.index_document("https://a/facility.pdf", "FACILITY", [FACILITY])
+    index.index_document("https://b/term-sheet.pdf", "TERM_SHEET", [FACILITY])
+
+    hits = index.search(
+        "leverage", limit=10, filters={"documentType": "TERM_SHEET", "clauseType": ""}
+    )
+    assert {hit["documentUrl"] for hit in hits} == {"https://b/term-sheet.pdf"}
+    assert len(hits) == 3
+
+    hits = index.search("security", filters={"clauseType": "Leverage Ratio"})
+    assert {hit["clauseType"] for hit in hits} == {"Leverage Ratio"}
+
+
+def test_empty_index_returns_nothing(index):
+    assert index.search("leverage") == []
+    assert index.stats()["clauses"] == 0
+
+
+def test_matrix_index_grows_past_its_initial_capacity(monkeypatch):
+    monkeypatch.setattr(clause_index, "QdrantClient", None)
+    index = ClauseIndex(HashingEmbedder(64))
+    clauses = [
+        f"Clause {i}. The Borrower shall deliver compliance certificate number {i} "
+        f"within {i} days of each quarter end."
+        for i in range(1500)
+    ]
+
+    index.index_document("https://a/big.pdf", "FACILITY", ["\n\n".join(clauses)])
+
+    assert len(index) == 1500
+    assert len(index._vectors) == 2048
+    assert index.search(clauses[1234], limit=1)[0]["text"] == clauses[1234]
+    assert index.stats()["backend"] == "in-process"
+
+
+def test_split_clauses_merges_short_pieces_and_caps_long_ones():
+    clauses = split_clauses("Short. Also short.\n\n" + "x" * (MAX_CLAUSE_CHARS + 10))
+
+    assert all(len(c) <= MAX_CLAUSE_CHARS for c in clauses)
+    assert clauses[0].startswith("Short. Also short. x")
+    assert len(clauses[0]) >= MIN_CLAUSE_CHARS
+
+
+def test_clause_type_uses_covenant_aliases():
+    assert clause_type("Leverage shall not exceed 3.00x") == "Leverage Ratio"
+    assert clause_type("Conditions precedent") == "GENERAL"
@@ -0,0 +1,109 @@
+import os
+
+import httpcore
+import httpx
+import pytest
+
+from documents import ingestion
+from documents.ingestion import (
+    DocumentTooLarge,
+    DocumentURLRejected,
+    PublicAddressBackend,
+    check_document_url,
+    document_client,
+    document_error_status,
+    download_document,
+)
+
+PUBLIC = "93.184.216.34"
+
+
+def resolving(*answers):
+    """Stub resolver returning each answer in turn, repeating the last"""
+    answers = list(answers)
+
+    async def resolve(host, port):
+        return answers.pop(0) if len(answers) > 1 else answers[0]
+
+    return resolve
+
+
+@pytest.mark.parametrize(
+    "address",
+    ["127.0.0.1", "::1", "10.0.0.5", "192.168.1.10", "169.254.169.254", "fe80::1"],
+)
+async def test_internal_addresses_are_rejected(monkeypatch, address):
+    monkeypatch.setattr(ingestion, "_resolve", resolving([PUBLIC, address]))
+
+    with pytest.raises(DocumentURLRejected) as info:
+        await check_document_url("https://docs.example.com/agreement.pdf")
+    assert document_error_status(info.value) == 400
+
+
+@pytest.mark.parametrize(
+    "url", ["file:///etc/passwd", "ftp://docs.example.com/a.pdf", "https:///a.pdf"]
+)
+async def test_only_http_urls_with_a_host_are_fetched(url):
+    with pytest.raises(DocumentURLRejected):
+        await check_document_url(url)
+
+
+async def test_allowlist_replaces_the_address_check(monkeypatch):
+    monkeypatch.setattr(ingestion, "_resolve", resolving(["10.0.0.5"]))
+
+    await check_document_url("https://files.corp.example/a.pdf", ["corp.example"])
+    with pytest.raises(DocumentURLRejected):
+        await check_document_url("https://docs.example.com/a.pdf", ["corp.example"])
+
+
+class RecordingBackend(httpcore.AsyncNetworkBackend):
+    def __init__(self):
+        self.connected = []
+
+    async def connect_tcp(self, host, port, **kwargs):
+        self.connected.append((host, port))
+        raise httpcore.ConnectError("recorded")
+
+    async def connect_unix_socket(self, path, **kwargs):
+        raise NotImplementedError
+
+    async def sleep(self, seconds):
+        pass
+
+
+async def test_connections_go_to_the_checked_address(monkeypatch):
+    monkeypatch.setattr(ingestion, "_resolve", resolving([PUBLIC]))
+    inner = RecordingBackend()
+
+    with pytest.raises(httpcore.ConnectError):
+        await PublicAddressBackend(inner).connect_tcp("docs.example.com", 443)
+    assert inner.connected == [(PUBLIC, 443)]
+
+
+async def test_rebinding_after_the_url_check_is_refused(monkeypatch, tmp_path):
+    # Public when the URL is checked, loopback when the connection resolves
+    monkeypatch.setattr(ingestion, "_resolve", resolving([PUBLIC], ["127.0.0.1"]))
+
+    async with document_client() as client:
+        with pytest.raises(DocumentURLRejected):
+            await download_document(
+                client, "http://docs.example.com/a.pdf", str(tmp_path)
+            )
+    assert os.listdir(tmp_path) == []
+
+
+async def test_oversized_documents_are_cut_off(tmp_path):
+    def handler(request):
+        return httpx.Response(200, content=b"x" * 300_000)
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        with pytest.raises(DocumentTooLarge) as info:
+            await download_document(
+                client,
+                "https://docs.example.com/a.pdf",
+                str(tmp_path),
+                max_bytes=100_000,
+                allowed_hosts=["docs.example.com"],
+            )
+    assert document_error_status(info.value) == 413
+    assert os.listdir(tmp_path) == []
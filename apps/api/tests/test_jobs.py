@@ -0,0 +1,136 @@
+import asyncio
+import threading
+
+import pytest
+
+from documents.jobs import FAILED, RUNNING, SUCCEEDED, JobQueue
+
+
+class Handler:
+    """Records calls and fails the first `failures` with `error`"""
+
+    def __init__(self, failures: int = 0, error: Exception = ConnectionError("reset")):
+        self.failures = failures
+        self.error = error
+        self.calls = 0
+
+    async def __call__(self, payload):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise self.error
+        return {"parsed": payload["documentUrl"]}
+
+
+def queue(tmp_path, handler, workers: int = 2, **kwargs) -> JobQueue:
+    finished = asyncio.Queue()
+
+    async def notify(job):
+        await finished.put(job)
+
+    q = JobQueue(
+        handler,
+        workers=workers,
+        backoff_seconds=0.01,
+        db_path=str(tmp_path / "jobs.db"),
+        notify=notify,
+        **kwargs,
+    )
+    q.finished = finished
+    return q
+
+
+async def test_job_is_claimed_once_across_queues(tmp_path):
+    first = queue(tmp_path, Handler(), workers=0)
+    second = queue(tmp_path, Handler(), workers=0)
+    await first.start()
+    await second.start()
+    job = await first.submit({"documentUrl": "a"})
+
+    # Leased to its submitter: the other queue cannot take it
+    assert not await second._claim(await second.get(job.id))
+    assert await first._claim(job)
+    # Each claim is one attempt; a running job is not claimed again
+    assert not await first._claim(job)
+    assert not await second._claim(await second.get(job.id))
+    stored = await second.get(job.id)
+    assert (stored.status, stored.owner, stored.attempts) == (RUNNING, first.owner, 1)
+    await first.stop()
+    await second.stop()
+
+
+async def test_lapsed_lease_is_taken_over(tmp_path):
+    dead = queue(tmp_path, Handler(), workers=0, lease_seconds=0.05)
+    await dead.start()
+    job = await dead.submit({"documentUrl": "a"})
+    # The owning process dies after its claim, before finishing the attempt
+    assert await dead._claim(job)
+    assert (await dead.get(job.id)).status == RUNNING
+
+    survivor = queue(tmp_path, Handler())
+    await survivor.start()
+    assert survivor.finished.empty()
+    await asyncio.sleep(0.1)
+    await survivor._enqueue_abandoned()
+    done = await asyncio.wait_for(survivor.finished.get(), 5)
+
+    assert done.status == SUCCEEDED
+    assert done.owner == survivor.owner
+    assert done.attempts == 2
+    await survivor.stop()
+    await dead.stop()
+
+
+async def test_transient_failures_are_retried(tmp_path):
+    handler = Handler(failures=2)
+    q = queue(tmp_path, handler)
+    await q.start()
+    job = await q.submit({"documentUrl": "a"})
+    done = await asyncio.wait_for(q.finished.get(), 5)
+
+    assert done.status == SUCCEEDED
+    assert handler.calls == 3
+    assert q.retried == 2
+    assert (await q.get(job.id)).result == {"parsed": "a"}
+    await q.stop()
+
+
+@pytest.mark.parametrize(
+    "failures, error, attempts",
+    [
+        (1, ValueError("bad document"), 1),  # bad input fails at once
+        (5, ConnectionError("reset"), 3),  # out of attempts
+    ],
+)
+async def test_final_status_is_persisted(tmp_path, failures, error, attempts):
+    q = queue(tmp_path, Handler(failures, error))
+    await q.start()
+    job = await q.submit({"documentUrl": "a"})
+    done = await asyncio.wait_for(q.finished.get(), 5)
+    await q.stop()
+
+    reader = queue(tmp_path, Handler())
+    await reader.start()
+    stored = await reader.get(job.id)
+    assert done.status == stored.status == FAILED
+    assert stored.attempts == attempts
+    assert stored.error == str(error)
+    await reader.stop()
+
+
+async def test_database_calls_run_off_the_event_loop(tmp_path):
+    q = queue(tmp_path, Handler())
+    threads = []
+    write_row = q._write_row
+
+    def record(row):
+        threads.append(threading.current_thread())
+        write_row(row)
+
+    q._write_row = record
+    await q.start()
+    await q.submit({"documentUrl": "a"})
+    await asyncio.wait_for(q.finished.get(), 5)
+    await q.stop()
+
+    assert threads
+    assert threading.main_thread() not in threads
@@ -0,0 +1,99 @@
+import asyncio
+import json
+
+import pytest
+
+from realtime.manager import MAX_TOPIC_LENGTH, ConnectionManager
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text: str):
+        self.sent.append(json.loads(text))
+
+    async def close(self, code: int = 1000):
+        pass
+
+
+@pytest.fixture
+async def manager():
+    manager = ConnectionManager(max_topics=3)
+    await manager.start()
+    yield manager
+    await manager.stop()
+
+
+async def control(manager, websocket, message) -> dict:
+    await manager.handle_message(websocket, json.dumps(message))
+    for _ in range(5):
+        await asyncio.sleep(0)
+    return websocket.sent[-1]
+
+
+async def test_subscribe_acknowledges_topics(manager):
+    websocket = FakeWebSocket()
+    await manager.connect(websocket, topics=[])
+
+    reply = await control(
+        manager, websocket, {"action": "subscribe", "topics": "loan:1"}
+    )
+
+    assert reply == {"type": "SUBSCRIPTIONS", "topics": ["loan:1"]}
+    assert manager.subscribers["loan:1"]
+
+
+@pytest.mark.parametrize(
+    "topics",
+    [
+        [{}],
+        [["loan:1"]],
+        [1],
+        [""],
+        {"loan:1": True},
+        ["x" * (MAX_TOPIC_LENGTH + 1)],
+    ],
+)
+@pytest.mark.parametrize("action", ["subscribe", "unsubscribe"])
+async def test_invalid_topics_get_an_error_frame(manager, action, topics):
+    websocket = FakeWebSocket()
+    await manager.connect(websocket, topics=["loan:1"])
+
+    reply = await control(manager, websocket, {"action": action, "topics": topics})
+
+    assert reply["type"] == "ERROR"
+    assert reply["topics"] == ["loan:1"]
+    assert websocket in manager.active_connections
+    assert set(manager.subscribers) == {"loan:1"}
+
+
+async def test_topics_per_connection_are_capped(manager):
+    websocket = FakeWebSocket()
+    await manager.connect(websocket, topics=["loan:1", "loan:2"])
+
+    reply = await control(
+        manager, websocket, {"action": "subscribe", "topics": ["loan:3", "loan:4"]}
+    )
+
+    # All or nothing: neither topic is added
+    assert reply["type"] == "ERROR"
+    assert reply["topics"] == ["loan:1", "loan:2"]
+    # Re-subscribing held topics does not count against the cap
+    reply = await control(
+        manager, websocket, {"action": "subscribe", "topics": ["loan:1", "loan:3"]}
+    )
+    assert reply["topics"] == ["loan:1", "loan:2", "loan:3"]
+
+
+async def test_invalid_initial_topics_leave_the_client_connected(manager):
+    websocket = FakeWebSocket()
+    await manager.connect(websocket, topics=["loan:1", ""])
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+    assert websocket.sent[-1]["type"] == "ERROR"
+    assert manager.active_connections[websocket].topics == set()
@@ -0,0 +1,93 @@
+import numpy as np
+import pytest
+
+from engine.optimizer import AllocationConstraints, solve_allocation
+
+
+def test_from_dict_defaults():
+    constraints = AllocationConstraints.from_dict(None)
+    assert constraints == AllocationConstraints(5, None, 0.0)
+
+
+@pytest.mark.parametrize("value, expected", [(0.25, 0.25), (25, 0.25), ("40", 0.4)])
+def test_from_dict_accepts_fractions_and_percentages(value, expected):
+    constraints = AllocationConstraints.from_dict({"maxConcentration": value})
+    assert constraints.max_concentration == pytest.approx(expected)
+
+
+def test_from_dict_keeps_at_least_one_lender():
+    constraints = AllocationConstraints.from_dict(
+        {"maxLenders": 0, "minMatchScore": "0.5"}
+    )
+    assert constraints.max_lenders == 1
+    assert constraints.min_match_score == 0.5
+
+
+def test_fills_in_score_order_within_ticket_bounds():
+    plan = solve_allocation(
+        100.0,
+        scores=np.array([0.9, 0.8, 0.7]),
+        min_ticket=np.array([10.0, 10.0, 10.0]),
+        max_ticket=np.array([50.0, 30.0, 60.0]),
+        constraints=AllocationConstraints(),
+    )
+
+    assert plan.indices.tolist() == [0, 1, 2]
+    assert plan.amounts.tolist() == [50.0, 30.0, 20.0]
+    assert plan.shortfall == 0.0
+    assert plan.coverage == 1.0
+
+
+def test_concentration_cap_limits_every_ticket():
+    plan = solve_allocation(
+        100.0,
+        scores=np.array([0.9, 0.8, 0.7, 0.6, 0.5]),
+        min_ticket=np.zeros(5),
+        max_ticket=np.full(5, np.inf),
+        constraints=AllocationConstraints(max_lenders=5, max_concentration=0.25),
+    )
+
+    assert plan.amounts.max() <= 25.0
+    assert plan.allocated == pytest.approx(100.0)
+    assert len(plan.indices) == 4
+
+
+def test_lender_limit_swaps_in_larger_tickets():
+    # The two best-scored lenders cannot cover the loan on their own
+    plan = solve_allocation(
+        100.0,
+        scores=np.array([0.9, 0.8, 0.7, 0.6]),
+        min_ticket=np.zeros(4),
+        max_ticket=np.array([20.0, 20.0, 80.0, 60.0]),
+        constraints=AllocationConstraints(max_lenders=2),
+    )
+
+    assert len(plan.indices) == 2
+    assert plan.allocated == pytest.approx(100.0)
+    assert 2 in plan.indices
+
+
+def test_min_match_score_and_min_tickets_exclude_lenders():
+    plan = solve_allocation(
+        50.0,
+        scores=np.array([0.9, 0.2, 0.8]),
+        min_ticket=np.array([10.0, 0.0, 60.0]),
+        max_ticket=np.array([30.0, 50.0, 100.0]),
+        constraints=AllocationConstraints(min_match_score=0.5),
+    )
+
+    # Lender 1 scores too low, lender 2's minimum exceeds the loan
+    assert plan.indices.tolist() == [0]
+    assert plan.shortfall == pytest.approx(20.0)
+
+
+def test_nothing_to_allocate():
+    plan = solve_allocation(
+        0.0,
+        np.array([0.9]),
+        np.zeros(1),
+        np.ones(1),
+        AllocationConstraints(),
+    )
+    assert len(plan.indices) == 0
+    assert plan.coverage == 0.0
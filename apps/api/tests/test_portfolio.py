@@ -0,0 +1,114 @@
+import json
+import os
+
+import pytest
+
+from analytics.portfolio import JOURNAL_FILE, BookLocked, PortfolioBook
+
+
+def fill(book: PortfolioBook):
+    book.accept("a1", "loan-1", "lender-1", 6e6, "Energy")
+    book.accept("a2", "loan-1", "lender-2", 4e6, "Energy")
+    book.accept("a3", "loan-2", "lender-1", 10e6, "Retail")
+    book.repay("loan-1", 5e6)
+
+
+def snapshot(book: PortfolioBook):
+    return (
+        book.total,
+        book.sectors.amounts,
+        book.lenders.amounts,
+        book.concentration(),
+    )
+
+
+async def test_running_aggregates_track_accepts_and_repayments():
+    book = PortfolioBook(path=None)
+    fill(book)
+
+    assert book.total == pytest.approx(15e6)
+    assert book.sectors.amounts == pytest.approx({"Energy": 5e6, "Retail": 10e6})
+    assert book.lenders.amounts == pytest.approx({"lender-1": 13e6, "lender-2": 2e6})
+    # (5/15)^2 + (10/15)^2 of 10,000
+    assert book.concentration()["sectorHHI"] == pytest.approx(5555.6)
+
+    assert book.repay("loan-2") == pytest.approx(10e6)
+    assert "loan-2" not in book.loans
+    assert book.sectors.amounts == pytest.approx({"Energy": 5e6})
+    with pytest.raises(KeyError):
+        book.repay("loan-2")
+
+
+async def test_journal_is_replayed_after_a_crash(tmp_path):
+    path = str(tmp_path)
+    book = PortfolioBook(path, checkpoint_interval=0)
+    fill(book)
+    expected = snapshot(book)
+    # Simulate a crash: no checkpoint, lock released with the process
+    book._journal.close()
+    book._lockfile.close()
+
+    restored = PortfolioBook(path, checkpoint_interval=0)
+    assert snapshot(restored) == pytest.approx(expected)
+    assert restored.seq == 4
+    await restored.stop()
+
+
+async def test_checkpoint_plus_journal_tail_restores_the_book(tmp_path):
+    path = str(tmp_path)
+    book = PortfolioBook(path, checkpoint_interval=0)
+    fill(book)
+    book.checkpoint()
+    book.accept("a4", "loan-3", "lender-3", 2e6, "Healthcare")
+    expected = snapshot(book)
+    book._journal.close()
+    book._lockfile.close()
+
+    restored = PortfolioBook(path, checkpoint_interval=0)
+    assert snapshot(restored) == pytest.approx(expected)
+    assert restored.seq == 5
+    await restored.stop()
+
+
+async def test_torn_journal_tail_is_dropped(tmp_path):
+    path = str(tmp_path)
+    book = PortfolioBook(path, checkpoint_interval=0)
+    book.accept("a1", "loan-1", "lender-1", 6e6, "Energy")
+    book._journal.write('{"op": "accept", "allocationId": "a2"')
+    book._journal.close()
+    book._lockfile.close()
+
+    restored = PortfolioBook(path, checkpoint_interval=0)
+    assert list(restored.positions) == ["a1"]
+    await restored.stop()
+    with open(os.path.join(path, JOURNAL_FILE)) as f:
+        assert [json.loads(line)["seq"] for line in f] == [1]
+
+
+async def test_second_process_on_the_same_directory_fails_fast(tmp_path):
+    book = PortfolioBook(str(tmp_path), checkpoint_interval=0)
+    with pytest.raises(BookLocked):
+        PortfolioBook(str(tmp_path), checkpoint_interval=0)
+    await book.stop()
+
+    reopened = PortfolioBook(str(tmp_path), checkpoint_interval=0)
+    await reopened.stop()
+
+
+def test_persistence_is_opt_in(monkeypatch):
+    monkeypatch.delenv("PORTFOLIO_BOOK_DIR", raising=False)
+
+    assert PortfolioBook.from_env().path is None
+    assert PortfolioBook().stats()["persistent"] is False
+
+
+async def test_journal_appends_are_fsynced(tmp_path, monkeypatch):
+    book = PortfolioBook(str(tmp_path), checkpoint_interval=0)
+    synced = []
+    monkeypatch.setattr(os, "fsync", synced.append)
+
+    book.accept("a1", "loan-1", "lender-1", 6e6, "Energy")
+    book.repay("loan-1")
+
+    assert synced == [book._journal.fileno()] * 2
+    await book.stop()
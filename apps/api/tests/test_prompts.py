@@ -0,0 +1,50 @@
+from agents.prompts import PromptBuilder, estimate_tokens
+
+TEMPLATE = (
+    "Loan: {loan_data}\nConstraints: {constraints}\n{lender_profiles}\n{similar_deals}"
+)
+LOAN = {"id": "loan-1", "amount": 5e7, "term": 36, "creditRating": "BBB"}
+
+
+def make_lenders(n: int):
+    return [
+        {
+            "id": f"lender-{i}",
+            "institutionName": f"Bank {i}",
+            "riskAppetite": "MODERATE",
+            "minInvestment": 1e6,
+            "maxInvestment": 2e7,
+            "preferredSectors": ["Energy", "Infrastructure"],
+        }
+        for i in range(n)
+    ]
+
+
+def test_lender_cap_is_not_reported_as_budget_truncation():
+    lenders = make_lenders(30)
+    builder = PromptBuilder(TEMPLATE, max_tokens=100_000, max_lenders=10)
+
+    prompt = builder.build(LOAN, lenders, list(range(30)), [0.9] * 30)
+
+    assert len(prompt.lenders) == 10
+    assert prompt.truncated == 0
+    assert builder.stats()["truncatedCalls"] == 0
+
+
+def test_budget_drops_lowest_scored_lenders_first():
+    lenders = make_lenders(30)
+    builder = PromptBuilder(TEMPLATE, max_tokens=400, max_lenders=20)
+    positions = list(reversed(range(30)))
+
+    prompt = builder.build(LOAN, lenders, positions, [0.9] * 30)
+
+    assert 0 < len(prompt.lenders) < 20
+    assert prompt.lenders == positions[: len(prompt.lenders)]
+    assert prompt.truncated == 20 - len(prompt.lenders)
+    assert prompt.tokens <= 400
+    assert builder.stats()["truncatedCalls"] == 1
+
+
+def test_estimate_tokens_rounds_up():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("abcd") == 2
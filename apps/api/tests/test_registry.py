@@ -0,0 +1,59 @@
+import os
+
+import numpy as np
+
+from models.registry import LATEST_POINTER, ModelRegistry
+
+
+def publish(registry: ModelRegistry, version: str, value: float) -> str:
+    return registry.publish(
+        "risk", version, {"coef": np.full(3, value)}, {"trainedOn": version}
+    )
+
+
+def test_publish_switches_latest_and_workers_reload(tmp_path):
+    registry = ModelRegistry(str(tmp_path), check_interval=0)
+    worker = ModelRegistry(str(tmp_path), check_interval=0)
+    publish(registry, "v1", 1.0)
+    first = worker.get("risk", build=lambda a: float(a.arrays["coef"][0]))
+
+    publish(registry, "v2", 2.0)
+    second = worker.get("risk", build=lambda a: float(a.arrays["coef"][0]))
+
+    assert (first.version, first.model) == ("v1", 1.0)
+    assert (second.version, second.model) == ("v2", 2.0)
+    assert second.metadata == {"trainedOn": "v2", "version": "v2"}
+    assert (tmp_path / "risk" / LATEST_POINTER).read_text() == "v2"
+    # Nothing staged is left behind
+    assert sorted(os.listdir(tmp_path / "risk")) == [LATEST_POINTER, "v1", "v2"]
+
+
+def test_republishing_a_version_never_rewrites_a_live_directory(tmp_path):
+    registry = ModelRegistry(str(tmp_path), check_interval=0)
+    publish(registry, "v1", 1.0)
+    live = registry.get("risk")
+
+    path = publish(registry, "v1", 3.0)
+    reloaded = registry.get("risk")
+
+    assert os.path.basename(path) == "v1~1"
+    assert reloaded is not live
+    assert reloaded.version == "v1"
+    assert reloaded.arrays["coef"].tolist() == [3.0] * 3
+    # The replaced copy is gone, but its mapped arrays still read
+    assert sorted(os.listdir(tmp_path / "risk")) == [LATEST_POINTER, "v1~1"]
+    assert live.arrays["coef"].tolist() == [1.0] * 3
+
+    publish(registry, "v1", 4.0)
+    assert sorted(os.listdir(tmp_path / "risk")) == [LATEST_POINTER, "v1"]
+    assert registry.get("risk").arrays["coef"].tolist() == [4.0] * 3
+
+
+def test_broken_version_keeps_serving_the_previous_one(tmp_path):
+    registry = ModelRegistry(str(tmp_path), check_interval=0)
+    publish(registry, "v1", 1.0)
+    assert registry.get("risk").version == "v1"
+
+    (tmp_path / "risk" / LATEST_POINTER).write_text("missing")
+
+    assert registry.get("risk").version == "v1"
@@ -0,0 +1,103 @@
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from main import app, get_risk_model
+from models.risk import FEATURES, RiskModel, loan_features, train_risk_model
+from models.train_risk import synthetic_loans
+
+LOAN = {
+    "id": "loan-1",
+    "title": "Term loan",
+    "amount": 5e7,
+    "term": 36,
+    "interestRate": 6.0,
+    "purpose": "Working capital",
+}
+
+
+def rating_model() -> RiskModel:
+    """PD driven by the rating alone: logit = 0.5 * rank - 9.5"""
+    coef = np.zeros(len(FEATURES))
+    coef[FEATURES.index("creditRatingRank")] = 0.5
+    return RiskModel(
+        mean=np.zeros(len(FEATURES)),
+        scale=np.ones(len(FEATURES)),
+        coef=coef,
+        intercept=-9.5,
+        metadata={
+            "version": "test",
+            "features": FEATURES,
+            "scoreCalibration": {"logits": [-4.0, -2.0], "scores": [0.3, 0.6]},
+        },
+    )
+
+
+@pytest.fixture
+def client():
+    app.dependency_overrides[get_risk_model] = rating_model
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+@pytest.mark.parametrize(
+    "rating, category, recommendation",
+    [
+        # logit -8.5 -> score 0.0
+        ("AA+", "Low Risk", "Approve with standard terms"),
+        # logit -3.5 -> score 0.375
+        ("BB", "Medium Risk", "Approve with standard terms"),
+        # logit -1.5 -> score 0.675, PD only 18%
+        ("B-", "High Risk", "Approve with enhanced monitoring"),
+    ],
+)
+def test_model_scores_use_calibrated_bands(client, rating, category, recommendation):
+    response = client.post(
+        "/api/risk-assessment", json={**LOAN, "creditRating": rating}
+    )
+
+    body = response.json()
+    assert response.status_code == 200
+    assert body["riskCategory"] == category
+    assert body["recommendation"] == recommendation
+    assert body["factors"]["modelVersion"] == "test"
+    assert 0 < body["factors"]["defaultProbability"] < 0.2
+
+
+def test_batch_reports_score_and_probability(client):
+    response = client.post(
+        "/api/risk-assessment/batch",
+        json=[
+            {**LOAN, "creditRating": "AA+"},
+            {**LOAN, "id": "b", "creditRating": "B-"},
+        ],
+    )
+
+    results = response.json()["results"]
+    assert [r["riskCategory"] for r in results] == ["Low Risk", "High Risk"]
+    assert results[1]["defaultProbability"] == pytest.approx(1 / (1 + np.exp(1.5)))
+
+
+def test_risk_score_input_is_not_a_feature():
+    plain = loan_features([LOAN])
+    claimed = loan_features([{**LOAN, "riskScore": 0.99}])
+
+    assert "riskScore" not in FEATURES
+    np.testing.assert_array_equal(plain, claimed)
+
+
+def test_legacy_models_get_a_neutral_risk_score():
+    features = FEATURES + ["riskScore", "riskScoreMissing"]
+    X = loan_features([{**LOAN, "riskScore": 0.99}], features)
+
+    assert X[0, -2:].tolist() == [0.5, 1.0]
+
+
+def test_training_calibrates_bands_on_the_training_book():
+    X, y = synthetic_loans(5000)
+    model = train_risk_model(X, y, "synthetic")
+    scores = model.risk_score(model.predict(X))
+
+    assert model.metadata["scoreCalibration"]["scores"] == [0.3, 0.6]
+    assert np.mean(scores >= 0.3) == pytest.approx(0.4, abs=0.05)
+    assert np.mean(scores >= 0.6) == pytest.approx(0.1, abs=0.03)
@@ -0,0 +1,93 @@
+import numpy as np
+
+from engine.similar import REBUILD_THRESHOLD, SimilarDealIndex, deal_features
+
+
+def make_deal(i: int):
+    return {
+        "loan": {
+            "id": f"loan-{i}",
+            "amount": 1e6 * (1 + i % 97),
+            "term": 12 * (1 + i % 5),
+            "interestRate": 2.0 + (i % 13) / 2,
+            "creditRating": ["A", "BBB", "BB"][i % 3],
+            "purpose": ["solar farm", "retail expansion", "toll road"][i % 3],
+            "esgScore": 20.0 + i % 70,
+        },
+        "allocations": [{"lenderId": f"lender-{i % 7}", "percentage": 100.0}],
+    }
+
+
+def brute_force(index: SimilarDealIndex, loan, k: int) -> np.ndarray:
+    query = deal_features([loan], index.embedder)
+    return np.sort(np.linalg.norm(np.vstack(index._features) - query, axis=1))[:k]
+
+
+def test_recent_deals_are_searched_before_the_tree_is_rebuilt():
+    index = SimilarDealIndex([make_deal(i) for i in range(REBUILD_THRESHOLD)])
+    loan = make_deal(10_000)["loan"]
+    index.query(loan)
+    assert index.stats() == {
+        "deals": REBUILD_THRESHOLD,
+        "built": True,
+        "recent": 0,
+    }
+
+    index.add_deals([make_deal(10_000)])
+    similar = index.query(loan, k=3)
+
+    assert index.stats()["recent"] == 1
+    assert similar[0]["loanId"] == "loan-10000"
+    assert similar[0]["similarity"] == 1.0
+
+
+def test_mixed_tree_and_buffer_matches_brute_force():
+    index = SimilarDealIndex()
+    for i in range(REBUILD_THRESHOLD * 2 + 40):
+        index.add_deals([make_deal(i)])
+        if i % 50 == 0:
+            loan = make_deal(i * 31 + 5)["loan"]
+            distances, _ = index._nearest(loan, 5)
+            assert np.allclose(distances, brute_force(index, loan, 5))
+    assert 0 < index.stats()["recent"] < REBUILD_THRESHOLD
+
+
+def test_deals_without_allocations_are_ignored():
+    index = SimilarDealIndex([{"loan": {"id": "x"}, "allocations": []}])
+    assert len(index) == 0
+    assert index.query(make_deal(1)["loan"]) == []
+
+
+def test_recording_a_deal_again_replaces_it():
+    index = SimilarDealIndex([make_deal(i) for i in range(REBUILD_THRESHOLD)])
+    loan = make_deal(3)["loan"]
+    index.query(loan)
+
+    # A new deal and a revised tree entry, each recorded twice
+    revised = make_deal(3)
+    revised["allocations"] = [{"lenderId": "lender-new", "percentage": 100.0}]
+    index.add_deals([make_deal(10_000), revised])
+    index.add_deals([make_deal(10_000), revised])
+    similar = index.query(loan, k=10)
+
+    assert len(index) == REBUILD_THRESHOLD + 1
+    assert index.stats()["recent"] == 2
+    loan_ids = [deal["loanId"] for deal in similar]
+    assert len(loan_ids) == len(set(loan_ids)) == 10
+    assert similar[0]["loanId"] == "loan-3"
+    assert similar[0]["syndicate"][0]["lenderId"] == "lender-new"
+
+
+def test_replaced_tree_entries_use_their_current_features():
+    index = SimilarDealIndex([make_deal(i) for i in range(REBUILD_THRESHOLD)])
+    index.query(make_deal(0)["loan"])
+    for i in range(0, 40, 3):
+        moved = make_deal(i + 5000)
+        moved["loan"]["id"] = f"loan-{i}"
+        index.add_deals([moved])
+
+    for probe in (7, 5003, 5021):
+        loan = make_deal(probe)["loan"]
+        distances, indices = index._nearest(loan, 5)
+        assert np.allclose(distances, brute_force(index, loan, 5))
+        assert len(set(indices)) == 5
@@ -0,0 +1,116 @@
+import json
+import os
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from analytics.snapshots import COLUMNS, MANIFEST_FILE, MONTHLY, WEEKLY, SnapshotStore
+
+START = date(2023, 12, 25)  # A Monday
+
+
+def fill(store: SnapshotStore, days: int = 14):
+    for i in range(days):
+        store.append(
+            START + timedelta(days=i),
+            100.0 + i,
+            4.0 + i / 10,
+            {"Energy": 60.0, "Retail": 40.0 + i},
+        )
+
+
+def test_append_spans_years_and_keeps_daily_points(tmp_path):
+    store = SnapshotStore(str(tmp_path))
+    fill(store)
+
+    assert len(store) == 14
+    assert store._years == [2023, 2024]
+    points = store.series(store._first_days[0], store.last_day)
+    assert [p["value"] for p in points] == [100.0 + i for i in range(14)]
+    with pytest.raises(ValueError):
+        store.append(START, 1.0, 1.0)
+
+
+def test_rollups_close_on_the_last_day_and_average_yield(tmp_path):
+    store = SnapshotStore(str(tmp_path))
+    fill(store)
+    # Re-recording the latest day replaces it in the rollups too
+    store.append(START + timedelta(days=13), 200.0, 9.0)
+
+    weeks = store.rollups[WEEKLY].points(0, store.last_day)
+    assert [w["date"] for w in weeks] == ["2023-12-31", "2024-01-07"]
+    assert weeks[0]["value"] == 106.0
+    assert weeks[0]["yield"] == pytest.approx(np.mean([4.0 + i / 10 for i in range(7)]))
+    assert weeks[1]["value"] == 200.0
+    assert weeks[1]["yield"] == pytest.approx(
+        np.mean([4.0 + i / 10 for i in range(7, 13)] + [9.0]), abs=0.01
+    )
+    months = store.rollups[MONTHLY].points(0, store.last_day)
+    assert [m["date"] for m in months] == ["2023-12-31", "2024-01-07"]
+
+
+def test_reload_restores_segments_rollups_and_sectors(tmp_path):
+    store = SnapshotStore(str(tmp_path))
+    fill(store)
+
+    reloaded = SnapshotStore(str(tmp_path))
+
+    assert len(reloaded) == len(store)
+    assert reloaded.sectors == ["Energy", "Retail"]
+    assert reloaded.performance("1M") == store.performance("1M")
+    assert reloaded.performance("3M") == store.performance("3M")
+    assert reloaded.composition() == store.composition()
+    # Appends continue on the reloaded store
+    reloaded.append(START + timedelta(days=14), 120.0, 5.0)
+    assert len(SnapshotStore(str(tmp_path))) == 15
+
+
+def test_only_the_live_segment_version_is_kept(tmp_path):
+    store = SnapshotStore(str(tmp_path))
+    fill(store)
+
+    with open(tmp_path / MANIFEST_FILE) as f:
+        years = json.load(f)["years"]
+    assert sorted(os.listdir(tmp_path)) == sorted([MANIFEST_FILE, *years.values()])
+
+
+def test_crash_before_the_manifest_switch_keeps_the_old_segment(tmp_path):
+    store = SnapshotStore(str(tmp_path))
+    fill(store, days=3)
+    # A new version written but never made live
+    orphan = tmp_path / "2023.99"
+    orphan.mkdir()
+    (orphan / "day.npy").write_bytes(b"torn")
+
+    reloaded = SnapshotStore(str(tmp_path))
+
+    assert len(reloaded) == 3
+    assert not orphan.exists()
+    reloaded.append(START + timedelta(days=3), 103.0, 4.3)
+    assert reloaded._dirs[2023] == "2023.100"
+
+
+def test_stores_without_a_manifest_still_load(tmp_path):
+    legacy = tmp_path / "2024"
+    legacy.mkdir()
+    days = np.arange(19723, 19726, dtype=np.int32)  # 2024-01-01..03
+    columns = {
+        "day": days,
+        "nav": np.array([1.0, 2.0, 3.0]),
+        "yield": np.array([4.0, 4.0, 4.0]),
+        "exposure": np.ones((3, 1)),
+    }
+    for column in COLUMNS:
+        np.save(legacy / f"{column}.npy", columns[column])
+    (tmp_path / "sectors.json").write_text('["Energy"]')
+
+    store = SnapshotStore(str(tmp_path))
+    assert len(store) == 3
+    assert store.composition() == [
+        {"name": "Energy", "value": 100.0, "color": "#00f3ff"}
+    ]
+
+    store.append(date(2024, 1, 4), 4.0, 4.0, {"Energy": 1.0})
+    assert not legacy.exists()
+    assert len(SnapshotStore(str(tmp_path))) == 4